@@ -1,3 +1,5 @@
+from secrets import compare_digest
+
 from fastapi import Depends
 from fastapi.security import HTTPBasicCredentials, HTTPBearer
 from flaat.config import AccessLevel
@@ -38,3 +40,15 @@ def check_write_access(
 ) -> bool:
     """At first, validate user authentication, then, check user write access rights."""
     flaat.access_level("write")
+
+
+def check_metrics_access(
+    client_credentials: HTTPBasicCredentials = Depends(strict_security),
+) -> bool:
+    """Accept the METRICS_TOKEN, if set, otherwise check user write access rights."""
+    token = get_settings().METRICS_TOKEN
+    if token is not None and compare_digest(
+        client_credentials.credentials.encode(), token.encode()
+    ):
+        return True
+    flaat.access_level("write")
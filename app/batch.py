@@ -0,0 +1,242 @@
+from typing import Any, Dict, List, Optional, Set, Tuple, Type
+
+from neomodel import StructuredNode, db
+from neomodel.match import _rel_helper
+from neomodel.util import _UnsavedNode
+from pydantic import BaseModel
+
+from app.writes import record_removal, record_write
+
+
+class BatchWriter:
+    """Collect node and relationship changes and write them with few UNWIND statements.
+
+    Nodes are grouped by class and relationships by type and by the properties used
+    to identify their ends. Each group is written with a single statement, so the
+    number of round trips does not depend on the number of items.
+
+    Attributes:
+    ----------
+        nodes (dict): Deflated properties of the nodes to create, grouped by class.
+        merges (dict): Properties of the nodes to create or update, grouped by class
+            and identifying property.
+        updates (dict): Uids and changed properties of the nodes to update, grouped
+            by class.
+        deletions (dict): Uids of the nodes to delete, grouped by class.
+        relationships (dict): Ends and properties of the relationships to create,
+            grouped by source class, relationship name and identifying properties.
+        disconnections (dict): Ends of the relationships to delete, grouped as the
+            relationships to create.
+    """
+
+    def __init__(self) -> None:
+        self.nodes: Dict[Type[StructuredNode], List[Dict[str, Any]]] = {}
+        self.merges: Dict[Tuple[Type[StructuredNode], str], List[Dict[str, Any]]] = {}
+        self.updates: Dict[Type[StructuredNode], List[Dict[str, Any]]] = {}
+        self.deletions: Dict[Type[StructuredNode], Set[str]] = {}
+        self.relationships: Dict[
+            Tuple[Type[StructuredNode], str, str, str], List[Dict[str, Any]]
+        ] = {}
+        self.disconnections: Dict[
+            Tuple[Type[StructuredNode], str, str, str], List[Dict[str, Any]]
+        ] = {}
+
+    def __len__(self) -> int:
+        """Return the number of queued operations."""
+        return sum(
+            len(rows)
+            for group in [
+                self.nodes,
+                self.merges,
+                self.updates,
+                self.deletions,
+                self.relationships,
+                self.disconnections,
+            ]
+            for rows in group.values()
+        )
+
+    def create(self, *, model: Type[StructuredNode], obj_in: BaseModel) -> str:
+        """Add a new node and return its uid.
+
+        Properties are deflated as done by neomodel when creating a node, so default
+        values (uid included) are generated here.
+        """
+        data = model.deflate(
+            obj_in.dict(exclude_none=True), obj=_UnsavedNode(), skip_empty=True
+        )
+        self.nodes.setdefault(model, []).append(data)
+        return data["uid"]
+
+    def merge(self, *, model: Type[StructuredNode], obj_in: BaseModel, key: str) -> Any:
+        """Add a node identified by the given property and return that value.
+
+        If a node with the same value already exists, update it with the explicitly
+        set attributes. Otherwise create it.
+        """
+        props = model.defined_properties(aliases=False, rels=False)
+        on_create = model.deflate(
+            obj_in.dict(exclude_none=True), obj=_UnsavedNode(), skip_empty=True
+        )
+        on_match = {
+            k: None if v is None else props[k].deflate(v, _UnsavedNode())
+            for k, v in obj_in.dict(exclude_unset=True).items()
+            if k in props.keys()
+        }
+        row = {"key": on_create[key], "on_create": on_create, "on_match": on_match}
+        self.merges.setdefault((model, key), []).append(row)
+        return on_create[key]
+
+    def update(
+        self, *, model: Type[StructuredNode], uid: str, props: Dict[str, Any]
+    ) -> None:
+        """Set the given deflated properties on the node with the given uid.
+
+        Properties with a None value are removed from the node.
+        """
+        self.updates.setdefault(model, []).append({"uid": uid, "props": props})
+
+    def delete(self, *, model: Type[StructuredNode], uid: str) -> None:
+        """Delete the node with the given uid and all its relationships."""
+        self.deletions.setdefault(model, set()).add(uid)
+
+    def connect(
+        self,
+        *,
+        model: Type[StructuredNode],
+        name: str,
+        source: Any,
+        target: Any,
+        source_key: str = "uid",
+        target_key: str = "uid",
+        props: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Add a relationship between two nodes.
+
+        The relationship is the one with the given name defined in the source class.
+        Source and target nodes are identified by the value of the given properties.
+        """
+        row = {"source": source, "target": target, "props": props or {}}
+        group = (model, name, source_key, target_key)
+        self.relationships.setdefault(group, []).append(row)
+
+    def disconnect(
+        self,
+        *,
+        model: Type[StructuredNode],
+        name: str,
+        source: Any,
+        target: Any,
+        source_key: str = "uid",
+        target_key: str = "uid",
+    ) -> None:
+        """Remove a relationship between two nodes.
+
+        Relationship, source and target nodes are identified as in connect.
+        """
+        row = {"source": source, "target": target}
+        group = (model, name, source_key, target_key)
+        self.disconnections.setdefault(group, []).append(row)
+
+    def flush(self) -> None:
+        """Write collected changes and clear the batch.
+
+        Deletions come first, so that new nodes do not clash with the unique values
+        of the removed ones. Then nodes are written before relationships. Execute it
+        in a transaction to make the whole batch atomic.
+
+        Written nodes are recorded in the log of the current write transaction.
+        """
+        for model, uids in self.deletions.items():
+            record_removal(model, "uid", uids)
+            query = f"""
+                UNWIND $uids AS uid
+                MATCH (n:{model.__label__} {{uid: uid}})
+                DETACH DELETE n
+            """
+            db.cypher_query(query, {"uids": list(uids)})
+
+        for model, rows in self.nodes.items():
+            record_write(model, "uid", [row["uid"] for row in rows])
+            query = f"""
+                UNWIND $rows AS row
+                CREATE (n:{":".join(model.inherited_labels())})
+                SET n = row
+            """
+            db.cypher_query(query, {"rows": rows})
+
+        for (model, key), rows in self.merges.items():
+            record_write(model, key, [row["key"] for row in rows])
+            query = f"""
+                UNWIND $rows AS row
+                MERGE (n:{model.__label__} {{{key}: row.key}})
+                ON CREATE SET n = row.on_create
+                ON MATCH SET n += row.on_match
+            """
+            db.cypher_query(query, {"rows": rows})
+
+        for model, rows in self.updates.items():
+            record_write(model, "uid", [row["uid"] for row in rows])
+            query = f"""
+                UNWIND $rows AS row
+                MATCH (n:{model.__label__} {{uid: row.uid}})
+                SET n += row.props
+            """
+            db.cypher_query(query, {"rows": rows})
+
+        for (model, name, source_key, target_key), rows in self.disconnections.items():
+            rel = model.defined_properties(aliases=False, properties=False)[name]
+            rel._lookup_node_class()
+            target_label = rel.definition["node_class"].__label__
+            record_removal(model, source_key, [row["source"] for row in rows])
+            record_removal(
+                rel.definition["node_class"],
+                target_key,
+                [row["target"] for row in rows],
+            )
+            pattern = _rel_helper(
+                lhs=f"a:{model.__label__} {{{source_key}: row.source}}",
+                rhs=f"b:{target_label} {{{target_key}: row.target}}",
+                ident="r",
+                relation_type=rel.definition["relation_type"],
+                direction=rel.definition["direction"],
+            )
+            query = f"""
+                UNWIND $rows AS row
+                MATCH {pattern}
+                DELETE r
+            """
+            db.cypher_query(query, {"rows": rows})
+
+        for (model, name, source_key, target_key), rows in self.relationships.items():
+            rel = model.defined_properties(aliases=False, properties=False)[name]
+            rel._lookup_node_class()
+            target_label = rel.definition["node_class"].__label__
+            record_write(model, source_key, [row["source"] for row in rows])
+            record_write(
+                rel.definition["node_class"],
+                target_key,
+                [row["target"] for row in rows],
+            )
+            pattern = _rel_helper(
+                lhs="a",
+                rhs="b",
+                ident="r",
+                relation_type=rel.definition["relation_type"],
+                direction=rel.definition["direction"],
+            )
+            query = f"""
+                UNWIND $rows AS row
+                MATCH (a:{model.__label__} {{{source_key}: row.source}})
+                MATCH (b:{target_label} {{{target_key}: row.target}})
+                MERGE {pattern}
+                SET r += row.props
+            """
+            db.cypher_query(query, {"rows": rows})
+
+        self.nodes.clear()
+        self.merges.clear()
+        self.updates.clear()
+        self.deletions.clear()
+        self.relationships.clear()
+        self.disconnections.clear()
@@ -0,0 +1,164 @@
+import json
+from asyncio import iscoroutinefunction
+from collections import OrderedDict
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.config import get_settings
+
+
+class ReadCache:
+    """Thread-safe LRU cache whose entries expire after a given time.
+
+    Attributes:
+    ----------
+        maxsize (int): Maximum number of entries. 0 disables the cache.
+        ttl (float): Seconds after which an entry expires.
+    """
+
+    def __init__(self, *, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.__entries: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+        self.__lock = Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the value stored with the given key, or None if missing or
+        expired.
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= monotonic():
+                del self.__entries[key]
+                return None
+            self.__entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries if full."""
+        if self.maxsize <= 0:
+            return
+        with self.__lock:
+            self.__entries[key] = (monotonic() + self.ttl, value)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.maxsize:
+                self.__entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Drop all entries.
+
+        Entries of older catalog versions are no more reachable anyway: this only
+        frees their memory earlier.
+        """
+        with self.__lock:
+            self.__entries.clear()
+
+
+# Catalog version read while serving the current request, see `check_etag`.
+catalog_version: ContextVar[Optional[int]] = ContextVar("catalog_version", default=None)
+
+
+def _to_key(value: Any) -> Any:
+    """Return a JSON serializable representation of an endpoint argument."""
+    if isinstance(value, BaseModel):
+        return value.dict()
+    return value
+
+
+def _lookup(
+    func: Callable, kwargs: Dict[str, Any]
+) -> Tuple[Optional[Tuple], Optional[Response], Any]:
+    """Return the cache key of an endpoint call, its response and the cached entry,
+    if any.
+
+    The key is None when the catalog version is unknown: the call is not cached.
+    """
+    response: Optional[Response] = None
+    params: Dict[str, Any] = {}
+    for k, v in kwargs.items():
+        if isinstance(v, Response):
+            response = v
+        else:
+            params[k] = _to_key(v)
+    version = catalog_version.get()
+    if version is None:
+        return None, response, None
+    key = (
+        version,
+        func.__module__,
+        func.__qualname__,
+        json.dumps(params, sort_keys=True, default=str),
+    )
+    return key, response, read_cache.get(key)
+
+
+def _store(key: Optional[Tuple], response: Optional[Response], result: Any) -> None:
+    """Cache the result of an endpoint along with the headers set on the response."""
+    if key is None or isinstance(result, StreamingResponse):
+        # Streamed bodies can be consumed only once.
+        return
+    headers = [] if response is None else list(response.headers.items())
+    read_cache.set(key, (result, headers))
+
+
+def _restore(response: Optional[Response], entry: Tuple[Any, List]) -> Any:
+    """Return the cached result, copying the cached headers to the response."""
+    result, headers = entry
+    if response is not None:
+        response.headers.update(dict(headers))
+    return result
+
+
+def cached_read(func: Callable) -> Callable:
+    """Serve the decorated read endpoint from the read cache.
+
+    The key is made of the endpoint name, the values of its arguments (query
+    parameters, schema variant and authentication flag) and the catalog version
+    stored in the database, as read by `check_etag`. A write made by any worker
+    process bumps the version, so no worker serves stale entries. Endpoints without
+    `check_etag` are not cached. Headers set on the response are cached along with
+    the result. Already rendered responses are cached as they are, streamed ones
+    are not.
+
+    Apply it below the router decorator and above the transaction one, so that cache
+    hits do not open a transaction. Dependencies, authentication included, are
+    resolved anyway. Coroutine endpoints get a coroutine wrapper.
+    """
+    if iscoroutinefunction(func):
+        # Cache hits are served by the event loop, without taking a thread.
+
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            key, response, entry = _lookup(func, kwargs)
+            if entry is not None:
+                return _restore(response, entry)
+            result = await func(*args, **kwargs)
+            _store(key, response, result)
+            return result
+
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key, response, entry = _lookup(func, kwargs)
+        if entry is not None:
+            return _restore(response, entry)
+        result = func(*args, **kwargs)
+        _store(key, response, result)
+        return result
+
+    return wrapper
+
+
+settings = get_settings()
+read_cache = ReadCache(maxsize=settings.READ_CACHE_SIZE, ttl=settings.READ_CACHE_TTL)
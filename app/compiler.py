@@ -0,0 +1,277 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from neomodel import StructuredNode
+from neomodel.match import OPERATOR_TABLE, _rel_helper, process_filter_args
+
+IDENT = "n"
+
+# Case sensitive string operators. They compare the plain value, so Neo4j can
+# serve them from TEXT indexes (and STARTS WITH from RANGE ones too).
+STRING_OPERATORS = {
+    "contains": "CONTAINS",
+    "startswith": "STARTS WITH",
+    "endswith": "ENDS WITH",
+}
+
+# Operators whose right hand side is a regex built from the filter value.
+REGEX_OPERATORS = set(OPERATOR_TABLE.keys()) - {
+    "lt",
+    "gt",
+    "lte",
+    "gte",
+    "ne",
+    "in",
+    "isnull",
+    "exact",
+    *STRING_OPERATORS.keys(),
+}
+
+
+def _split_key(model: Type[StructuredNode], key: str) -> Tuple[str, str]:
+    """Return the database property and the Cypher operator of a filter key.
+
+    Raises:
+    ------
+        ValueError: the property or the operator do not exist.
+    """
+    prop, _, op = key.partition("__")
+    if op and op not in OPERATOR_TABLE:
+        raise ValueError(f"No such operator {op} for filter {key}")
+    props = model.defined_properties(aliases=False, rels=False)
+    if prop not in props:
+        raise ValueError(f"No such property {prop} on {model.__name__}")
+    db_prop = props[prop].db_property or prop
+    if not op:
+        return db_prop, "="
+    if op in STRING_OPERATORS:
+        return db_prop, STRING_OPERATORS[op]
+    if op in REGEX_OPERATORS:
+        return db_prop, "=~"
+    return db_prop, OPERATOR_TABLE[op]
+
+
+@lru_cache(maxsize=1024)
+def _relationship(
+    model: Type[StructuredNode], name: str
+) -> Optional[Tuple[str, int, Type[StructuredNode]]]:
+    """Return type, direction and target class of a relationship of the model.
+
+    Relationships defined only by the subclasses of the model (for example the
+    service of the quotas) are accepted when all of them share the same type and
+    direction. In that case the target is the closest common base class of their
+    targets. Return None when there is no relationship with the given name.
+    """
+    rels = []
+    classes = [model]
+    while classes:
+        cls = classes.pop()
+        rel = cls.defined_properties(aliases=False, properties=False).get(name)
+        if rel is not None:
+            rels.append(rel)
+        else:
+            classes += cls.__subclasses__()
+    if not rels:
+        return None
+    definitions = set()
+    targets: List[Type[StructuredNode]] = []
+    for rel in rels:
+        rel._lookup_node_class()
+        definitions.add((rel.definition["relation_type"], rel.definition["direction"]))
+        targets.append(rel.definition["node_class"])
+    if len(definitions) > 1:
+        raise ValueError(f"Ambiguous relationship {name} on {model.__name__}")
+    ((relation_type, direction),) = definitions
+    target = next(
+        c
+        for c in targets[0].__mro__
+        if issubclass(c, StructuredNode) and all(issubclass(t, c) for t in targets)
+    )
+    return relation_type, direction, target
+
+
+def _sort_key(model: Type[StructuredNode], sort: str) -> Tuple[str, bool]:
+    """Return the database property to sort on and whether the order is descending.
+
+    Raises:
+    ------
+        ValueError: the property does not exist.
+    """
+    desc = sort.startswith("-")
+    db_prop, _ = _split_key(model, sort.lstrip("-"))
+    return db_prop, desc
+
+
+@lru_cache(maxsize=1024)
+def compile_where(
+    model: Type[StructuredNode],
+    keys: Tuple[str, ...],
+    ident: str = IDENT,
+    prefix: str = "",
+) -> Tuple[str, ...]:
+    """Return the conditions matching the given filter keys.
+
+    Each condition refers to a parameter named after its key. `isnull` filters
+    compare the null check with the parameter, so the text does not depend on the
+    values.
+
+    Keys starting with the name of a relationship filter on the properties of the
+    related nodes, for example `slas__projects__provider__name`. They become
+    existential subqueries. Keys sharing the same relationships are checked on the
+    same related nodes, so `slas__projects__provider__name` and
+    `slas__projects__quotas__service__region__name` match the user groups with at
+    least one project satisfying both of them.
+    """
+    conditions = []
+    related: Dict[str, List[str]] = {}
+    for key in keys:
+        name, _, rest = key.partition("__")
+        if rest and _relationship(model, name) is not None:
+            related.setdefault(name, []).append(rest)
+            continue
+        db_prop, op = _split_key(model, key)
+        if op == "IS NULL":
+            conditions.append(f"({ident}.{db_prop} IS NULL) = ${prefix}{key}")
+        else:
+            conditions.append(f"{ident}.{db_prop} {op} ${prefix}{key}")
+    for name, rests in related.items():
+        pattern, inner = _compile_path(model, name, tuple(rests), ident, prefix)
+        conditions.append(f"EXISTS {{ MATCH {pattern} WHERE {' AND '.join(inner)} }}")
+    return tuple(conditions)
+
+
+def _compile_path(
+    model: Type[StructuredNode],
+    name: str,
+    keys: Tuple[str, ...],
+    ident: str,
+    prefix: str,
+) -> Tuple[str, Tuple[str, ...]]:
+    """Return the pattern reaching the related nodes and the conditions on them.
+
+    Chains of relationships with no filters on the intermediate nodes become a
+    single pattern.
+    """
+    relation_type, direction, target = _relationship(model, name)
+    var = f"{ident}_{name}"
+    pattern = _rel_helper(
+        lhs=ident,
+        rhs=f"{var}:{target.__label__}",
+        relation_type=relation_type,
+        direction=direction,
+    )
+    prefix = f"{prefix}{name}__"
+    heads = {k.partition("__")[0] for k in keys}
+    if len(heads) == 1 and all(k.partition("__")[2] for k in keys):
+        (head,) = heads
+        if _relationship(target, head) is not None:
+            rests = tuple(k.partition("__")[2] for k in keys)
+            tail, conditions = _compile_path(target, head, rests, var, prefix)
+            return pattern + tail[len(f"({var})") :], conditions
+    return pattern, compile_where(target, keys, var, prefix)
+
+
+@lru_cache(maxsize=1024)
+def compile_after(model: Type[StructuredNode], sort: str, null: bool) -> str:
+    """Return the condition matching the items following a cursor position.
+
+    The position is given by the `after_value` and `after_uid` parameters. Null
+    values come last in ascending order and first in descending order. Neo4j has no
+    tuple comparison, so the condition is spelled out.
+    """
+    db_prop, desc = _sort_key(model, sort)
+    op = "<" if desc else ">"
+    uid = f"{IDENT}.uid > $after_uid"
+    if db_prop == "uid":
+        return f"{IDENT}.uid {op} $after_uid"
+    prop = f"{IDENT}.{db_prop}"
+    if null and desc:
+        return f"({prop} IS NOT NULL OR {prop} IS NULL AND {uid})"
+    if null:
+        return f"({prop} IS NULL AND {uid})"
+    conditions = [f"{prop} {op} $after_value", f"{prop} = $after_value AND {uid}"]
+    if not desc:
+        conditions.append(f"{prop} IS NULL")
+    return f"({' OR '.join(conditions)})"
+
+
+@lru_cache(maxsize=1024)
+def compile_match(
+    model: Type[StructuredNode],
+    *,
+    keys: Tuple[str, ...],
+    sort: str,
+    after: bool = False,
+    after_null: bool = False,
+    limit: bool = False,
+) -> str:
+    """Return the query reading the items matching the given filter keys.
+
+    Skip and limit are parameters too, so requests with the same shape share the
+    same query text and Neo4j can reuse the cached plan.
+
+    Args:
+    ----
+        model (type): Class of the items to read.
+        keys (tuple): Filter keys, sorted.
+        sort (str): Sort rule. Items with equal values are sorted by uid.
+        after (bool): Return items following the position of a cursor.
+        after_null (bool): The cursor value is null.
+        limit (bool): Apply the `limit` parameter.
+
+    Returns:
+    -------
+        str.
+    """
+    conditions = list(compile_where(model, keys))
+    if after:
+        conditions.append(compile_after(model, sort, after_null))
+    db_prop, desc = _sort_key(model, sort)
+    order_by = f"{IDENT}.{db_prop}{' DESC' if desc else ''}"
+    if db_prop != "uid":
+        order_by += f", {IDENT}.uid"
+    query = f"MATCH ({IDENT}:{model.__label__})"
+    if conditions:
+        query += f" WHERE {' AND '.join(conditions)}"
+    query += f" RETURN {IDENT} ORDER BY {order_by} SKIP $skip"
+    if limit:
+        query += " LIMIT $limit"
+    return query
+
+
+@lru_cache(maxsize=1024)
+def compile_count(model: Type[StructuredNode], keys: Tuple[str, ...]) -> str:
+    """Return the query counting the items matching the given filter keys."""
+    conditions = compile_where(model, keys)
+    query = f"MATCH ({IDENT}:{model.__label__})"
+    if conditions:
+        query += f" WHERE {' AND '.join(conditions)}"
+    return query + f" RETURN count({IDENT})"
+
+
+def filter_params(
+    model: Type[StructuredNode], filters: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Return the query parameters of the given filters.
+
+    Values are converted as neomodel does: deflated, escaped and wrapped in the
+    regex of the operator. Values of the case sensitive string operators are only
+    deflated. Values of the filters on related nodes are converted using the class
+    of the related nodes.
+    """
+    params = {}
+    for key, value in filters.items():
+        target, local_key = model, key
+        name, _, rest = local_key.partition("__")
+        while rest and _relationship(target, name) is not None:
+            target, local_key = _relationship(target, name)[2], rest
+            name, _, rest = local_key.partition("__")
+        if local_key.endswith("__isnull"):
+            params[key] = bool(value)
+            continue
+        prop, _, op = local_key.partition("__")
+        if op in STRING_OPERATORS:
+            local_key = prop
+        ((_, (_, deflated)),) = process_filter_args(target, {local_key: value}).items()
+        params[key] = deflated
+    return params
@@ -0,0 +1,92 @@
+import zlib
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Maximum size of a decompressed request body, to reject decompression bombs.
+MAX_DECOMPRESSED_SIZE = 100 * 1024 * 1024  # bytes
+
+
+class GZipRequestMiddleware:
+    """ASGI middleware decompressing the request bodies sent with the
+    `Content-Encoding: gzip` header.
+
+    The endpoints receive the plain body, with its actual length. Bodies that can't
+    be decompressed, truncated ones and ones followed by other data raise a `bad
+    request` error; bodies growing over MAX_DECOMPRESSED_SIZE raise a `request
+    entity too large` error.
+
+    Attributes:
+    ----------
+        max_size (int): Maximum size of a decompressed body, in bytes.
+    """
+
+    def __init__(self, app: ASGIApp, max_size: int = MAX_DECOMPRESSED_SIZE) -> None:
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (
+            dict(scope["headers"]).get(b"content-encoding", b"").lower() != b"gzip"
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        body = bytearray()
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                return
+            try:
+                body += decompressor.decompress(
+                    message.get("body", b""), self.max_size + 1 - len(body)
+                )
+            except zlib.error:
+                msg = "Invalid gzip request body"
+                await self.error(status.HTTP_400_BAD_REQUEST, msg, scope, send)
+                return
+            if len(body) > self.max_size or decompressor.unconsumed_tail:
+                msg = f"Decompressed request body larger than {self.max_size} bytes"
+                await self.error(
+                    status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, msg, scope, send
+                )
+                return
+            more_body = message.get("more_body", False)
+        if not decompressor.eof or decompressor.unused_data:
+            msg = "Truncated gzip request body"
+            if decompressor.eof:
+                msg = "Unexpected data after the gzip request body"
+            await self.error(status.HTTP_400_BAD_REQUEST, msg, scope, send)
+            return
+
+        headers = [
+            (k, v)
+            for k, v in scope["headers"]
+            if k not in (b"content-encoding", b"content-length")
+        ]
+        headers.append((b"content-length", str(len(body)).encode()))
+        # Update the scope in place: outer middlewares read the route set on it.
+        scope["headers"] = headers
+        sent = False
+
+        async def receive_body() -> Message:
+            nonlocal sent
+            if sent:
+                return await receive()
+            sent = True
+            return {"type": "http.request", "body": bytes(body), "more_body": False}
+
+        await self.app(scope, receive_body, send)
+
+    @staticmethod
+    async def error(status_code: int, msg: str, scope: Scope, send: Send) -> None:
+        """Send an error response with the same format of the HTTP exceptions."""
+
+        async def receive_nothing() -> Message:
+            return {"type": "http.disconnect"}
+
+        response = JSONResponse({"detail": msg}, status_code=status_code)
+        await response(scope, receive_nothing, send)
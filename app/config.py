@@ -4,6 +4,7 @@ from typing import Any, Dict, List, Optional
 
 from neomodel import config
 from pydantic import AnyHttpUrl, AnyUrl, BaseSettings, EmailStr, validator
+from pydantic.fields import ModelField
 
 
 class Neo4jUriScheme(Enum):
@@ -42,6 +43,76 @@ class Settings(BaseSettings):
         config.DATABASE_URL = v
         return v
 
+    # Connection pool of each worker process. Size it so that the number of workers
+    # times the pool size fits the connections accepted by the database. Timeout and
+    # lifetime are in seconds.
+    NEO4J_MAX_CONNECTION_POOL_SIZE: int = 100
+    NEO4J_CONNECTION_ACQUISITION_TIMEOUT: float = 60
+    NEO4J_MAX_CONNECTION_LIFETIME: int = 3600
+    NEO4J_KEEP_ALIVE: bool = True
+
+    @validator(
+        "NEO4J_MAX_CONNECTION_POOL_SIZE",
+        "NEO4J_CONNECTION_ACQUISITION_TIMEOUT",
+        "NEO4J_MAX_CONNECTION_LIFETIME",
+    )
+    def check_positive(cls, v: float, field: ModelField) -> float:
+        assert v > 0, f"{field.name} must be greater than 0"
+        return v
+
+    @validator(
+        "NEO4J_MAX_CONNECTION_POOL_SIZE",
+        "NEO4J_CONNECTION_ACQUISITION_TIMEOUT",
+        "NEO4J_MAX_CONNECTION_LIFETIME",
+        "NEO4J_KEEP_ALIVE",
+    )
+    def save_pool_option(cls, v: Any, field: ModelField) -> Any:
+        setattr(config, field.name[len("NEO4J_") :], v)
+        return v
+
+    # Number of cached responses of the read endpoints (0 disables the cache) and
+    # seconds after which they expire. The cache is emptied after any write.
+    READ_CACHE_SIZE: int = 256
+    READ_CACHE_TTL: float = 60
+
+    # Number of items read from the database at once when streaming lists.
+    STREAM_CHUNK_SIZE: int = 100
+
+    # Maximum number of threads running database queries for the read endpoints. Each
+    # of them holds a connection, so they can't be more than the pool size.
+    DB_WORKER_THREADS: int = 100
+
+    @validator("DB_WORKER_THREADS")
+    def check_worker_threads(cls, v: int, values: Dict[str, Any]) -> int:
+        assert v > 0, "DB_WORKER_THREADS must be greater than 0"
+        pool_size = values.get("NEO4J_MAX_CONNECTION_POOL_SIZE")
+        if pool_size is not None:
+            assert (
+                v <= pool_size
+            ), "DB_WORKER_THREADS greater than NEO4J_MAX_CONNECTION_POOL_SIZE"
+        return v
+
+    # Fraction of the requests whose Cypher statements are traced (0 disables the
+    # tracing) and number of traces kept by each worker process. Statements lasting
+    # more than SLOW_QUERY_THRESHOLD seconds are logged (0 disables the log).
+    QUERY_TRACE_SAMPLE_RATE: float = 0
+    QUERY_TRACE_SIZE: int = 100
+    SLOW_QUERY_THRESHOLD: float = 1
+
+    # Static bearer token accepted by the metrics endpoint, for the scrapers. The
+    # tokens of the users with write access are always accepted.
+    METRICS_TOKEN: Optional[str] = None
+
+    @validator("QUERY_TRACE_SAMPLE_RATE")
+    def check_sample_rate(cls, v: float) -> float:
+        assert 0 <= v <= 1, "QUERY_TRACE_SAMPLE_RATE must be between 0 and 1"
+        return v
+
+    # Create missing indexes, report their usage and build the access index at
+    # startup. Only for single process deployments: with multiple workers, run
+    # `python -m app.prestart` once instead.
+    INSTALL_INDEXES: bool = False
+
     ADMIN_EMAIL_LIST: List[EmailStr] = []
     TRUSTED_IDP_LIST: List[AnyHttpUrl] = []
 
@@ -1,8 +1,13 @@
-from typing import Generic, List, Optional, Type, TypeVar, Union
+from typing import Generic, Iterator, List, Optional, Tuple, Type, TypeVar, Union
 
-from neomodel import StructuredNode
+from neomodel import StructuredNode, db
 from pydantic import BaseModel
 
+from app.compiler import compile_count, compile_match, filter_params
+from app.config import get_settings
+from app.projection import read_with_connections
+from app.query import decode_cursor, encode_cursor
+
 ModelType = TypeVar("ModelType", bound=StructuredNode)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
@@ -68,14 +73,127 @@ class CRUDBase(
         skip: int = 0,
         limit: Optional[int] = None,
         sort: Optional[str] = None,
+        page: int = 0,
+        size: Optional[int] = None,
+        cursor: Optional[str] = None,
         **kwargs,
     ) -> List[ModelType]:
-        if kwargs:
-            items = self.model.nodes.filter(**kwargs).order_by(sort).all()
-        else:
-            items = self.model.nodes.order_by(sort).all()
+        """Retrieve the items matching the given filters.
+
+        Skip, limit, page and size are translated into the SKIP and LIMIT clauses of
+        the generated query, so only the requested window is read from the database.
+        Pagination applies on the window defined by skip and limit.
+        When no sort rule is given, items are sorted by uid to keep pages stable.
+        The uid is also used to sort items with equal values of the sort property.
+
+        When a cursor is given, the window starts right after the item the cursor
+        points to, and items are sorted with the rule stored in the cursor. The
+        position is translated into a WHERE clause on the sort property and the uid
+        (keyset pagination), so the cost of a page does not depend on its position.
+
+        Filters may target the properties of related nodes, for example
+        `quotas__service__region__name`. They are checked by the same query, before
+        skip and limit apply.
 
-        return self.__apply_limit_and_skip(items=items, skip=skip, limit=limit)
+        The query text depends only on the filter keys, the sort rule and the
+        presence of a cursor and of an upper bound: it is compiled once and values
+        are passed as parameters.
+        """
+        params = filter_params(self.model, kwargs)
+        after = after_null = False
+        if cursor is not None:
+            sort, value, uid = decode_cursor(cursor)
+            after, after_null = True, value is None
+            params.update(after_value=value, after_uid=uid)
+        start, stop = self.__get_window(skip=skip, limit=limit, page=page, size=size)
+        params["skip"] = start
+        if stop is not None:
+            params["limit"] = stop - start
+        query = compile_match(
+            self.model,
+            keys=tuple(sorted(kwargs)),
+            sort=sort or "uid",
+            after=after,
+            after_null=after_null,
+            limit=stop is not None,
+        )
+        results, _ = db.cypher_query(query, params)
+        return [self.model.inflate(row[0]) for row in results]
+
+    def next_cursor(
+        self,
+        *,
+        items: List[ModelType],
+        skip: int = 0,
+        limit: Optional[int] = None,
+        sort: Optional[str] = None,
+        page: int = 0,
+        size: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Optional[str]:
+        """Return the cursor pointing after the last of the retrieved items.
+
+        Items must be the ones returned by get_multi with the same parameters. Return
+        None when the requested window has no upper bound or it is not full, since
+        there are no more items to read.
+        """
+        if cursor is not None:
+            sort = decode_cursor(cursor)[0]
+        start, stop = self.__get_window(skip=skip, limit=limit, page=page, size=size)
+        if stop is None or len(items) == 0 or len(items) < stop - start:
+            return None
+        return self.__cursor_of(item=items[-1], sort=sort)
+
+    def stream_multi(
+        self,
+        *,
+        auth: bool,
+        short: bool,
+        with_conn: bool,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        sort: Optional[str] = None,
+        page: int = 0,
+        size: Optional[int] = None,
+        cursor: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        **kwargs,
+    ) -> Iterator[BaseModel]:
+        """Yield the items matching the given filters converted to the output schema.
+
+        Items are read in chunks, each one in its own read transaction, so only one
+        chunk at a time is kept in memory. Transactions are closed before yielding
+        since the consumer may resume the generator from a different thread. Each
+        chunk starts from the cursor of the last item of the previous one. Filters,
+        sort rule and window are the same of get_multi.
+        """
+        chunk_size = chunk_size or get_settings().STREAM_CHUNK_SIZE
+        if cursor is not None:
+            sort = decode_cursor(cursor)[0]
+        start, stop = self.__get_window(skip=skip, limit=limit, page=page, size=size)
+        remaining = None if stop is None else stop - start
+        while remaining is None or remaining > 0:
+            count = chunk_size if remaining is None else min(chunk_size, remaining)
+            with db.read_transaction:
+                items = self.get_multi(
+                    skip=start, limit=count, sort=sort, cursor=cursor, **kwargs
+                )
+                out = self.choose_out_schema(
+                    items=items, auth=auth, short=short, with_conn=with_conn
+                )
+            yield from out
+            if len(items) < count:
+                return
+            start = 0
+            cursor = self.__cursor_of(item=items[-1], sort=sort)
+            if remaining is not None:
+                remaining -= count
+
+    def count(self, **kwargs) -> int:
+        """Count the items matching the given filters."""
+        query = compile_count(self.model, tuple(sorted(kwargs)))
+        results, _ = db.cypher_query(query, filter_params(self.model, kwargs))
+        return results[0][0]
 
     def create(self, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in = self.create_schema.parse_obj(obj_in)
@@ -126,19 +244,39 @@ class CRUDBase(
     ]:
         if auth:
             if with_conn:
-                return [self.read_extended_schema.from_orm(i) for i in items]
+                return read_with_connections(
+                    schema=self.read_extended_schema, model=self.model, items=items
+                )
             if short:
                 return [self.read_short_schema.from_orm(i) for i in items]
             return [self.read_schema.from_orm(i) for i in items]
         if with_conn:
-            return [self.read_extended_public_schema.from_orm(i) for i in items]
+            return read_with_connections(
+                schema=self.read_extended_public_schema, model=self.model, items=items
+            )
         return [self.read_public_schema.from_orm(i) for i in items]
 
-    def __apply_limit_and_skip(
-        self, *, items: List[ModelType], skip: int = 0, limit: Optional[int] = None
-    ) -> List[ModelType]:
-        if limit is None:
-            return items[skip:]
+    def __cursor_of(self, *, item: ModelType, sort: Optional[str]) -> str:
+        """Return the cursor pointing after the given item."""
+        sort = sort or "uid"
+        key = sort.lstrip("-")
+        value = getattr(item, key)
+        if value is not None:
+            value = getattr(self.model, key).deflate(value)
+        return encode_cursor(sort=sort, value=value, uid=item.uid)
+
+    def __get_window(
+        self, *, skip: int = 0, limit: Optional[int], page: int, size: Optional[int]
+    ) -> Tuple[int, Optional[int]]:
+        """Return start and stop indexes of the items to retrieve.
+
+        Stop is None when there is no upper bound.
+        """
         start = skip
-        end = skip + limit
-        return items[start:end]
+        stop = None if limit is None else skip + limit
+        if size is not None:
+            start += page * size
+            stop = start + size if stop is None else min(stop, start + size)
+        if stop is not None:
+            stop = max(stop, start)
+        return start, stop
@@ -0,0 +1,129 @@
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, Optional, TypeVar
+
+from anyio import CapacityLimiter
+from anyio.to_thread import run_sync
+from neomodel import db
+
+from app.cache import read_cache
+from app.config import get_settings
+from app.pool import observe_wait, timed
+from app.user_group.access import refresh_access
+from app.writes import WriteLog, write_log
+
+CATALOG_VERSION_LABEL = "CatalogVersion"
+
+T = TypeVar("T")
+
+_db_limiter: Optional[CapacityLimiter] = None
+
+
+async def run_in_db_thread(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a function performing database queries in a worker thread.
+
+    The driver is synchronous, so each in-flight query holds a thread. Database
+    threads are bounded by their own limiter, sized with DB_WORKER_THREADS, instead
+    of the default thread pool shared with the sync dependencies. Meanwhile, the
+    event loop keeps serving the other requests.
+
+    neomodel connections are thread-local: statements that must share a transaction
+    have to run in the same call.
+
+    The time spent waiting for a free thread is recorded in the pool metrics.
+    """
+    global _db_limiter
+    if _db_limiter is None:
+        # The limiter must be created within the running event loop.
+        _db_limiter = CapacityLimiter(get_settings().DB_WORKER_THREADS)
+    submitted = perf_counter()
+
+    def run():
+        observe_wait("thread", perf_counter() - submitted)
+        return func(*args, **kwargs)
+
+    return await run_sync(run, limiter=_db_limiter)
+
+
+def read_transaction(func: Callable) -> Callable:
+    """Run the decorated endpoint in a single read transaction.
+
+    Apply it below the router decorator, so that FastAPI registers the wrapped
+    function. The signature is preserved to let FastAPI resolve the endpoint
+    dependencies. With a neo4j routing scheme, read sessions are served by followers.
+
+    The endpoint becomes a coroutine whose body runs in a database thread, see
+    `run_in_db_thread`. Read endpoints return already rendered responses, so nothing
+    touches the database once the body returns.
+
+    Dependencies are resolved in other threads and neomodel connections are
+    thread-local, so they do not take part in the transaction.
+    """
+
+    def run(*args, **kwargs):
+        with timed(db.read_transaction):
+            return func(*args, **kwargs)
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_in_db_thread(run, *args, **kwargs)
+
+    return wrapper
+
+
+def write_transaction(func: Callable) -> Callable:
+    """Run the decorated endpoint in a single write transaction.
+
+    All the statements executed by the endpoint are committed together, or rolled
+    back when an exception is raised.
+
+    Apply it below the router decorator, so that FastAPI registers the wrapped
+    function. The signature is preserved to let FastAPI resolve the endpoint
+    dependencies.
+
+    Written nodes are recorded in a WriteLog, see `track_writes`. When something
+    has been written, the access index of the user groups reaching the written
+    nodes is brought up to date and the catalog version is incremented in the same
+    transaction, then, once the transaction is committed, the read cache is
+    invalidated. Endpoints writing nothing, for example the ones returning `not
+    modified`, leave the catalog version unchanged, so clients' ETags keep matching.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        log = WriteLog()
+        token = write_log.set(log)
+        try:
+            with timed(db.write_transaction):
+                result = func(*args, **kwargs)
+                if log.written:
+                    refresh_access(log.affected_groups())
+                    bump_catalog_version()
+        finally:
+            write_log.reset(token)
+        if log.written:
+            read_cache.invalidate()
+        return result
+
+    return wrapper
+
+
+def get_catalog_version() -> int:
+    """Return the current catalog version.
+
+    The version is stored in the database and incremented by every write
+    transaction, so it is shared by all the application instances.
+    """
+    query = f"MATCH (v:{CATALOG_VERSION_LABEL}) RETURN coalesce(max(v.version), 0)"
+    results, _ = db.cypher_query(query)
+    return results[0][0]
+
+
+def bump_catalog_version() -> None:
+    """Increment the catalog version, creating it if missing."""
+    query = f"""
+        MERGE (v:{CATALOG_VERSION_LABEL})
+        ON CREATE SET v.version = 1
+        ON MATCH SET v.version = v.version + 1
+    """
+    db.cypher_query(query)
@@ -0,0 +1,79 @@
+from typing import Any, Callable
+
+from fastapi import Depends, HTTPException, Request, Response, status
+
+from app.auth.dependencies import check_read_access
+from app.cache import catalog_version
+from app.db import get_catalog_version, run_in_db_thread
+
+
+async def check_etag(
+    request: Request, response: Response, auth: bool = Depends(check_read_access)
+) -> None:
+    """Set the ETag of the response and handle conditional requests.
+
+    The ETag is made of the catalog version and of the authentication flag, since
+    authenticated and anonymous users receive different representations of the same
+    resource. If the If-None-Match header contains the current ETag, return
+    `not modified` before reading any entity.
+
+    The version is also stored in the request context, where the read cache takes
+    it to build its keys.
+
+    Add it to the dependencies of the endpoints reading lists. Endpoints reading an
+    item use `check_item_etag`, so that missing items are not reported as `not
+    modified`.
+
+    Args:
+    ----
+        request (Request): current request.
+        response (Response): response where to set the ETag.
+        auth (bool): the request contains a valid token.
+
+    Returns:
+    -------
+        None
+
+    Raises:
+    ------
+        NotModifiedError: the client already has the current representation.
+    """
+    version = await run_in_db_thread(get_catalog_version)
+    catalog_version.set(version)
+    etag = f'"{version}-{int(auth)}"'
+    headers = {"ETag": etag, "Vary": "Authorization"}
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        if etag in tags or f"W/{etag}" in tags or "*" in tags:
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+    response.headers.update(headers)
+
+
+def check_item_etag(valid_item_id: Callable[..., Any]) -> Callable[..., Any]:
+    """Return the dependency handling the conditional requests on an item.
+
+    The item dependency is resolved before `check_etag`: requests for a missing
+    item raise the `not found` error, whatever their If-None-Match header. FastAPI
+    caches the dependency results of a request, so the endpoint receives the same
+    item without reading it again.
+
+    Args:
+    ----
+        valid_item_id (callable): dependency returning the target item, raising a
+            `not found` error when it does not exist.
+
+    Returns:
+    -------
+        Callable. The dependency to add to the dependencies of the endpoint.
+    """
+
+    async def dependency(
+        item: Any = Depends(valid_item_id),  # noqa: B008
+        etag: None = Depends(check_etag),
+    ) -> None:
+        """Check the item exists, then handle the conditional request."""
+
+    return dependency
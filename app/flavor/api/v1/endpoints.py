@@ -1,9 +1,11 @@
 from typing import List, Optional, Union
 
 from fastapi import APIRouter, Depends, HTTPException, Response, status
-from neomodel import db
 
 from app.auth.dependencies import check_read_access, check_write_access
+from app.cache import cached_read
+from app.db import read_transaction, write_transaction
+from app.etag import check_etag, check_item_etag
 from app.flavor.api.dependencies import (
     valid_flavor_id,
     validate_new_flavor_values,
@@ -21,14 +23,16 @@ from app.flavor.schemas_extended import (
     FlavorReadExtended,
     FlavorReadExtendedPublic,
 )
-from app.query import DbQueryCommonParams, Pagination, SchemaSize
+from app.query import DbQueryCommonParams, Pagination, SchemaSize, Streaming
+from app.response import schema_response
+from app.stream import stream_response
 
 router = APIRouter(prefix="/flavors", tags=["flavors"])
 
 
-@db.read_transaction
 @router.get(
     "/",
+    dependencies=[Depends(check_etag)],
     response_model=Union[
         List[FlavorReadExtended],
         List[FlavorRead],
@@ -41,25 +45,49 @@ router = APIRouter(prefix="/flavors", tags=["flavors"])
         It is possible to filter on flavors attributes and other \
         common query parameters.",
 )
+@cached_read
+@read_transaction
 def get_flavors(
+    response: Response,
     auth: bool = Depends(check_read_access),
     comm: DbQueryCommonParams = Depends(),
     page: Pagination = Depends(),
     size: SchemaSize = Depends(),
+    stream: Streaming = Depends(),
     item: FlavorQuery = Depends(),
 ):
+    response.headers["X-Total-Count"] = str(
+        flavor.count(**item.dict(exclude_none=True))
+    )
+    if stream.stream is not None:
+        items = flavor.stream_multi(
+            auth=auth,
+            short=size.short,
+            with_conn=size.with_conn,
+            **comm.dict(exclude_none=True),
+            **page.dict(exclude_none=True),
+            **item.dict(exclude_none=True),
+        )
+        return stream_response(items=items, fmt=stream.stream, response=response)
     items = flavor.get_multi(
-        **comm.dict(exclude_none=True), **item.dict(exclude_none=True)
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
     )
-    items = flavor.paginate(items=items, page=page.page, size=page.size)
-    return flavor.choose_out_schema(
+    cursor = flavor.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
+    )
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    items = flavor.choose_out_schema(
         items=items, auth=auth, short=size.short, with_conn=size.with_conn
     )
+    return schema_response(content=items, response=response)
 
 
-@db.read_transaction
 @router.get(
     "/{flavor_uid}",
+    dependencies=[Depends(check_item_etag(valid_flavor_id))],
     response_model=Union[
         FlavorReadExtended,
         FlavorRead,
@@ -72,17 +100,19 @@ def get_flavors(
         If no entity matches the given *uid*, the endpoint \
         raises a `not found` error.",
 )
+@read_transaction
 def get_flavor(
+    response: Response,
     auth: bool = Depends(check_read_access),
     size: SchemaSize = Depends(),
     item: Flavor = Depends(valid_flavor_id),
 ):
-    return flavor.choose_out_schema(
+    items = flavor.choose_out_schema(
         items=[item], auth=auth, short=size.short, with_conn=size.with_conn
-    )[0]
+    )
+    return schema_response(content=items[0], response=response)
 
 
-@db.write_transaction
 @router.patch(
     "/{flavor_uid}",
     status_code=status.HTTP_200_OK,
@@ -101,6 +131,7 @@ def get_flavor(
         At first validate new flavor values checking there are \
         no other items with the given *uuid* and *name*.",
 )
+@write_transaction
 def put_flavor(
     update_data: FlavorUpdate,
     response: Response,
@@ -112,7 +143,6 @@ def put_flavor(
     return db_item
 
 
-@db.write_transaction
 @router.delete(
     "/{flavor_uid}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -125,6 +155,7 @@ def put_flavor(
         If the deletion procedure fails, raises a `internal \
         server` error",
 )
+@write_transaction
 def delete_flavors(item: Flavor = Depends(valid_flavor_id)):
     if not flavor.remove(db_obj=item):
         raise HTTPException(
@@ -42,8 +42,8 @@ class Flavor(StructuredNode):
 
     uid = UniqueIdProperty()
     description = StringProperty(default="")
-    name = StringProperty(required=True)
-    uuid = StringProperty(required=True)
+    name = StringProperty(required=True, index=True)
+    uuid = StringProperty(required=True, index=True)
     disk = IntegerProperty(default=0)
     is_public = BooleanProperty(default=True)
     ram = IntegerProperty(default=0)
@@ -66,3 +66,8 @@ class Flavor(StructuredNode):
         "CAN_USE_VM_FLAVOR",
         cardinality=ZeroOrMore,
     )
+    user_groups = RelationshipFrom(
+        "..user_group.models.UserGroup",
+        "CAN_ACCESS",
+        cardinality=ZeroOrMore,
+    )
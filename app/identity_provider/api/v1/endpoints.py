@@ -4,9 +4,11 @@ from typing import List, Optional, Union
 # from app.user_group.crud import user_group
 # from app.user_group.schemas import UserGroupCreate
 from fastapi import APIRouter, Depends, HTTPException, Response, status
-from neomodel import db
 
 from app.auth.dependencies import check_read_access, check_write_access
+from app.cache import cached_read
+from app.db import read_transaction, write_transaction
+from app.etag import check_etag, check_item_etag
 
 # from app.auth_method.schemas import AuthMethodCreate
 from app.identity_provider.api.dependencies import (
@@ -30,14 +32,16 @@ from app.identity_provider.schemas_extended import (
 # from app.project.schemas_extended import UserGroupReadExtended
 # from app.provider.api.dependencies import valid_provider_id
 # from app.provider.models import Provider
-from app.query import DbQueryCommonParams, Pagination, SchemaSize
+from app.query import DbQueryCommonParams, Pagination, SchemaSize, Streaming
+from app.response import schema_response
+from app.stream import stream_response
 
 router = APIRouter(prefix="/identity_providers", tags=["identity_providers"])
 
 
-@db.read_transaction
 @router.get(
     "/",
+    dependencies=[Depends(check_etag)],
     response_model=Union[
         List[IdentityProviderReadExtended],
         List[IdentityProviderRead],
@@ -50,25 +54,49 @@ router = APIRouter(prefix="/identity_providers", tags=["identity_providers"])
         It is possible to filter on identity providers attributes and other \
         common query parameters.",
 )
+@cached_read
+@read_transaction
 def get_identity_providers(
+    response: Response,
     auth: bool = Depends(check_read_access),
     comm: DbQueryCommonParams = Depends(),
     page: Pagination = Depends(),
     size: SchemaSize = Depends(),
+    stream: Streaming = Depends(),
     item: IdentityProviderQuery = Depends(),
 ):
+    response.headers["X-Total-Count"] = str(
+        identity_provider.count(**item.dict(exclude_none=True))
+    )
+    if stream.stream is not None:
+        items = identity_provider.stream_multi(
+            auth=auth,
+            short=size.short,
+            with_conn=size.with_conn,
+            **comm.dict(exclude_none=True),
+            **page.dict(exclude_none=True),
+            **item.dict(exclude_none=True),
+        )
+        return stream_response(items=items, fmt=stream.stream, response=response)
     items = identity_provider.get_multi(
-        **comm.dict(exclude_none=True), **item.dict(exclude_none=True)
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
     )
-    items = identity_provider.paginate(items=items, page=page.page, size=page.size)
-    return identity_provider.choose_out_schema(
+    cursor = identity_provider.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
+    )
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    items = identity_provider.choose_out_schema(
         items=items, auth=auth, short=size.short, with_conn=size.with_conn
     )
+    return schema_response(content=items, response=response)
 
 
-@db.read_transaction
 @router.get(
     "/{identity_provider_uid}",
+    dependencies=[Depends(check_item_etag(valid_identity_provider_id))],
     response_model=Union[
         IdentityProviderReadExtended,
         IdentityProviderRead,
@@ -81,17 +109,19 @@ def get_identity_providers(
         If no entity matches the given *uid*, the endpoint \
         raises a `not found` error.",
 )
+@read_transaction
 def get_identity_provider(
+    response: Response,
     auth: bool = Depends(check_read_access),
     size: SchemaSize = Depends(),
     item: IdentityProvider = Depends(valid_identity_provider_id),
 ):
-    return identity_provider.choose_out_schema(
+    items = identity_provider.choose_out_schema(
         items=[item], auth=auth, short=size.short, with_conn=size.with_conn
-    )[0]
+    )
+    return schema_response(content=items[0], response=response)
 
 
-@db.write_transaction
 @router.patch(
     "/{identity_provider_uid}",
     status_code=status.HTTP_200_OK,
@@ -110,6 +140,7 @@ def get_identity_provider(
         At first validate new identity provider values checking there are \
         no other items with the given *endpoint*.",
 )
+@write_transaction
 def put_identity_provider(
     update_data: IdentityProviderUpdate,
     response: Response,
@@ -121,7 +152,6 @@ def put_identity_provider(
     return db_item
 
 
-@db.write_transaction
 @router.delete(
     "/{identity_provider_uid}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -133,6 +163,7 @@ def put_identity_provider(
         raises a `not found` error. \
         On cascade, delete related user groups.",
 )
+@write_transaction
 def delete_identity_providers(
     item: IdentityProvider = Depends(valid_identity_provider_id),
 ):
@@ -1,9 +1,11 @@
 from typing import List, Optional, Union
 
 from fastapi import APIRouter, Depends, HTTPException, Response, status
-from neomodel import db
 
 from app.auth.dependencies import check_read_access, check_write_access
+from app.cache import cached_read
+from app.db import read_transaction, write_transaction
+from app.etag import check_etag, check_item_etag
 from app.image.api.dependencies import (
     valid_image_id,
     validate_new_image_values,
@@ -21,14 +23,16 @@ from app.image.schemas_extended import (
     ImageReadExtended,
     ImageReadExtendedPublic,
 )
-from app.query import DbQueryCommonParams, Pagination, SchemaSize
+from app.query import DbQueryCommonParams, Pagination, SchemaSize, Streaming
+from app.response import schema_response
+from app.stream import stream_response
 
 router = APIRouter(prefix="/images", tags=["images"])
 
 
-@db.read_transaction
 @router.get(
     "/",
+    dependencies=[Depends(check_etag)],
     response_model=Union[
         List[ImageReadExtended],
         List[ImageRead],
@@ -41,25 +45,47 @@ router = APIRouter(prefix="/images", tags=["images"])
         It is possible to filter on images attributes and other \
         common query parameters.",
 )
+@cached_read
+@read_transaction
 def get_images(
+    response: Response,
     auth: bool = Depends(check_read_access),
     comm: DbQueryCommonParams = Depends(),
     page: Pagination = Depends(),
     size: SchemaSize = Depends(),
+    stream: Streaming = Depends(),
     item: ImageQuery = Depends(),
 ):
+    response.headers["X-Total-Count"] = str(image.count(**item.dict(exclude_none=True)))
+    if stream.stream is not None:
+        items = image.stream_multi(
+            auth=auth,
+            short=size.short,
+            with_conn=size.with_conn,
+            **comm.dict(exclude_none=True),
+            **page.dict(exclude_none=True),
+            **item.dict(exclude_none=True),
+        )
+        return stream_response(items=items, fmt=stream.stream, response=response)
     items = image.get_multi(
-        **comm.dict(exclude_none=True), **item.dict(exclude_none=True)
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
+    )
+    cursor = image.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
     )
-    items = image.paginate(items=items, page=page.page, size=page.size)
-    return image.choose_out_schema(
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    items = image.choose_out_schema(
         items=items, auth=auth, short=size.short, with_conn=size.with_conn
     )
+    return schema_response(content=items, response=response)
 
 
-@db.read_transaction
 @router.get(
     "/{image_uid}",
+    dependencies=[Depends(check_item_etag(valid_image_id))],
     response_model=Union[
         ImageReadExtended,
         ImageRead,
@@ -72,17 +98,19 @@ def get_images(
         If no entity matches the given *uid*, the endpoint \
         raises a `not found` error.",
 )
+@read_transaction
 def get_image(
+    response: Response,
     auth: bool = Depends(check_read_access),
     size: SchemaSize = Depends(),
     item: Image = Depends(valid_image_id),
 ):
-    return image.choose_out_schema(
+    items = image.choose_out_schema(
         items=[item], auth=auth, short=size.short, with_conn=size.with_conn
-    )[0]
+    )
+    return schema_response(content=items[0], response=response)
 
 
-@db.write_transaction
 @router.patch(
     "/{image_uid}",
     status_code=status.HTTP_200_OK,
@@ -101,6 +129,7 @@ def get_image(
         At first validate new image values checking there are \
         no other items with the given *uuid* and *name*.",
 )
+@write_transaction
 def put_image(
     update_data: ImageUpdate,
     response: Response,
@@ -112,7 +141,6 @@ def put_image(
     return db_item
 
 
-@db.write_transaction
 @router.delete(
     "/{image_uid}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -125,6 +153,7 @@ def put_image(
         If the deletion procedure fails, raises a `internal \
         server` error",
 )
+@write_transaction
 def delete_images(item: Image = Depends(valid_image_id)):
     if not image.remove(db_obj=item):
         raise HTTPException(
@@ -39,8 +39,8 @@ class Image(StructuredNode):
 
     uid = UniqueIdProperty()
     description = StringProperty(default="")
-    name = StringProperty(required=True)
-    uuid = StringProperty(required=True)
+    name = StringProperty(required=True, index=True)
+    uuid = StringProperty(required=True, index=True)
     os_type = StringProperty()
     os_distro = StringProperty()
     os_version = StringProperty()
@@ -63,3 +63,8 @@ class Image(StructuredNode):
         "CAN_USE_VM_IMAGE",
         cardinality=ZeroOrMore,
     )
+    user_groups = RelationshipFrom(
+        "..user_group.models.UserGroup",
+        "CAN_ACCESS",
+        cardinality=ZeroOrMore,
+    )
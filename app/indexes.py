@@ -0,0 +1,184 @@
+import logging
+from dataclasses import dataclass
+from importlib import import_module
+from typing import Any, Dict, List, Optional, Set, Tuple, Type
+
+from neo4j.exceptions import ClientError
+from neomodel import StringProperty, StructuredNode, db
+
+from app.compiler import STRING_OPERATORS
+
+logger = logging.getLogger(__name__)
+
+RANGE = "RANGE"
+TEXT = "TEXT"
+UNIQUE = "UNIQUENESS"
+
+# Query model operators served by text indexes: the compiler turns them into
+# CONTAINS and ENDS WITH conditions. STARTS WITH is served by range indexes too.
+TEXT_OPERATORS = tuple(op for op in STRING_OPERATORS if op != "startswith")
+
+
+@dataclass(frozen=True)
+class Index:
+    """Index or constraint on a node label.
+
+    Names follow the neomodel ones, so indexes created by `neomodel_install_labels`
+    are recognized.
+
+    Attributes:
+    ----------
+        kind (str): RANGE or TEXT index, or UNIQUENESS constraint.
+        label (str): Node label.
+        properties (tuple): Indexed properties.
+    """
+
+    kind: str
+    label: str
+    properties: Tuple[str, ...]
+
+    @property
+    def name(self) -> str:
+        props = "_".join(self.properties)
+        if self.kind == UNIQUE:
+            return f"constraint_unique_{self.label}_{props}"
+        if self.kind == TEXT:
+            return f"text_index_{self.label}_{props}"
+        return f"index_{self.label}_{props}"
+
+    @property
+    def statement(self) -> str:
+        props = ", ".join(f"n.{p}" for p in self.properties)
+        if self.kind == UNIQUE:
+            return (
+                f"CREATE CONSTRAINT {self.name} IF NOT EXISTS "
+                f"FOR (n:{self.label}) REQUIRE ({props}) IS UNIQUE"
+            )
+        return (
+            f"CREATE {self.kind} INDEX {self.name} IF NOT EXISTS "
+            f"FOR (n:{self.label}) ON ({props})"
+        )
+
+
+def _query_model(model: Type[StructuredNode]) -> Optional[Type]:
+    """Return the Query model of the given node class, if any.
+
+    Query models are defined in the schemas module near the models one and are named
+    after the node class.
+    """
+    module = model.__module__.rsplit(".", 1)[0] + ".schemas"
+    try:
+        return getattr(import_module(module), f"{model.__name__}Query", None)
+    except ImportError:
+        return None
+
+
+def required_indexes() -> Set[Index]:
+    """Return the indexes derived from the app node classes.
+
+    Only the labels of the most specific classes are indexed. Properties declared
+    with `unique_index` get a uniqueness constraint, the ones declared with `index` a
+    range index. String indexed properties which the Query model allows to filter by
+    substring or suffix get a text index too. Case insensitive and regex filters
+    are compiled to regular expressions, which no index serves.
+    """
+    models = [
+        model
+        for model in db._NODE_CLASS_REGISTRY.values()
+        if issubclass(model, StructuredNode) and model.__module__.startswith("app.")
+    ]
+    indexes = set()
+    for model in models:
+        if any(m is not model and issubclass(m, model) for m in models):
+            # Nodes of base classes always have the labels of a subclass too.
+            continue
+        query_model = _query_model(model)
+        query_fields = {} if query_model is None else query_model.__fields__
+        label = model.__label__
+        for name, prop in model.defined_properties(aliases=False, rels=False).items():
+            db_name = prop.db_property or name
+            if prop.unique_index:
+                indexes.add(Index(kind=UNIQUE, label=label, properties=(db_name,)))
+            elif prop.index:
+                indexes.add(Index(kind=RANGE, label=label, properties=(db_name,)))
+                if isinstance(prop, StringProperty) and any(
+                    f"{name}__{op}" in query_fields for op in TEXT_OPERATORS
+                ):
+                    indexes.add(Index(kind=TEXT, label=label, properties=(db_name,)))
+    return indexes
+
+
+def existing_indexes() -> Dict[Index, Dict[str, Any]]:
+    """Return the node indexes in the database with their usage statistics.
+
+    Indexes backing a uniqueness constraint are reported as the constraint.
+    """
+    query = """
+        SHOW INDEXES
+        YIELD name, type, entityType, labelsOrTypes, properties, owningConstraint,
+            readCount, lastRead, trackedSince
+        WHERE entityType = 'NODE' AND labelsOrTypes IS NOT NULL
+        RETURN name, type, labelsOrTypes[0], properties,
+            owningConstraint IS NOT NULL, readCount, lastRead, trackedSince
+    """
+    results, _ = db.cypher_query(query)
+    indexes = {}
+    for name, kind, label, props, unique, reads, last_read, since in results:
+        index = Index(
+            kind=UNIQUE if unique else kind, label=label, properties=tuple(props)
+        )
+        indexes[index] = {
+            "name": name,
+            "read_count": reads,
+            "last_read": last_read,
+            "tracked_since": since,
+        }
+    return indexes
+
+
+def install_indexes() -> List[Index]:
+    """Create the required indexes missing in the database.
+
+    Creation failures, for example a uniqueness constraint violated by existing
+    data, are logged and do not stop the remaining ones.
+
+    Returns:
+    -------
+        List[Index]. Created indexes.
+    """
+    existing = existing_indexes()
+    created = []
+    for index in sorted(required_indexes(), key=lambda i: i.name):
+        if index in existing:
+            continue
+        try:
+            db.cypher_query(index.statement)
+        except ClientError as e:
+            logger.warning("Index %s not created: %s", index.name, e.message)
+            continue
+        logger.info("Index %s created", index.name)
+        created.append(index)
+    return created
+
+
+def report_index_usage() -> List[Dict[str, Any]]:
+    """Log and return how many times each node index has been read.
+
+    Indexes never read are worth a check: they only slow down writes. Required
+    indexes are flagged, so unused extra ones stand out.
+    """
+    required = required_indexes()
+    report = []
+    for index, usage in sorted(existing_indexes().items(), key=lambda i: i[0].name):
+        row = {**usage, "kind": index.kind, "required": index in required}
+        logger.info(
+            "Index %s (%s on %s%s): %s reads, last read %s",
+            usage["name"],
+            index.kind,
+            index.label,
+            list(index.properties),
+            usage["read_count"],
+            usage["last_read"],
+        )
+        report.append(row)
+    return report
@@ -1,9 +1,11 @@
 from typing import List, Optional, Union
 
 from fastapi import APIRouter, Depends, HTTPException, Response, status
-from neomodel import db
 
 from app.auth.dependencies import check_read_access, check_write_access
+from app.cache import cached_read
+from app.db import read_transaction, write_transaction
+from app.etag import check_etag, check_item_etag
 from app.location.api.dependencies import (
     valid_location_id,
     validate_new_location_values,
@@ -21,7 +23,9 @@ from app.location.schemas_extended import (
     LocationReadExtended,
     LocationReadExtendedPublic,
 )
-from app.query import DbQueryCommonParams, Pagination, SchemaSize
+from app.query import DbQueryCommonParams, Pagination, SchemaSize, Streaming
+from app.response import schema_response
+from app.stream import stream_response
 
 # from app.region.models import Region
 # from app.region.api.dependencies import valid_region_id
@@ -29,9 +33,9 @@ from app.query import DbQueryCommonParams, Pagination, SchemaSize
 router = APIRouter(prefix="/locations", tags=["locations"])
 
 
-@db.read_transaction
 @router.get(
     "/",
+    dependencies=[Depends(check_etag)],
     response_model=Union[
         List[LocationReadExtended],
         List[LocationRead],
@@ -44,25 +48,49 @@ router = APIRouter(prefix="/locations", tags=["locations"])
         It is possible to filter on locations attributes and other \
         common query parameters.",
 )
+@cached_read
+@read_transaction
 def get_locations(
+    response: Response,
     auth: bool = Depends(check_read_access),
     comm: DbQueryCommonParams = Depends(),
     page: Pagination = Depends(),
     size: SchemaSize = Depends(),
+    stream: Streaming = Depends(),
     item: LocationQuery = Depends(),
 ):
+    response.headers["X-Total-Count"] = str(
+        location.count(**item.dict(exclude_none=True))
+    )
+    if stream.stream is not None:
+        items = location.stream_multi(
+            auth=auth,
+            short=size.short,
+            with_conn=size.with_conn,
+            **comm.dict(exclude_none=True),
+            **page.dict(exclude_none=True),
+            **item.dict(exclude_none=True),
+        )
+        return stream_response(items=items, fmt=stream.stream, response=response)
     items = location.get_multi(
-        **comm.dict(exclude_none=True), **item.dict(exclude_none=True)
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
     )
-    items = location.paginate(items=items, page=page.page, size=page.size)
-    return location.choose_out_schema(
+    cursor = location.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
+    )
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    items = location.choose_out_schema(
         items=items, auth=auth, short=size.short, with_conn=size.with_conn
     )
+    return schema_response(content=items, response=response)
 
 
-@db.read_transaction
 @router.get(
     "/{location_uid}",
+    dependencies=[Depends(check_item_etag(valid_location_id))],
     response_model=Union[
         LocationReadExtended,
         LocationRead,
@@ -75,17 +103,19 @@ def get_locations(
         If no entity matches the given *uid*, the endpoint \
         raises a `not found` error.",
 )
+@read_transaction
 def get_location(
+    response: Response,
     auth: bool = Depends(check_read_access),
     size: SchemaSize = Depends(),
     item: Location = Depends(valid_location_id),
 ):
-    return location.choose_out_schema(
+    items = location.choose_out_schema(
         items=[item], auth=auth, short=size.short, with_conn=size.with_conn
-    )[0]
+    )
+    return schema_response(content=items[0], response=response)
 
 
-@db.write_transaction
 @router.patch(
     "/{location_uid}",
     status_code=status.HTTP_200_OK,
@@ -104,6 +134,7 @@ def get_location(
         At first validate new location values checking there are \
         no other items with the given *site*.",
 )
+@write_transaction
 def put_location(
     update_data: LocationUpdate,
     response: Response,
@@ -115,7 +146,6 @@ def put_location(
     return db_item
 
 
-@db.write_transaction
 @router.delete(
     "/{location_uid}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -128,6 +158,7 @@ def put_location(
         If the deletion procedure fails, raises a `internal \
         server` error",
 )
+@write_transaction
 def delete_location(item: Location = Depends(valid_location_id)):
     if not location.remove(db_obj=item):
         raise HTTPException(
@@ -1,9 +1,25 @@
+import os
+from typing import Any, Dict, List
+
 import uvicorn
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
+from app.auth.dependencies import check_metrics_access, check_write_access
+from app.compression import GZipRequestMiddleware
 from app.config import get_settings
+from app.metrics import (
+    CONTENT_TYPE,
+    MetricsMiddleware,
+    instrument_queries,
+    render_metrics,
+)
+from app.pool import share_driver
+from app.prestart import setup_database
 from app.router import router_v1
+from app.tracing import trace_store, trace_worker
+from app.writes import track_writes
 
 summary = """
 Configuration Management Database (CMDB)
@@ -26,6 +42,9 @@ contact = {
 }
 
 settings = get_settings()
+share_driver()
+instrument_queries()
+track_writes()
 
 tags_metadata = [
     {
@@ -46,6 +65,7 @@ app = FastAPI(
     title=settings.PROJECT_NAME,
     version=version,
 )
+app.add_middleware(GZipRequestMiddleware)
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
         CORSMiddleware,
@@ -54,6 +74,7 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+app.add_middleware(MetricsMiddleware)
 
 sub_app_v1 = FastAPI(
     contact=contact,
@@ -66,5 +87,82 @@ sub_app_v1.include_router(router_v1)
 app.mount(settings.API_V1_STR, sub_app_v1)
 
 
+@app.on_event("startup")
+def setup_indexes() -> None:
+    """Prepare the database when running a single process.
+
+    Enabled by INSTALL_INDEXES. Multi worker deployments leave it disabled and run
+    `app.prestart` once before starting the workers.
+    """
+    if settings.INSTALL_INDEXES:
+        setup_database()
+
+
+@app.get(
+    "/metrics", dependencies=[Depends(check_metrics_access)], include_in_schema=False
+)
+def read_metrics() -> PlainTextResponse:
+    """Return the metrics of this worker process in the Prometheus format.
+
+    Latency, response size, database time and number of Cypher statements are
+    observed per route template. A high number of statements for a route reveals
+    queries repeated for each returned item. Series are labelled with the worker
+    process serving the scrape.
+
+    Scrapers authenticate with the METRICS_TOKEN bearer token.
+    """
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+
+@app.get(
+    "/debug/query-traces",
+    dependencies=[Depends(check_write_access)],
+    include_in_schema=False,
+)
+def read_query_traces() -> List[Dict[str, Any]]:
+    """Return the most recent traces of the sampled requests of this worker process.
+
+    Each trace lists the Cypher statements issued by the request with the types of
+    their parameters, the number of returned rows and their duration. Traces are
+    kept in memory by each worker: with multiple workers, each call lists the
+    traces of the one serving it.
+
+    Raises:
+    ------
+        NotFoundError: Query tracing is disabled.
+    """
+    if settings.QUERY_TRACE_SAMPLE_RATE == 0:
+        msg = "Query tracing is disabled"
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=msg)
+    return trace_store.list()
+
+
+@app.get(
+    "/debug/query-traces/{trace_id}",
+    dependencies=[Depends(check_write_access)],
+    include_in_schema=False,
+)
+def read_query_trace(trace_id: str) -> Dict[str, Any]:
+    """Return the trace with the id given by the `X-Query-Trace` response header.
+
+    Only the worker process which served the traced request stores the trace: its
+    pid is the first part of the id. When another worker serves the call, the
+    error says so and the call can be repeated.
+
+    Raises:
+    ------
+        NotFoundError: Query tracing is disabled, the trace is stored by another
+            worker or it is no more stored.
+    """
+    trace = trace_store.get(trace_id)
+    if trace is None:
+        pid = trace_worker(trace_id)
+        msg = f"Query trace {trace_id} not found"
+        if pid is not None and pid != os.getpid():
+            msg += f": stored by worker process {pid}, this is {os.getpid()}"
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=msg)
+    return trace
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0")
@@ -0,0 +1,287 @@
+import os
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from threading import Lock
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.pool import add_query_observer, pool_metrics
+from app.tracing import QueryTrace, new_trace_id, trace_query, trace_store
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Route label of the requests not matching any route, to bound the label values.
+UNMATCHED = "unmatched"
+
+
+class Histogram:
+    """Thread-safe histogram rendered in the Prometheus text format.
+
+    Attributes:
+    ----------
+        name (str): Metric name.
+        doc (str): Metric description.
+        labels (tuple): Label names.
+        buckets (tuple): Upper bounds of the buckets, sorted.
+    """
+
+    def __init__(
+        self, name: str, doc: str, labels: Tuple[str, ...], buckets: Tuple[float, ...]
+    ) -> None:
+        self.name = name
+        self.doc = doc
+        self.labels = labels
+        self.buckets = buckets
+        self.__series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self.__lock = Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Add a value to the series with the given label values."""
+        with self.__lock:
+            counts, total = self.__series.setdefault(
+                label_values, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def render(self, const_labels: Optional[Dict[str, str]] = None) -> List[str]:
+        """Return the lines of the metric, with cumulative bucket counts.
+
+        Constant labels are added to each series.
+        """
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        with self.__lock:
+            series = [(k, list(c), t[0]) for k, (c, t) in self.__series.items()]
+        const = [f'{k}="{_escape(v)}"' for k, v in (const_labels or {}).items()]
+        for label_values, counts, total in sorted(series):
+            labels = const + [
+                f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values)
+            ]
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = ",".join([*labels, f'le="{bound}"'])
+                lines.append(f"{self.name}_bucket{{{le}}} {cumulative}")
+            common = f"{{{','.join(labels)}}}" if labels else ""
+            lines.append(f"{self.name}_sum{common} {total}")
+            lines.append(f"{self.name}_count{common} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time spent serving the requests, body included.",
+    ("method", "route", "status"),
+    LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Size of the response bodies.",
+    ("method", "route"),
+    SIZE_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds",
+    "Time spent running Cypher statements while serving the requests.",
+    ("method", "route"),
+    LATENCY_BUCKETS,
+)
+REQUEST_STATEMENTS = Histogram(
+    "http_request_cypher_statements",
+    "Number of Cypher statements issued while serving the requests.",
+    ("method", "route"),
+    COUNT_BUCKETS,
+)
+HISTOGRAMS = (REQUEST_DURATION, RESPONSE_SIZE, REQUEST_DB_TIME, REQUEST_STATEMENTS)
+
+
+@dataclass
+class RequestStats:
+    """Cypher statements issued by a request and time spent running them.
+
+    Traced requests have an id and keep the list of their statements.
+    """
+
+    path: str
+    statements: int = 0
+    db_time: float = 0.0
+    trace_id: Optional[str] = None
+    queries: Optional[List[QueryTrace]] = None
+
+
+# Stats of the request being served. Worker threads run in a copy of the context of
+# the request, so they update the same object.
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def observe_query(
+    query: str, params: Optional[Dict[str, Any]], rows: Optional[int], duration: float
+) -> None:
+    """Add the duration of a Cypher statement to the current request stats.
+
+    Trace the statement when the request is traced or the statement is slow.
+    """
+    stats = request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_time += duration
+    trace_query(
+        stats.queries if stats is not None else None,
+        statement=query,
+        params=params,
+        rows=rows,
+        duration=duration,
+        path=stats.path if stats is not None else None,
+    )
+
+
+def instrument_queries() -> None:
+    """Count, time and trace the Cypher statements issued while serving requests."""
+    add_query_observer(observe_query)
+
+
+def route_template(scope: Scope) -> str:
+    """Return the path template of the route which served the request.
+
+    Routes of the mounted applications are prefixed with their mount path.
+    """
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED
+    return f"{scope.get('root_path', '')}{route.path}"
+
+
+class MetricsMiddleware:
+    """ASGI middleware observing the duration, the response size and the database
+    usage of each HTTP request.
+
+    The body is included, so streamed responses are measured until their last
+    chunk is sent.
+
+    Sampled requests are traced: the response has the `X-Query-Trace` header with
+    the id of the trace, and a `Server-Timing` header with the database time spent
+    before sending it. The trace is stored once the response is complete.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(path=scope["path"], trace_id=new_trace_id())
+        if stats.trace_id is not None:
+            stats.queries = []
+        token = request_stats.set(stats)
+        start = perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if stats.trace_id is not None:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("X-Query-Trace", stats.trace_id)
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.statements} '
+                        'statements"',
+                    )
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_stats.reset(token)
+            duration = perf_counter() - start
+            method, route = scope["method"], route_template(scope)
+            REQUEST_DURATION.observe(duration, method, route, str(status))
+            RESPONSE_SIZE.observe(size, method, route)
+            REQUEST_DB_TIME.observe(stats.db_time, method, route)
+            REQUEST_STATEMENTS.observe(stats.statements, method, route)
+            if stats.trace_id is not None:
+                trace_store.add(
+                    {
+                        "id": stats.trace_id,
+                        "method": method,
+                        "route": route,
+                        "path": stats.path,
+                        "status": status,
+                        "duration": duration,
+                        "db_time": stats.db_time,
+                        "statements": stats.statements,
+                        "queries": [asdict(q) for q in stats.queries],
+                    }
+                )
+
+
+def _labels(**labels: str) -> str:
+    """Return the label set of a sample."""
+    pairs = [f'{k}="{_escape(v)}"' for k, v in labels.items()]
+    return f"{{{','.join(pairs)}}}"
+
+
+def render_metrics() -> str:
+    """Return the metrics of this worker process in the Prometheus text format.
+
+    Request histograms are followed by the state of the connection pool. Waits are
+    exported as summaries, along with a gauge holding the longest one.
+
+    Each worker process keeps its own metrics and a scrape is served by any of
+    them: all series have the `worker` label, with the pid of the process, so that
+    they are not mixed up. Aggregate them with `sum without (worker)`.
+    """
+    worker = str(os.getpid())
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines += histogram.render({"worker": worker})
+    pool = pool_metrics()
+    lines += [
+        "# HELP neo4j_pool_max_size Maximum number of connections of the pool.",
+        "# TYPE neo4j_pool_max_size gauge",
+        f"neo4j_pool_max_size{_labels(worker=worker)} {pool['max_size']}",
+        "# HELP neo4j_pool_connections Connections of the pool by state.",
+        "# TYPE neo4j_pool_connections gauge",
+        f"neo4j_pool_connections{_labels(worker=worker, state='active')} "
+        f"{pool['active']}",
+        f"neo4j_pool_connections{_labels(worker=worker, state='idle')} "
+        f"{pool['idle']}",
+    ]
+    for name, doc in (
+        ("acquisition", "Time spent beginning transactions."),
+        ("thread", "Time spent by read endpoints waiting for a database thread."),
+    ):
+        metric = f"neo4j_pool_{name}_wait_seconds"
+        name_max = f"neo4j_pool_{name}_wait_max_seconds"
+        labels = _labels(worker=worker)
+        lines += [
+            f"# HELP {metric} {doc}",
+            f"# TYPE {metric} summary",
+            f"{metric}_sum{labels} {pool[name]['total']}",
+            f"{metric}_count{labels} {pool[name]['count']}",
+            f"# HELP {name_max} Longest wait observed by {metric}.",
+            f"# TYPE {name_max} gauge",
+            f"{name_max}{labels} {pool[name]['max']}",
+        ]
+    return "\n".join(lines) + "\n"
@@ -52,10 +52,11 @@ class BaseNodeRead(BaseModel):
 
         From OneOrMore or ZeroOrMore relationships get all relationships; if that
         relationships has a model return a dict with the data stored in the
-        relationship.
+        relationship. Only relationships matching a schema field are retrieved.
         """
         relations = {}
-        for k, v in data.items():
+        for k in cls.__fields__.keys():
+            v = data.get(k)
             if isinstance(v, One) or isinstance(v, ZeroOrOne):
                 relations[k] = v.single()
             elif isinstance(v, OneOrMore) or isinstance(v, ZeroOrMore):
@@ -1,9 +1,11 @@
 from typing import List, Optional, Union
 
 from fastapi import APIRouter, Depends, HTTPException, Response, status
-from neomodel import db
 
 from app.auth.dependencies import check_read_access, check_write_access
+from app.cache import cached_read
+from app.db import read_transaction, write_transaction
+from app.etag import check_etag, check_item_etag
 from app.network.api.dependencies import (
     valid_network_id,
     validate_new_network_values,
@@ -21,14 +23,16 @@ from app.network.schemas_extended import (
     NetworkReadExtended,
     NetworkReadExtendedPublic,
 )
-from app.query import DbQueryCommonParams, Pagination, SchemaSize
+from app.query import DbQueryCommonParams, Pagination, SchemaSize, Streaming
+from app.response import schema_response
+from app.stream import stream_response
 
 router = APIRouter(prefix="/networks", tags=["networks"])
 
 
-@db.read_transaction
 @router.get(
     "/",
+    dependencies=[Depends(check_etag)],
     response_model=Union[
         List[NetworkReadExtended],
         List[NetworkRead],
@@ -41,25 +45,49 @@ router = APIRouter(prefix="/networks", tags=["networks"])
         It is possible to filter on networks attributes and other \
         common query parameters.",
 )
+@cached_read
+@read_transaction
 def get_networks(
+    response: Response,
     auth: bool = Depends(check_read_access),
     comm: DbQueryCommonParams = Depends(),
     page: Pagination = Depends(),
     size: SchemaSize = Depends(),
+    stream: Streaming = Depends(),
     item: NetworkQuery = Depends(),
 ):
+    response.headers["X-Total-Count"] = str(
+        network.count(**item.dict(exclude_none=True))
+    )
+    if stream.stream is not None:
+        items = network.stream_multi(
+            auth=auth,
+            short=size.short,
+            with_conn=size.with_conn,
+            **comm.dict(exclude_none=True),
+            **page.dict(exclude_none=True),
+            **item.dict(exclude_none=True),
+        )
+        return stream_response(items=items, fmt=stream.stream, response=response)
     items = network.get_multi(
-        **comm.dict(exclude_none=True), **item.dict(exclude_none=True)
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
     )
-    items = network.paginate(items=items, page=page.page, size=page.size)
-    return network.choose_out_schema(
+    cursor = network.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
+    )
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    items = network.choose_out_schema(
         items=items, auth=auth, short=size.short, with_conn=size.with_conn
     )
+    return schema_response(content=items, response=response)
 
 
-@db.read_transaction
 @router.get(
     "/{network_uid}",
+    dependencies=[Depends(check_item_etag(valid_network_id))],
     response_model=Union[
         NetworkReadExtended,
         NetworkRead,
@@ -72,17 +100,19 @@ def get_networks(
         If no entity matches the given *uid*, the endpoint \
         raises a `not found` error.",
 )
+@read_transaction
 def get_network(
+    response: Response,
     auth: bool = Depends(check_read_access),
     size: SchemaSize = Depends(),
     item: Network = Depends(valid_network_id),
 ):
-    return network.choose_out_schema(
+    items = network.choose_out_schema(
         items=[item], auth=auth, short=size.short, with_conn=size.with_conn
-    )[0]
+    )
+    return schema_response(content=items[0], response=response)
 
 
-@db.write_transaction
 @router.patch(
     "/{network_uid}",
     status_code=status.HTTP_200_OK,
@@ -101,6 +131,7 @@ def get_network(
         At first validate new network values checking there are \
         no other items with the given *uuid* and *name*.",
 )
+@write_transaction
 def put_network(
     update_data: NetworkUpdate,
     response: Response,
@@ -112,7 +143,6 @@ def put_network(
     return db_item
 
 
-@db.write_transaction
 @router.delete(
     "/{network_uid}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -125,6 +155,7 @@ def put_network(
         If the deletion procedure fails, raises a `internal \
         server` error",
 )
+@write_transaction
 def delete_networks(item: Network = Depends(valid_network_id)):
     if not network.remove(db_obj=item):
         raise HTTPException(
@@ -41,8 +41,8 @@ class Network(StructuredNode):
 
     uid = UniqueIdProperty()
     description = StringProperty(default="")
-    name = StringProperty(required=True)
-    uuid = StringProperty(required=True)
+    name = StringProperty(required=True, index=True)
+    uuid = StringProperty(required=True, index=True)
     is_shared = BooleanProperty(default=False)
     is_router_external = BooleanProperty(default=False)
     is_default = BooleanProperty(default=False)
@@ -0,0 +1,158 @@
+import logging
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from neomodel import config, db
+from neomodel.util import Database
+
+logger = logging.getLogger(__name__)
+
+# Attributes of the neomodel connection state shared by all the threads.
+SHARED_ATTRIBUTES = ("driver", "url", "_pid", "_database_name")
+
+_connect = Database.set_connection
+_lock = Lock()
+_shared: Dict[int, Dict[str, Any]] = {}
+
+# Callables notified of each Cypher statement with the statement, its parameters,
+# the number of returned rows (None when it failed) and its duration in seconds.
+QueryObserver = Callable[[str, Optional[Dict[str, Any]], Optional[int], float], None]
+_query_observers: List[QueryObserver] = []
+
+
+@dataclass
+class WaitStats:
+    """Number, total and maximum duration in seconds of the observed waits."""
+
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+
+_waits: Dict[str, WaitStats] = {"acquisition": WaitStats(), "thread": WaitStats()}
+
+
+def _set_connection(self: Database, url: str) -> None:
+    """Connect the calling thread through the driver of the current process.
+
+    neomodel keeps the connection state per thread, so each thread would open its
+    own driver with its own pool. Drivers are thread safe: build one per process
+    and let the other threads reuse it. Sessions and transactions stay per thread.
+    """
+    with _lock:
+        state = _shared.get(os.getpid())
+        if state is None:
+            _connect(self, url)
+            _shared[os.getpid()] = {k: getattr(self, k) for k in SHARED_ATTRIBUTES}
+            return
+        for k, v in state.items():
+            setattr(self, k, v)
+        self._active_transaction = None
+
+
+def share_driver() -> None:
+    """Make all the threads of a process share the same driver and pool.
+
+    Call it before any query. The pool is sized with NEO4J_MAX_CONNECTION_POOL_SIZE,
+    so each worker process opens at most that number of connections.
+    """
+    Database.set_connection = _set_connection
+    logger.info(
+        "Connection pool: size %d, acquisition timeout %ss, "
+        "max lifetime %ss, keep alive %s",
+        config.MAX_CONNECTION_POOL_SIZE,
+        config.CONNECTION_ACQUISITION_TIMEOUT,
+        config.MAX_CONNECTION_LIFETIME,
+        config.KEEP_ALIVE,
+    )
+
+
+def observe_wait(name: str, seconds: float) -> None:
+    """Record a wait for a database resource (`acquisition` or `thread`)."""
+    with _lock:
+        _waits[name].observe(seconds)
+
+
+@contextmanager
+def timed(transaction: Any) -> Iterator[None]:
+    """Enter the given neomodel transaction recording the time it took to begin.
+
+    Beginning a transaction acquires a connection from the pool, so the time grows
+    when the pool is exhausted and the thread waits for a connection to be released.
+    """
+    start = perf_counter()
+    with transaction:
+        observe_wait("acquisition", perf_counter() - start)
+        yield
+
+
+def connection_counts() -> Dict[str, int]:
+    """Return the number of connections in use and idle in the pool.
+
+    Counts are read from the driver pool. They are 0 before the first query.
+    """
+    state = _shared.get(os.getpid())
+    pool = getattr(state["driver"], "_pool", None) if state else None
+    if pool is None:
+        return {"active": 0, "idle": 0}
+    with pool.lock:
+        connections = [c for conns in pool.connections.values() for c in conns]
+    active = sum(1 for c in connections if c.in_use)
+    return {"active": active, "idle": len(connections) - active}
+
+
+def pool_metrics() -> Dict[str, Any]:
+    """Return the pool size, the connection counts and the observed waits.
+
+    `acquisition` waits are the times spent beginning transactions, `thread` waits
+    the times spent by read endpoints waiting for a database thread.
+    """
+    with _lock:
+        waits = {k: vars(v).copy() for k, v in _waits.items()}
+    return {
+        "max_size": config.MAX_CONNECTION_POOL_SIZE,
+        **connection_counts(),
+        **waits,
+    }
+
+
+class ObservedDatabase(Database):
+    """neomodel connection notifying the query observers of each statement.
+
+    All queries, neomodel ones included, go through `cypher_query`.
+    """
+
+    def cypher_query(
+        self, query: str, params: Optional[Dict[str, Any]] = None, *args, **kwargs
+    ) -> Any:
+        rows = None
+        start = perf_counter()
+        try:
+            results = super().cypher_query(query, params, *args, **kwargs)
+            rows = len(results[0])
+            return results
+        finally:
+            duration = perf_counter() - start
+            for observer in _query_observers:
+                observer(query, params, rows, duration)
+
+
+def add_query_observer(observer: QueryObserver) -> None:
+    """Notify the given callable of each Cypher statement run by this process.
+
+    The neomodel connection shared by the whole application becomes an
+    ObservedDatabase.
+    """
+    if not isinstance(db, ObservedDatabase):
+        db.__class__ = ObservedDatabase
+    if observer not in _query_observers:
+        _query_observers.append(observer)
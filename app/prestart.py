@@ -0,0 +1,28 @@
+from neomodel import db
+
+from app.config import get_settings
+from app.indexes import install_indexes, report_index_usage
+from app.search.crud import install_search_index
+from app.user_group.access import refresh_access
+
+
+def setup_database() -> None:
+    """Create the indexes derived from the models and the full-text search one.
+
+    Then report their usage. Finally build the user groups access index, which is
+    kept up to date by write transactions.
+
+    Run it once per deployment, before the server starts its workers: concurrent
+    runs would merge the same access relationships at the same time.
+    """
+    install_indexes()
+    install_search_index()
+    report_index_usage()
+    with db.write_transaction:
+        refresh_access()
+
+
+if __name__ == "__main__":
+    # Loading the settings configures the neomodel connection.
+    get_settings()
+    setup_database()
@@ -1,9 +1,11 @@
 from typing import List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
-from neomodel import db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 
 from app.auth.dependencies import check_read_access, check_write_access
+from app.cache import cached_read
+from app.db import read_transaction, write_transaction
+from app.etag import check_etag, check_item_etag
 
 # from app.flavor.api.dependencies import is_private_flavor, valid_flavor_id
 # from app.flavor.crud import flavor
@@ -20,6 +22,7 @@ from app.project.api.dependencies import (
     validate_new_project_values,
 )
 from app.project.crud import project
+from app.project.enum import CatalogType
 from app.project.models import Project
 from app.project.schemas import (
     ProjectQuery,
@@ -29,18 +32,20 @@ from app.project.schemas import (
     ProjectUpdate,
 )
 from app.project.schemas_extended import (
+    ProjectCatalogItem,
+    ProjectCatalogQuery,
     ProjectReadExtended,
     ProjectReadExtendedPublic,
 )
 from app.query import DbQueryCommonParams, Pagination, SchemaSize
-from app.region.schemas import RegionQuery
+from app.response import schema_response
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
 
-@db.read_transaction
 @router.get(
     "/",
+    dependencies=[Depends(check_etag)],
     response_model=Union[
         List[ProjectReadExtended],
         List[ProjectRead],
@@ -51,9 +56,13 @@ router = APIRouter(prefix="/projects", tags=["projects"])
     summary="Read all projects",
     description="Retrieve all projects stored in the database. \
         It is possible to filter on projects attributes and other \
-        common query parameters.",
+        common query parameters. It is also possible to filter on the \
+        name of the regions where the projects have quotas.",
 )
+@cached_read
+@read_transaction
 def get_projects(
+    response: Response,
     auth: bool = Depends(check_read_access),
     comm: DbQueryCommonParams = Depends(),
     page: Pagination = Depends(),
@@ -61,20 +70,32 @@ def get_projects(
     item: ProjectQuery = Depends(),
     region_name: Optional[str] = None,
 ):
+    related = {}
+    if region_name:
+        related["quotas__service__region__name"] = region_name
     items = project.get_multi(
-        **comm.dict(exclude_none=True), **item.dict(exclude_none=True)
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
+        **related,
+    )
+    cursor = project.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
     )
-    items = project.paginate(items=items, page=page.page, size=page.size)
-    region_query = RegionQuery(name=region_name)
-    items = filter_on_region_attr(items=items, region_query=region_query)
-    return project.choose_out_schema(
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    response.headers["X-Total-Count"] = str(
+        project.count(**item.dict(exclude_none=True), **related)
+    )
+    items = project.choose_out_schema(
         items=items, auth=auth, short=size.short, with_conn=size.with_conn
     )
+    return schema_response(content=items, response=response)
 
 
-@db.read_transaction
 @router.get(
     "/{project_uid}",
+    dependencies=[Depends(check_item_etag(valid_project_id))],
     response_model=Union[
         ProjectReadExtended,
         ProjectRead,
@@ -87,51 +108,19 @@ def get_projects(
         If no entity matches the given *uid*, the endpoint \
         raises a `not found` error.",
 )
+@read_transaction
 def get_project(
+    response: Response,
     auth: bool = Depends(check_read_access),
     size: SchemaSize = Depends(),
     item: Project = Depends(valid_project_id),
-    region_name: Optional[str] = None,
 ):
-    region_query = RegionQuery(name=region_name)
-    items = filter_on_region_attr(items=[item], region_query=region_query)
     items = project.choose_out_schema(
-        items=items, auth=auth, short=size.short, with_conn=size.with_conn
+        items=[item], auth=auth, short=size.short, with_conn=size.with_conn
     )
-    return items[0]
-
+    return schema_response(content=items[0], response=response)
 
-def filter_on_region_attr(  # noqa: C901
-    items: List[Project], region_query: RegionQuery
-) -> List[Project]:
-    """
-    Filter projects based on region access.
-    """
-    attrs = region_query.dict(exclude_none=True)
-    if not attrs:
-        return items
 
-    for item in items:
-        for quota in item.quotas:
-            service = quota.service.single()
-            if not service.region.get_or_none(**attrs):
-                item.quotas = item.quotas.exclude(uid=quota.uid)
-        for flavor in item.private_flavors:
-            service = flavor.service.single()
-            if not service.region.get_or_none(**attrs):
-                item.private_flavors = item.private_flavors.exclude(uid=flavor.uid)
-        for image in item.private_images:
-            service = image.service.single()
-            if not service.region.get_or_none(**attrs):
-                item.private_images = item.private_images.exclude(uid=image.uid)
-        for network in item.private_networks:
-            service = network.service.single()
-            if not service.region.get_or_none(**attrs):
-                item.private_networks = item.private_networks.exclude(uid=network.uid)
-    return items
-
-
-@db.write_transaction
 @router.patch(
     "/{project_uid}",
     status_code=status.HTTP_200_OK,
@@ -150,6 +139,7 @@ def filter_on_region_attr(  # noqa: C901
         At first validate new project values checking there are \
         no other items with the given *uuid* and *name*.",
 )
+@write_transaction
 def put_project(
     update_data: ProjectUpdate,
     response: Response,
@@ -161,7 +151,6 @@ def put_project(
     return db_item
 
 
-@db.write_transaction
 @router.delete(
     "/{project_uid}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -175,6 +164,7 @@ def put_project(
         If the deletion procedure fails, raises a `internal \
         server` error",
 )
+@write_transaction
 def delete_project(item: Project = Depends(valid_project_id)):
     if not project.remove(db_obj=item):
         raise HTTPException(
@@ -183,31 +173,41 @@ def delete_project(item: Project = Depends(valid_project_id)):
         )
 
 
-# @db.read_transaction
-# @router.get(
-#     "/{project_uid}/flavors",
-#     response_model=Union[
-#         List[FlavorReadExtended],
-#         List[FlavorRead],
-#         List[FlavorReadShort],
-#         List[FlavorReadExtendedPublic],
-#         List[FlavorReadPublic],
-#     ],
-#     summary="Read user group accessible flavors",
-#     description="Retrieve all the flavors the user group \
-#         has access to thanks to its SLA. \
-#         If no entity matches the given *uid*, the endpoint \
-#         raises a `not found` error.",
-# )
-# def get_project_flavors(
-#     auth: bool = Depends(check_read_access),
-#     size: SchemaSize = Depends(),
-#     item: Project = Depends(valid_project_id),
-# ):
-#     items = item.private_flavors.all() + item.public_flavors()
-#     return flavor.choose_out_schema(
-#         items=items, auth=auth, short=size.short, with_conn=size.with_conn
-#     )
+@router.get(
+    "/{project_uid}/catalog",
+    dependencies=[Depends(check_item_etag(valid_project_id))],
+    response_model=List[ProjectCatalogItem],
+    summary="Read the flavors, images and networks usable by a project",
+    description="Retrieve the public and private flavors, images and \
+        networks a specific project can use, each one returned once, \
+        along with the regions where they are available. \
+        It is possible to restrict the catalog to some item types and \
+        to return an item for each region where a resource is available. \
+        If no entity matches the given *uid*, the endpoint \
+        raises a `not found` error.",
+)
+@cached_read
+@read_transaction
+def get_project_catalog(
+    response: Response,
+    auth: bool = Depends(check_read_access),
+    item: Project = Depends(valid_project_id),
+    query: ProjectCatalogQuery = Depends(),
+    types: Optional[List[CatalogType]] = Query(
+        default=None, description="Types of the items to read"
+    ),
+):
+    items, total = project.catalog(
+        db_obj=item,
+        auth=auth,
+        short=query.short,
+        types=types,
+        by_region=query.by_region,
+        skip=query.skip,
+        limit=query.limit,
+    )
+    response.headers["X-Total-Count"] = str(total)
+    return schema_response(content=items, response=response)
 
 
 # @db.write_transaction
@@ -256,33 +256,6 @@ def delete_project(item: Project = Depends(valid_project_id)):
 #     return item.private_flavors.all()
 
 
-# @db.read_transaction
-# @router.get(
-#     "/{project_uid}/images",
-#     response_model=Union[
-#         List[ImageReadExtended],
-#         List[ImageRead],
-#         List[ImageReadShort],
-#         List[ImageReadExtendedPublic],
-#         List[ImageReadPublic],
-#     ],
-#     summary="Read user group accessible images",
-#     description="Retrieve all the images the user group \
-#         has access to thanks to its SLA. \
-#         If no entity matches the given *uid*, the endpoint \
-#         raises a `not found` error.",
-# )
-# def get_project_images(
-#     auth: bool = Depends(check_read_access),
-#     size: SchemaSize = Depends(),
-#     item: Project = Depends(valid_project_id),
-# ):
-#     items = item.private_images.all() + item.public_images()
-#     return image.choose_out_schema(
-#         items=items, auth=auth, short=size.short, with_conn=size.with_conn
-#     )
-
-
 # @db.write_transaction
 # @router.put(
 #     "/{project_uid}/images/{image_uid}",
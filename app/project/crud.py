@@ -1,4 +1,13 @@
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from neomodel import db
+
 from app.crud import CRUDBase
+from app.flavor.crud import flavor
+from app.image.crud import image
+from app.network.crud import network
+from app.project.enum import CatalogType
 from app.project.models import Project
 from app.project.schemas import (
     ProjectCreate,
@@ -8,6 +17,7 @@ from app.project.schemas import (
     ProjectUpdate,
 )
 from app.project.schemas_extended import (
+    ProjectCatalogItem,
     ProjectReadExtended,
     ProjectReadExtendedPublic,
 )
@@ -16,6 +26,89 @@ from app.quota.crud import block_storage_quota, compute_quota
 from app.quota.models import BlockStorageQuota, ComputeQuota
 from app.sla.crud import sla
 
+CATALOG_TARGETS = {
+    CatalogType.FLAVOR: flavor,
+    CatalogType.IMAGE: image,
+    CatalogType.NETWORK: network,
+}
+
+# Resources a project can use, with the services supplying them. Public resources
+# come from the services the project has quotas on, private ones are directly linked
+# to the project and supplied by the services of the project provider.
+CATALOG_MATCH = """
+    MATCH (p:Project {uid: $uid})
+    CALL {
+        WITH p
+        MATCH (p)-[:USE_SERVICE_WITH]->(:ComputeQuota)-[:APPLY_TO]->
+            (s:ComputeService)-[:AVAILABLE_VM_FLAVOR]->(u:Flavor)
+        WHERE u.is_public
+        RETURN "flavor" AS type, u, s
+        UNION
+        WITH p
+        MATCH (p)-[:CAN_USE_VM_FLAVOR]->(u:Flavor)
+        OPTIONAL MATCH (p)<-[:BOOK_PROJECT_FOR_SLA]-(:Provider)-[:DIVIDED_INTO]->
+            (:Region)-[:SUPPLY]->(s:ComputeService)-[:AVAILABLE_VM_FLAVOR]->(u)
+        RETURN "flavor" AS type, u, s
+        UNION
+        WITH p
+        MATCH (p)-[:USE_SERVICE_WITH]->(:ComputeQuota)-[:APPLY_TO]->
+            (s:ComputeService)-[:AVAILABLE_VM_IMAGE]->(u:Image)
+        WHERE u.is_public
+        RETURN "image" AS type, u, s
+        UNION
+        WITH p
+        MATCH (p)-[:CAN_USE_VM_IMAGE]->(u:Image)
+        OPTIONAL MATCH (p)<-[:BOOK_PROJECT_FOR_SLA]-(:Provider)-[:DIVIDED_INTO]->
+            (:Region)-[:SUPPLY]->(s:ComputeService)-[:AVAILABLE_VM_IMAGE]->(u)
+        RETURN "image" AS type, u, s
+        UNION
+        WITH p
+        MATCH (p)-[:USE_SERVICE_WITH]->(:NetworkQuota)-[:APPLY_TO]->
+            (s:NetworkService)-[:AVAILABLE_NETWORK]->(u:Network)
+        WHERE u.is_shared
+        RETURN "network" AS type, u, s
+        UNION
+        WITH p
+        MATCH (p)-[:CAN_USE_NETWORK]->(u:Network)
+        OPTIONAL MATCH (s:NetworkService)-[:AVAILABLE_NETWORK]->(u)
+        RETURN "network" AS type, u, s
+    }
+    WITH type, u, s
+    WHERE type IN $types
+    OPTIONAL MATCH (s)<-[:SUPPLY]-(r:Region)
+"""
+
+
+@lru_cache(maxsize=None)
+def _catalog_query(*, by_region: bool, limit: bool) -> str:
+    """Return the query reading a page of the catalog of a project.
+
+    Rows are deduplicated before being collected, so that the total number of items
+    and the requested page are consistent. Rows are collected to return both in a
+    single round trip.
+    """
+    if by_region:
+        # Rows of private resources without a service are dropped when the
+        # resource is available in some region.
+        group = """
+            WITH type, u, collect(DISTINCT r.name) AS regions
+            UNWIND CASE regions WHEN [] THEN [null] ELSE regions END AS region
+            WITH DISTINCT type, u, region
+            ORDER BY region, type, u.name, u.uid
+            WITH type, u, [x IN [region] WHERE x IS NOT NULL] AS regions
+        """
+    else:
+        group = """
+            WITH type, u, collect(DISTINCT r.name) AS regions
+            ORDER BY type, u.name, u.uid
+        """
+    window = "$skip..$skip + $limit" if limit else "$skip.."
+    return f"""{CATALOG_MATCH}
+        {group}
+        WITH collect([type, u, regions]) AS rows
+        RETURN size(rows), rows[{window}]
+    """
+
 
 class CRUDProject(
     CRUDBase[
@@ -56,6 +149,74 @@ class CRUDProject(
             sla.remove(db_obj=item)
         return super().remove(db_obj=db_obj)
 
+    def catalog(
+        self,
+        *,
+        db_obj: Project,
+        auth: bool,
+        short: bool,
+        types: Optional[List[CatalogType]] = None,
+        by_region: bool = False,
+        skip: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[ProjectCatalogItem], int]:
+        """Read the public and private flavors, images and networks of a project.
+
+        Resources reachable both as public and private ones are returned once. Items
+        are sorted by type and name. When splitting by region, a resource available
+        in multiple regions is returned once for each of them and items are sorted by
+        region first.
+
+        Args:
+        ----
+            db_obj (Project): Target project.
+            auth (bool): Authenticated user. Chooses the output schema.
+            short (bool): Use the short output schema.
+            types (list | None): Types of the items to read. All when None.
+            by_region (bool): Return an item for each region.
+            skip (int): Number of items to skip.
+            limit (int | None): Maximum number of returned items.
+
+        Returns:
+        -------
+            Tuple[List[ProjectCatalogItem], int]. Requested items and total number of
+            items.
+        """
+        types = types or list(CATALOG_TARGETS.keys())
+        params = {"uid": db_obj.uid, "types": [t.value for t in types], "skip": skip}
+        if limit is not None:
+            params["limit"] = limit
+        query = _catalog_query(by_region=by_region, limit=limit is not None)
+        results, _ = db.cypher_query(query, params)
+        total, rows = results[0]
+
+        # Convert items of the same type together.
+        nodes = {t: [] for t in CatalogType}
+        for item_type, node, _ in rows:
+            nodes[CatalogType(item_type)].append(node)
+        converted = {}
+        for item_type, items in nodes.items():
+            crud = CATALOG_TARGETS[item_type]
+            converted[item_type] = iter(
+                crud.choose_out_schema(
+                    items=[crud.model.inflate(i) for i in items],
+                    auth=auth,
+                    short=short,
+                    with_conn=False,
+                )
+            )
+        items = []
+        for item_type, _, regions in rows:
+            item_type = CatalogType(item_type)
+            # Items are already validated. Validating them against the Union would
+            # try each member in turn.
+            items.append(
+                ProjectCatalogItem.construct(
+                    type=item_type, regions=regions, item=next(converted[item_type])
+                )
+            )
+        return items, total
+
 
 project = CRUDProject(
     model=Project,
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class CatalogType(Enum):
+    FLAVOR: str = "flavor"
+    IMAGE: str = "image"
+    NETWORK: str = "network"
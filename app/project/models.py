@@ -38,8 +38,8 @@ class Project(StructuredNode):
 
     uid = UniqueIdProperty()
     description = StringProperty(default="")
-    name = StringProperty(required=True)
-    uuid = StringProperty(required=True)
+    name = StringProperty(required=True, index=True)
+    uuid = StringProperty(required=True, index=True)
 
     sla = RelationshipFrom(
         "..sla.models.SLA",
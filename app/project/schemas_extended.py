@@ -1,14 +1,15 @@
 from typing import Any, List, Optional, Union
 
-from pydantic import Field
+from pydantic import BaseModel, Field
 
-from app.flavor.schemas import FlavorRead, FlavorReadPublic
+from app.flavor.schemas import FlavorRead, FlavorReadPublic, FlavorReadShort
 from app.identity_provider.schemas import (
     IdentityProviderRead,
     IdentityProviderReadPublic,
 )
-from app.image.schemas import ImageRead, ImageReadPublic
-from app.network.schemas import NetworkRead, NetworkReadPublic
+from app.image.schemas import ImageRead, ImageReadPublic, ImageReadShort
+from app.network.schemas import NetworkRead, NetworkReadPublic, NetworkReadShort
+from app.project.enum import CatalogType
 from app.project.schemas import ProjectRead, ProjectReadPublic
 from app.provider.schemas import ProviderRead, ProviderReadPublic
 from app.quota.schemas import (
@@ -182,3 +183,46 @@ class ProjectReadExtendedPublic(ProjectReadPublic):
         obj.images = obj.public_images() + obj.private_images.all()
         obj.networks = obj.public_networks() + obj.private_networks.all()
         return super().from_orm(obj)
+
+
+class ProjectCatalogQuery(BaseModel):
+    """Model with the project catalog query attributes."""
+
+    skip: int = Field(default=0, ge=0, description="Number of items to skip")
+    limit: int = Field(
+        default=100, ge=1, le=1000, description="Maximum number of returned items"
+    )
+    short: bool = Field(
+        default=False, description="Show a shortened version of the items."
+    )
+    by_region: bool = Field(
+        default=False,
+        description="Return an item for each region where a resource is available.",
+    )
+
+
+class ProjectCatalogItem(BaseModel):
+    """Model with a flavor, image or network a project can use.
+
+    Attributes:
+    ----------
+        type (CatalogType): Item type.
+        regions (list of str): Names of the regions where the item is available.
+        item: Item data.
+    """
+
+    type: CatalogType = Field(description="Item type")
+    regions: List[str] = Field(
+        description="Names of the regions where the item is available"
+    )
+    item: Union[
+        FlavorRead,
+        FlavorReadShort,
+        FlavorReadPublic,
+        ImageRead,
+        ImageReadShort,
+        ImageReadPublic,
+        NetworkRead,
+        NetworkReadShort,
+        NetworkReadPublic,
+    ] = Field(description="Item data")
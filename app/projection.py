@@ -0,0 +1,219 @@
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import count
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+    get_args,
+    get_origin,
+)
+
+from neomodel import StructuredNode, StructuredRel, db
+from neomodel.match import _rel_helper
+from neomodel.relationship_manager import RelationshipManager
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON, ModelField
+
+SCHEMA_SUFFIX = re.compile(
+    r"(ReadExtendedPublic|ReadExtended|ReadPublic|ReadShort|Read)$"
+)
+
+
+@dataclass
+class Projection:
+    """Description of how to build a schema instance from a projected node.
+
+    Attributes:
+    ----------
+        model (type): Class of the projected node.
+        rel_model (type | None): Class of the relationship linking the node to its
+            parent, when the schema shows it in the `relationship` field.
+        relations (dict): For each relationship field, whether it holds a single item
+            and the projections of the allowed schemas (one for each Union member).
+    """
+
+    model: Type[StructuredNode]
+    rel_model: Optional[Type[StructuredRel]] = None
+    relations: Dict[str, Tuple[bool, List["Projection"]]] = field(default_factory=dict)
+
+
+def read_with_connections(
+    *, schema: Type[BaseModel], model: Type[StructuredNode], items: List[StructuredNode]
+) -> List[BaseModel]:
+    """Build the extended schema of the given items using a single query.
+
+    All the relationships in the schema tree are retrieved through nested pattern
+    comprehensions, so there is one round trip whatever the depth of the schema.
+    When the schema can't be projected (for example it defines fields not matching
+    model properties or relationships) or when the items' relationships have been
+    filtered in memory, fall back to the ORM mode.
+
+    Args:
+    ----
+        schema (type): Extended read schema.
+        model (type): Class of the given items.
+        items (list): Nodes to read.
+
+    Returns:
+    -------
+        list. Schema instances in the same order of the given items.
+    """
+    compiled = compile_projection(schema, model)
+    if compiled is None or not all(
+        isinstance(getattr(item, k), RelationshipManager)
+        for item in items
+        for k in compiled[1].relations.keys()
+    ):
+        return [schema.from_orm(item) for item in items]
+    if not items:
+        return []
+
+    query, projection = compiled
+    results, _ = db.cypher_query(query, {"uids": [item.uid for item in items]})
+    rows = {uid: data for uid, data in results}
+    return [schema.parse_obj(hydrate(projection, rows[item.uid])) for item in items]
+
+
+@lru_cache(maxsize=None)
+def compile_projection(
+    schema: Type[BaseModel], model: Type[StructuredNode]
+) -> Optional[Tuple[str, Projection]]:
+    """Return the query reading the given schema tree and its projection.
+
+    Return None if the schema can't be mapped on the model.
+    """
+    compiled = _compile(schema=schema, model=model, var="n0", counter=count(1))
+    if compiled is None:
+        return None
+    expr, projection = compiled
+    query = f"MATCH (n0:{model.__label__}) WHERE n0.uid IN $uids RETURN n0.uid, {expr}"
+    return query, projection
+
+
+def hydrate(projection: Projection, data: Dict) -> Dict:
+    """Convert a projected node and its nested items in a dict of inflated values."""
+    node = projection.model.inflate(data["_node"])
+    props = projection.model.defined_properties(aliases=False, rels=False)
+    item = {k: getattr(node, k) for k in props.keys()}
+    if projection.rel_model is not None:
+        rel = projection.rel_model.inflate(data["_rel"])
+        props = projection.rel_model.defined_properties(aliases=False, rels=False)
+        item["relationship"] = {k: getattr(rel, k) for k in props.keys()}
+    for k, (single, members) in projection.relations.items():
+        if single:
+            v = data[k]
+            item[k] = None if v is None else hydrate(members[v["_member"]], v)
+        else:
+            item[k] = [hydrate(members[v["_member"]], v) for v in data[k]]
+    return item
+
+
+def _compile(
+    *,
+    schema: Type[BaseModel],
+    model: Type[StructuredNode],
+    var: str,
+    counter: Iterator[int],
+    rel_var: Optional[str] = None,
+    rel_model: Optional[Type[StructuredRel]] = None,
+    member: int = 0,
+) -> Optional[Tuple[str, Projection]]:
+    """Build the map projection of a node and its nested relationships."""
+    if "from_orm" in vars(schema):
+        return None
+
+    props = model.defined_properties(aliases=False, rels=False)
+    rels = model.defined_properties(aliases=False, properties=False)
+    projection = Projection(model=model)
+    entries = [f"_node: {var}", f"_member: {member}"]
+
+    for k, v in schema.__fields__.items():
+        if k in props.keys():
+            continue
+        if k == "relationship" and rel_model is not None:
+            projection.rel_model = rel_model
+            entries.append(f"_rel: {rel_var}")
+            continue
+        rel = rels.get(k)
+        if rel is None and not v.required:
+            # Values computed by the schema validators
+            continue
+        members = _get_members(v)
+        if rel is None or members is None:
+            return None
+
+        rel._lookup_node_class()
+        exprs = []
+        children = []
+        for i, s in enumerate(members):
+            target = _get_model(s, rel.definition["node_class"])
+            idx = next(counter)
+            compiled = _compile(
+                schema=s,
+                model=target,
+                var=f"n{idx}",
+                counter=counter,
+                rel_var=f"r{idx}",
+                rel_model=rel.definition["model"],
+                member=i,
+            )
+            if compiled is None:
+                return None
+            expr, child = compiled
+            pattern = _rel_helper(
+                lhs=var,
+                rhs=f"n{idx}:{target.__label__}",
+                ident=f"r{idx}",
+                relation_type=rel.definition["relation_type"],
+                direction=rel.definition["direction"],
+            )
+            exprs.append(f"[{pattern} | {expr}]")
+            children.append(child)
+
+        single = v.shape == SHAPE_SINGLETON
+        expr = " + ".join(exprs)
+        entries.append(f"{k}: head({expr})" if single else f"{k}: {expr}")
+        projection.relations[k] = (single, children)
+
+    return "{" + ", ".join(entries) + "}", projection
+
+
+def _get_members(model_field: ModelField) -> Optional[List[Type[BaseModel]]]:
+    """Return the schemas accepted by a relationship field.
+
+    Return None if the field is not a single item or a list of pydantic models.
+    """
+    if model_field.shape not in (SHAPE_SINGLETON, SHAPE_LIST):
+        return None
+    if get_origin(model_field.type_) is Union:
+        members = list(get_args(model_field.type_))
+    else:
+        members = [model_field.type_]
+    if not all(isinstance(i, type) and issubclass(i, BaseModel) for i in members):
+        return None
+    return members
+
+
+def _get_model(
+    schema: Type[BaseModel], node_class: Type[StructuredNode]
+) -> Type[StructuredNode]:
+    """Return the node class matching the schema name.
+
+    The relationship target class is a generic one when the relationship links nodes
+    of different types (i.e. services). Look for the subclass with the same name of
+    the schema, stripped of the read suffix. Default to the relationship target.
+    """
+    name = SCHEMA_SUFFIX.sub("", schema.__name__)
+    classes = [node_class]
+    while classes:
+        cls = classes.pop()
+        if cls.__name__ == name:
+            return cls
+        classes.extend(cls.__subclasses__())
+    return node_class
@@ -1,4 +1,4 @@
-from typing import Union
+from typing import Set, Tuple, Union
 
 from fastapi import Depends, HTTPException, status
 from pydantic import UUID4
@@ -6,6 +6,7 @@ from pydantic import UUID4
 from app.identity_provider.crud import identity_provider
 from app.location.crud import location
 from app.provider.crud import provider
+from app.provider.document import SERVICE_LISTS
 from app.provider.models import Provider
 from app.provider.schemas import ProviderUpdate
 from app.provider.schemas_extended import (
@@ -138,6 +139,26 @@ def valid_identity_provider(
                 msg += f"different attributes. Received: {data}. Stored: {db_item}"
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=msg)
 
+    valid_user_groups(item)
+
+
+def valid_user_groups(item: IdentityProviderCreateExtended) -> None:
+    """Check that the SLAs of the user groups of an identity provider are not
+    already used by other groups.
+
+    Args:
+    ----
+        item (IdentityProviderCreateExtended): identity provider data.
+
+    Returns:
+    -------
+        None
+
+    Raises:
+    ------
+        BadRequestError: an SLA with the same document uuid already belongs to
+            another group.
+    """
     for group in item.user_groups:
         db_item = sla.get(doc_uuid=group.sla.doc_uuid)
         if db_item is not None:
@@ -170,3 +191,57 @@ def valid_region(item: RegionCreateExtended) -> None:
         valid_identity_service_endpoint(service)
     for service in item.network_services:
         valid_network_service_endpoint(service)
+
+
+def valid_provider_changes(
+    current: ProviderCreateExtended, item: ProviderCreateExtended
+) -> None:
+    """Validate the identity providers and regions added or changed by an update.
+
+    Apply the checks done when creating a provider, skipping the entities the
+    provider already owns: identity providers and service endpoints it already
+    has, user groups and locations left unchanged.
+
+    Args:
+    ----
+        current (ProviderCreateExtended): current provider data.
+        item (ProviderCreateExtended): new provider data.
+
+    Returns:
+    -------
+        None
+
+    Raises:
+    ------
+        BadRequestError: DB entity with given name already exists, or an added or
+            changed entity clashes with the ones of another provider.
+    """
+    if item.name != current.name:
+        is_unique_provider(item)
+
+    idps = {i.endpoint: i for i in current.identity_providers}
+    for idp in item.identity_providers:
+        db_idp = idps.get(idp.endpoint)
+        if db_idp is None:
+            valid_identity_provider(idp)
+        else:
+            groups = [i for i in idp.user_groups if i not in db_idp.user_groups]
+            valid_user_groups(idp.copy(update={"user_groups": groups}))
+
+    regions = {i.name: i for i in current.regions}
+    endpoints: Set[Tuple[str, str]] = {
+        (k, service.endpoint)
+        for region in current.regions
+        for k in SERVICE_LISTS.values()
+        for service in getattr(region, k)
+    }
+    for region in item.regions:
+        db_region = regions.get(region.name)
+        location = region.location
+        if db_region is not None and location == db_region.location:
+            location = None
+        services = {
+            k: [i for i in getattr(region, k) if (k, i.endpoint) not in endpoints]
+            for k in SERVICE_LISTS.values()
+        }
+        valid_region(region.copy(update={"location": location, **services}))
@@ -1,5 +1,8 @@
 from typing import List, Optional, Union
 
+import jsonpatch
+import jsonpointer
+
 # from app.service.api.dependencies import valid_service_endpoint
 # from app.service.crud import (
 #     block_storage_service,
@@ -18,10 +21,15 @@ from typing import List, Optional, Union
 #     ComputeServiceReadExtended,
 #     IdentityServiceReadExtended,
 # )
-from fastapi import APIRouter, Depends, HTTPException, Response, status
-from neomodel import db
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
 
 from app.auth.dependencies import check_read_access, check_write_access
+from app.cache import cached_read
+from app.db import read_transaction, write_transaction
+from app.etag import check_etag, check_item_etag
 
 # from app.auth_method.schemas import AuthMethodCreate
 # from app.identity_provider.api.dependencies import (
@@ -38,11 +46,14 @@ from app.auth.dependencies import check_read_access, check_write_access
 # from app.project.schemas_extended import ProjectReadExtended
 from app.provider.api.dependencies import (
     valid_provider,
+    valid_provider_changes,
     valid_provider_id,
     validate_new_provider_values,
 )
 from app.provider.crud import provider
+from app.provider.document import document_etag, provider_document
 from app.provider.models import Provider
+from app.provider.reconcile import load_provider_state
 from app.provider.schemas import (
     ProviderQuery,
     ProviderRead,
@@ -52,17 +63,20 @@ from app.provider.schemas import (
 )
 from app.provider.schemas_extended import (
     ProviderCreateExtended,
+    ProviderPatchOperation,
     ProviderReadExtended,
     ProviderReadExtendedPublic,
 )
-from app.query import DbQueryCommonParams, Pagination, SchemaSize
+from app.query import DbQueryCommonParams, Pagination, SchemaSize, Streaming
+from app.response import schema_response
+from app.stream import stream_response
 
 router = APIRouter(prefix="/providers", tags=["providers"])
 
 
-@db.read_transaction
 @router.get(
     "/",
+    dependencies=[Depends(check_etag)],
     response_model=Union[
         List[ProviderReadExtended],
         List[ProviderRead],
@@ -75,23 +89,46 @@ router = APIRouter(prefix="/providers", tags=["providers"])
         It is possible to filter on providers attributes and other \
         common query parameters.",
 )
+@cached_read
+@read_transaction
 def get_providers(
+    response: Response,
     auth: bool = Depends(check_read_access),
     comm: DbQueryCommonParams = Depends(),
     page: Pagination = Depends(),
     size: SchemaSize = Depends(),
+    stream: Streaming = Depends(),
     item: ProviderQuery = Depends(),
 ):
+    response.headers["X-Total-Count"] = str(
+        provider.count(**item.dict(exclude_none=True))
+    )
+    if stream.stream is not None:
+        items = provider.stream_multi(
+            auth=auth,
+            short=size.short,
+            with_conn=size.with_conn,
+            **comm.dict(exclude_none=True),
+            **page.dict(exclude_none=True),
+            **item.dict(exclude_none=True),
+        )
+        return stream_response(items=items, fmt=stream.stream, response=response)
     items = provider.get_multi(
-        **comm.dict(exclude_none=True), **item.dict(exclude_none=True)
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
     )
-    items = provider.paginate(items=items, page=page.page, size=page.size)
-    return provider.choose_out_schema(
+    cursor = provider.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
+    )
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    items = provider.choose_out_schema(
         items=items, auth=auth, short=size.short, with_conn=size.with_conn
     )
+    return schema_response(content=items, response=response)
 
 
-@db.write_transaction
 @router.post(
     "/",
     status_code=status.HTTP_201_CREATED,
@@ -105,13 +142,14 @@ def get_providers(
         no other items with the given *name*. \
         Moreover check the received lists do not contain duplicates.",
 )
+@write_transaction
 def post_provider(item: ProviderCreateExtended):
     return provider.create(obj_in=item)
 
 
-@db.read_transaction
 @router.get(
     "/{provider_uid}",
+    dependencies=[Depends(check_item_etag(valid_provider_id))],
     response_model=Union[
         ProviderReadExtended,
         ProviderRead,
@@ -124,17 +162,19 @@ def post_provider(item: ProviderCreateExtended):
         If no entity matches the given *uid*, the endpoint \
         raises a `not found` error.",
 )
+@read_transaction
 def get_provider(
+    response: Response,
     auth: bool = Depends(check_read_access),
     size: SchemaSize = Depends(),
     item: Provider = Depends(valid_provider_id),
 ):
-    return provider.choose_out_schema(
+    items = provider.choose_out_schema(
         items=[item], auth=auth, short=size.short, with_conn=size.with_conn
-    )[0]
+    )
+    return schema_response(content=items[0], response=response)
 
 
-@db.write_transaction
 @router.patch(
     "/{provider_uid}",
     status_code=status.HTTP_200_OK,
@@ -153,6 +193,7 @@ def get_provider(
         At first validate new provider values checking there are \
         no other items with the given *name*.",
 )
+@write_transaction
 def put_provider(
     update_data: ProviderUpdate,
     response: Response,
@@ -164,7 +205,82 @@ def put_provider(
     return db_item
 
 
-@db.write_transaction
+@router.get(
+    "/{provider_uid}/document",
+    dependencies=[Depends(check_write_access)],
+    summary="Read the document of a specific provider",
+    description="Retrieve the provider with the given *uid* and all its \
+        related entities as a JSON document with the structure used to \
+        create it. Lists are sorted by the natural keys of their items. \
+        The `ETag` header identifies the document version: pass it in \
+        the `If-Match` header when patching the document. \
+        If no entity matches the given *uid*, the endpoint \
+        raises a `not found` error.",
+)
+@read_transaction
+def get_provider_document(item: Provider = Depends(valid_provider_id)):
+    document = provider_document(item.__properties__, load_provider_state(item.uid))
+    return JSONResponse(content=document, headers={"ETag": document_etag(document)})
+
+
+@router.patch(
+    "/{provider_uid}/document",
+    status_code=status.HTTP_200_OK,
+    response_model=Optional[ProviderRead],
+    dependencies=[Depends(check_write_access)],
+    summary="Patch the document of a specific provider",
+    description="Apply a JSON Patch to the document of the provider with the \
+        given *uid* and update the provider and its related entities to \
+        match the patched document. Only the changed entities are written. \
+        The `If-Match` header is required: if it is missing, the endpoint \
+        raises a `precondition required` error; if it does not match the \
+        current document version, the endpoint raises a `precondition \
+        failed` error. \
+        If the patch can't be applied or the patched document is not \
+        valid, the endpoint raises an `unprocessable entity` error. \
+        If the added or changed entities clash with the ones of other \
+        providers, the endpoint raises a `bad request` error. \
+        If the patched document equals the current one, the endpoint \
+        returns the `not modified` message.",
+)
+@write_transaction
+def patch_provider_document(
+    operations: List[ProviderPatchOperation],
+    response: Response,
+    item: Provider = Depends(valid_provider_id),
+    if_match: Optional[str] = Header(default=None),
+):
+    if if_match is None:
+        msg = "Missing 'If-Match' header"
+        raise HTTPException(
+            status_code=status.HTTP_428_PRECONDITION_REQUIRED, detail=msg
+        )
+    state = load_provider_state(item.uid)
+    document = provider_document(item.__properties__, state)
+    if if_match != document_etag(document):
+        msg = f"Provider '{item.uid}' document changed"
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=msg)
+    patch = [i.dict(by_alias=True, exclude_unset=True) for i in operations]
+    try:
+        patched = jsonpatch.apply_patch(document, patch)
+        obj_in = ProviderCreateExtended.parse_obj(patched)
+    except (jsonpatch.JsonPatchException, jsonpointer.JsonPointerException) as e:
+        msg = f"Invalid patch: {e}"
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=msg
+        ) from e
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=jsonable_encoder(e.errors()),
+        ) from e
+    valid_provider_changes(ProviderCreateExtended.parse_obj(document), obj_in)
+    db_item = provider.update(db_obj=item, obj_in=obj_in, force=True, state=state)
+    if not db_item:
+        response.status_code = status.HTTP_304_NOT_MODIFIED
+    return db_item
+
+
 @router.delete(
     "/{provider_uid}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -177,6 +293,7 @@ def put_provider(
         On cascade, delete related flavors, images, projects \
         and services.",
 )
+@write_transaction
 def delete_providers(item: Provider = Depends(valid_provider_id)):
     if not provider.remove(db_obj=item):
         raise HTTPException(
@@ -1,9 +1,14 @@
-from typing import Optional, Union
+from typing import Any, Dict, Optional, Union
 
 from app.crud import CRUDBase
 from app.identity_provider.crud import identity_provider
 from app.project.crud import project
 from app.provider.models import Provider
+from app.provider.reconcile import (
+    ProviderReconciler,
+    load_provider_state,
+    same_identity_providers,
+)
 from app.provider.schemas import (
     ProviderCreate,
     ProviderRead,
@@ -36,16 +41,16 @@ class CRUDProvider(
     def create(self, *, obj_in: ProviderCreateExtended) -> Provider:
         """Create a new Provider.
 
-        For each received project, identity provider and region, create the
-        corresponding entity.
+        Received projects and regions, with all their nested entities, are written in
+        batches: one statement for each type of node and relationship. Flavors and
+        images with the same UUID are shared by the provider services. Identity
+        providers may already exist and be shared with other providers, so they are
+        created once the projects exist, one by one.
         """
         db_obj = super().create(obj_in=obj_in)
-        for item in obj_in.projects:
-            project.create(obj_in=item, provider=db_obj)
+        ProviderReconciler(provider_uid=db_obj.uid).reconcile(obj_in=obj_in)
         for item in obj_in.identity_providers:
             identity_provider.create(obj_in=item, provider=db_obj)
-        for item in obj_in.regions:
-            region.create(obj_in=item, provider=db_obj)
         return db_obj
 
     def remove(self, *, db_obj: Provider) -> bool:
@@ -70,21 +75,33 @@ class CRUDProvider(
         db_obj: Provider,
         obj_in: Union[ProviderUpdate, ProviderCreateExtended],
         force: bool = False,
+        state: Optional[Dict[str, Any]] = None,
     ) -> Optional[Provider]:
         """Update Provider attributes.
 
         By default do not update relationships or default values. If force is True,
         update linked projects, identity providers and apply default values when
         explicit.
+
+        Projects and regions are reconciled in a single pass: the stored subgraph is
+        loaded with one query, compared with the received data and only the
+        differences are written, in batches. Identity providers are updated one by
+        one only if they differ from the stored ones. A subgraph already loaded in
+        the same transaction can be given as state, to avoid reading it again.
         """
         edit = False
         if force:
-            projects_updated = self.__update_projects(db_obj=db_obj, obj_in=obj_in)
-            idps_updated = self.__update_identity_providers(
-                db_obj=db_obj, obj_in=obj_in
-            )
-            regions_updated = self.__update_regions(db_obj=db_obj, obj_in=obj_in)
-            edit = projects_updated or idps_updated or regions_updated
+            if state is None:
+                state = load_provider_state(db_obj.uid)
+            reconciler = ProviderReconciler(provider_uid=db_obj.uid, state=state)
+            edit = reconciler.reconcile(obj_in=obj_in)
+            if reconciler.projects_changed or not same_identity_providers(
+                items=obj_in.identity_providers, state=state
+            ):
+                idps_updated = self.__update_identity_providers(
+                    db_obj=db_obj, obj_in=obj_in
+                )
+                edit = edit or idps_updated
 
         if isinstance(obj_in, ProviderCreateExtended):
             obj_in = ProviderUpdate.parse_obj(obj_in)
@@ -92,30 +109,6 @@ class CRUDProvider(
         updated_data = super().update(db_obj=db_obj, obj_in=obj_in, force=force)
         return db_obj if edit else updated_data
 
-    def __update_projects(
-        self, *, obj_in: ProviderCreateExtended, db_obj: Provider
-    ) -> bool:
-        """Update provider linked projects.
-
-        Connect new projects not already connect, leave untouched already linked ones
-        and delete old ones no more connected to the flavor.
-        """
-        edit = False
-        db_items = {db_item.uuid: db_item for db_item in db_obj.projects}
-        for item in obj_in.projects:
-            db_item = db_items.pop(item.uuid, None)
-            if not db_item:
-                project.create(obj_in=item, provider=db_obj)
-                edit = True
-            else:
-                updated_data = project.update(db_obj=db_item, obj_in=item, force=True)
-                if not edit and updated_data is not None:
-                    edit = True
-        for db_item in db_items.values():
-            project.remove(db_obj=db_item)
-            edit = True
-        return edit
-
     def __update_identity_providers(
         self, *, obj_in: ProviderCreateExtended, db_obj: Provider
     ) -> bool:
@@ -149,35 +142,6 @@ class CRUDProvider(
             edit = True
         return edit
 
-    def __update_regions(
-        self, *, obj_in: ProviderCreateExtended, db_obj: Provider
-    ) -> bool:
-        """Update provider linked regions.
-
-        Connect new regions not already connect, leave untouched already linked ones and
-        delete old ones no more connected to the provider.
-        """
-        edit = False
-        db_items = {db_item.name: db_item for db_item in db_obj.regions}
-        for item in obj_in.regions:
-            db_item = db_items.pop(item.name, None)
-            if not db_item:
-                region.create(obj_in=item, provider=db_obj)
-                edit = True
-            else:
-                updated_data = region.update(
-                    db_obj=db_item,
-                    obj_in=item,
-                    projects=db_obj.projects,
-                    force=True,
-                )
-                if not edit and updated_data is not None:
-                    edit = True
-        for db_item in db_items.values():
-            region.remove(db_obj=db_item, from_provider=True)
-            edit = True
-        return edit
-
 
 provider = CRUDProvider(
     model=Provider,
@@ -0,0 +1,107 @@
+import hashlib
+import json
+from typing import Any, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+
+from app.provider.schemas_extended import ProviderCreateExtended
+
+# Keys identifying the items of the document lists, in order of precedence.
+NATURAL_KEYS = ("uuid", "endpoint", "name", "site", "project", "per_user")
+
+SERVICE_LISTS = {
+    "BlockStorageService": "block_storage_services",
+    "ComputeService": "compute_services",
+    "IdentityService": "identity_services",
+    "NetworkService": "network_services",
+}
+
+
+def _sort_key(item: Any) -> str:
+    """Return the key sorting an item of a document list."""
+    if not isinstance(item, dict):
+        return json.dumps(item, default=str)
+    sla = item.get("sla") or {}
+    keys = [item.get(k) for k in NATURAL_KEYS]
+    keys += [sla.get("doc_uuid"), sla.get("project")]
+    return json.dumps(keys, default=str)
+
+
+def _canonical(value: Any) -> Any:
+    """Sort recursively the lists of a JSON value by their natural keys."""
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return sorted((_canonical(i) for i in value), key=_sort_key)
+    return value
+
+
+def canonical_document(obj: ProviderCreateExtended) -> Dict[str, Any]:
+    """Return the JSON document of a provider with its nested entities.
+
+    Lists are sorted by the natural keys of their items: documents describing the
+    same provider are equal whatever the order in which entities were retrieved, and
+    their differences, as JSON Patch operations, touch only the changed entities.
+    """
+    return _canonical(jsonable_encoder(obj))
+
+
+def document_etag(document: Dict[str, Any]) -> str:
+    """Return the entity tag of a document, to detect concurrent changes."""
+    data = json.dumps(document, sort_keys=True, separators=(",", ":"))
+    return f'"{hashlib.sha256(data.encode()).hexdigest()}"'
+
+
+def _user_groups(db_idp: Dict[str, Any], projects: List[str]) -> List[Dict]:
+    """Return the user groups of an identity provider with an SLA on one of the
+    given projects, with that SLA and project.
+    """
+    user_groups = []
+    for db_group in db_idp["user_groups"]:
+        for db_sla in db_group["slas"]:
+            project = next((p for p in db_sla["projects"] if p in projects), None)
+            if project is not None:
+                sla = {**db_sla, "project": project}
+                user_groups.append({**db_group, "sla": sla})
+                break
+    return user_groups
+
+
+def _region(db_region: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a region with its location and its services grouped by type."""
+    region = {**db_region, **{k: [] for k in SERVICE_LISTS.values()}}
+    for db_serv in db_region["services"]:
+        key = next(v for k, v in SERVICE_LISTS.items() if k in db_serv["labels"])
+        region[key].append(db_serv)
+    return region
+
+
+def provider_document(
+    provider: Dict[str, Any], state: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Build the canonical document of a stored provider.
+
+    Args:
+    ----
+        provider (dict): Provider properties.
+        state (dict): Provider subgraph, as returned by `load_provider_state`.
+
+    Returns:
+    -------
+        dict. The document the provider would have been created from.
+    """
+    projects = [i["uuid"] for i in state["projects"]]
+    identity_providers = []
+    for db_idp in state["identity_providers"]:
+        user_groups = _user_groups(db_idp, projects)
+        if len(user_groups) > 0:
+            identity_providers.append({**db_idp, "user_groups": user_groups})
+    obj = ProviderCreateExtended.parse_obj(
+        {
+            **provider,
+            "projects": state["projects"],
+            "identity_providers": identity_providers,
+            "regions": [_region(i) for i in state["regions"]],
+        }
+    )
+    return canonical_document(obj)
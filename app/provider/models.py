@@ -1,6 +1,7 @@
 from neomodel import (
     ArrayProperty,
     BooleanProperty,
+    RelationshipFrom,
     RelationshipTo,
     StringProperty,
     StructuredNode,
@@ -37,7 +38,7 @@ class Provider(StructuredNode):
 
     uid = UniqueIdProperty()
     description = StringProperty(default="")
-    name = StringProperty(required=True)
+    name = StringProperty(required=True, index=True)
     type = StringProperty(required=True)
     status = StringProperty()
     is_public = BooleanProperty(default=False)
@@ -57,3 +58,8 @@ class Provider(StructuredNode):
         cardinality=ZeroOrMore,
         model=AuthMethod,
     )
+    user_groups = RelationshipFrom(
+        "..user_group.models.UserGroup",
+        "CAN_ACCESS",
+        cardinality=ZeroOrMore,
+    )
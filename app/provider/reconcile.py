@@ -0,0 +1,657 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple, Type, Union
+
+from neomodel import StructuredNode, db
+from neomodel.match import _rel_helper
+from neomodel.util import _UnsavedNode
+from pydantic import BaseModel, ValidationError
+
+from app.batch import BatchWriter
+from app.crud import CRUDBase
+from app.flavor.crud import flavor
+from app.flavor.models import Flavor
+from app.identity_provider.models import IdentityProvider
+from app.image.crud import image
+from app.image.models import Image
+from app.location.crud import location
+from app.location.models import Location
+from app.network.crud import network
+from app.network.models import Network
+from app.project.crud import project
+from app.project.models import Project
+from app.provider.models import Provider
+from app.provider.schemas_extended import (
+    BlockStorageQuotaCreateExtended,
+    ComputeQuotaCreateExtended,
+    FlavorCreateExtended,
+    IdentityProviderCreateExtended,
+    ImageCreateExtended,
+    NetworkCreateExtended,
+    NetworkQuotaCreateExtended,
+    ProviderCreateExtended,
+    RegionCreateExtended,
+)
+from app.quota.crud import block_storage_quota, compute_quota, network_quota
+from app.quota.models import Quota
+from app.region.crud import region
+from app.region.models import Region
+from app.service.crud import (
+    block_storage_service,
+    compute_service,
+    identity_service,
+    network_service,
+)
+from app.service.models import ComputeService, NetworkService, Service
+from app.sla.models import SLA
+from app.user_group.models import UserGroup
+
+SERVICES = [
+    (block_storage_service, block_storage_quota, "block_storage_services"),
+    (compute_service, compute_quota, "compute_services"),
+    (identity_service, None, "identity_services"),
+    (network_service, network_quota, "network_services"),
+]
+
+
+def _path(
+    model: Type[StructuredNode],
+    name: str,
+    lhs: str,
+    rhs: str,
+    ident: Optional[str] = None,
+) -> str:
+    """Return the pattern of the relationship with the given name defined in model.
+
+    Left and right hand statements are used as they are.
+    """
+    rel = model.defined_properties(aliases=False, properties=False)[name]
+    return _rel_helper(
+        lhs=lhs,
+        rhs=rhs,
+        ident=ident,
+        relation_type=rel.definition["relation_type"],
+        direction=rel.definition["direction"],
+    )
+
+
+@lru_cache
+def _get_state_query() -> str:
+    """Build the query returning the provider subgraph as a nested map.
+
+    Relationship types and directions are read from the models.
+    """
+    to_project = f"y:{Project.__label__}"
+    projects = _path(Provider, "projects", "p", f"x:{Project.__label__}")
+    project_sla = _path(Project, "sla", "x", f"s:{SLA.__label__}")
+    sla_projects = _path(SLA, "projects", "s", to_project)
+    idps = _path(
+        Provider, "identity_providers", "p", f"i:{IdentityProvider.__label__}", "a"
+    )
+    user_groups = _path(
+        IdentityProvider, "user_groups", "i", f"g:{UserGroup.__label__}"
+    )
+    slas = _path(UserGroup, "slas", "g", f"s:{SLA.__label__}")
+    regions = _path(Provider, "regions", "p", f"r:{Region.__label__}")
+    location = _path(Region, "location", "r", f"l:{Location.__label__}")
+    location_regions = _path(Location, "regions", "l", f"z:{Region.__label__}")
+    services = _path(Region, "services", "r", f"s:{Service.__label__}")
+    quotas = _path(ComputeService, "quotas", "s", f"q:{Quota.__label__}")
+    quota_project = _path(Quota, "project", "q", to_project)
+    networks = _path(NetworkService, "networks", "s", f"n:{Network.__label__}")
+    network_project = _path(Network, "project", "n", to_project)
+    resources = {}
+    for name, model in [("flavors", Flavor), ("images", Image)]:
+        items = _path(ComputeService, name, "s", f"f:{model.__label__}")
+        item_projects = _path(model, "projects", "f", to_project)
+        item_services = _path(model, "services", "f", f"z:{ComputeService.__label__}")
+        resources[name] = f"""[{items} | f {{
+            .*,
+            projects: [{item_projects} | y.uuid],
+            services: [{item_services} | z.uid]
+        }}]"""
+
+    return f"""
+        MATCH (p:{Provider.__label__} {{uid: $uid}})
+        RETURN p {{
+            projects: [{projects} | x {{
+                .*,
+                sla: head([{project_sla} | s {{
+                    .uid,
+                    projects: size([{sla_projects} | y])
+                }}])
+            }}],
+            identity_providers: [{idps} | i {{
+                .*,
+                relationship: a {{.*}},
+                user_groups: [{user_groups} | g {{
+                    .*,
+                    slas: [{slas} | s {{.*, projects: [{sla_projects} | y.uuid]}}]
+                }}]
+            }}],
+            regions: [{regions} | r {{
+                .*,
+                location: head([{location} | l {{
+                    .*,
+                    regions: size([{location_regions} | z])
+                }}]),
+                services: [{services} | s {{
+                    .*,
+                    labels: labels(s),
+                    quotas: [{quotas} | q {{
+                        .*,
+                        project: head([{quota_project} | y.uuid])
+                    }}],
+                    flavors: {resources["flavors"]},
+                    images: {resources["images"]},
+                    networks: [{networks} | n {{
+                        .*,
+                        project: head([{network_project} | y.uuid])
+                    }}]
+                }}]
+            }}]
+        }}
+    """
+
+
+def load_provider_state(uid: str) -> Optional[Dict[str, Any]]:
+    """Load with a single query the provider's projects, identity providers and
+    regions, with all their nested entities.
+
+    Nodes are returned as dicts with their stored properties. Shared nodes report
+    how many nodes point to them, to know if they can be deleted.
+
+    Args:
+    ----
+        uid (str): uid of the target provider.
+
+    Returns:
+    -------
+        dict | None: Provider subgraph. None if the provider does not exist.
+    """
+    results, _ = db.cypher_query(_get_state_query(), {"uid": uid})
+    if len(results) == 0:
+        return None
+    return results[0][0]
+
+
+class ProviderReconciler:
+    """Compute and apply the changes turning a stored provider into the received one.
+
+    The current state is compared in memory with the received data. Entities are
+    matched using their natural keys: UUIDs for projects, flavors, images and
+    networks; names for regions; endpoints for services; sites for locations;
+    projects and per user flag for quotas. Only the differences are queued in a
+    BatchWriter, so an unchanged provider results in no statement at all.
+
+    Flavors and images are shared, by UUID, by all the compute services of the
+    provider. Shared nodes (flavors, images, locations and SLAs) are deleted only
+    when no other node points to them.
+
+    Identity providers are not reconciled here.
+
+    Attributes:
+    ----------
+        batch (BatchWriter): Queued changes.
+        provider_uid (str): uid of the target provider.
+        projects (dict): Map received project UUIDs to their uids.
+        removed (set): uids of the nodes to delete.
+    """
+
+    def __init__(
+        self, *, provider_uid: str, state: Optional[Dict[str, Any]] = None
+    ) -> None:
+        if state is None:
+            state = {}
+        self.batch = BatchWriter()
+        self.provider_uid = provider_uid
+        self.projects: Dict[str, str] = {}
+        self.removed: Set[str] = set()
+        self.__state = state
+        self.__service_uids = {
+            db_serv["uid"]
+            for db_region in state.get("regions", [])
+            for db_serv in db_region["services"]
+        }
+        self.__locations = {
+            db_region["location"]["site"]: dict(db_region["location"])
+            for db_region in state.get("regions", [])
+            if db_region["location"] is not None
+        }
+        self.__resources: Dict[
+            str,
+            Dict[str, Tuple[Union[FlavorCreateExtended, ImageCreateExtended], Set]],
+        ] = {"flavors": {}, "images": {}}
+
+    @property
+    def projects_changed(self) -> bool:
+        """Return True if projects have been added or removed."""
+        db_items = {db_item["uuid"] for db_item in self.__state.get("projects", [])}
+        return db_items != set(self.projects.keys())
+
+    def reconcile(self, *, obj_in: ProviderCreateExtended) -> bool:
+        """Queue and write the changes needed to match the received projects and
+        regions.
+
+        Returns True if something changed.
+        """
+        self.__reconcile_projects(items=obj_in.projects)
+        self.__reconcile_regions(items=obj_in.regions)
+        self.__reconcile_resources(crud=flavor, key="flavors")
+        self.__reconcile_resources(crud=image, key="images")
+        for db_item in self.__locations.values():
+            if db_item["regions"] == 0:
+                self.__delete(model=location.model, uid=db_item["uid"])
+        edit = len(self.batch) > 0
+        self.batch.flush()
+        return edit
+
+    def __delete(self, *, model: Type[StructuredNode], uid: str) -> None:
+        """Queue the deletion of a node and keep track of it."""
+        self.batch.delete(model=model, uid=uid)
+        self.removed.add(uid)
+
+    def __update(self, *, crud: CRUDBase, obj_in: BaseModel, db_item: Dict) -> None:
+        """Queue the update of the attributes of a stored node.
+
+        As with forced updates, default values are applied and missing values are
+        removed.
+        """
+        props = crud.model.defined_properties(aliases=False, rels=False)
+        data = crud.create_schema.parse_obj(obj_in).dict()
+        changes = {}
+        for k, v in data.items():
+            if k not in props.keys():
+                continue
+            if v is not None:
+                v = props[k].deflate(v, _UnsavedNode())
+            if db_item.get(k) != v:
+                changes[k] = v
+        if changes:
+            self.batch.update(model=crud.model, uid=db_item["uid"], props=changes)
+
+    def __upsert(
+        self,
+        *,
+        crud: CRUDBase,
+        obj_in: BaseModel,
+        db_item: Optional[Dict],
+        name: str,
+        target: str,
+    ) -> str:
+        """Create the node if it does not exist, otherwise update it.
+
+        Connect new nodes to the target node using the relationship with the given
+        name. Return the node uid.
+        """
+        if db_item is None:
+            uid = self.batch.create(
+                model=crud.model, obj_in=crud.create_schema.parse_obj(obj_in)
+            )
+            self.batch.connect(model=crud.model, name=name, source=uid, target=target)
+            return uid
+        self.__update(crud=crud, obj_in=obj_in, db_item=db_item)
+        return db_item["uid"]
+
+    def __reconcile_projects(self, *, items: List) -> None:
+        """Create, update or delete provider projects.
+
+        Delete the SLA of a removed project if it points only to that project. Quotas
+        pointing to removed projects are deleted along with the services ones.
+        """
+        db_items = {
+            db_item["uuid"]: db_item for db_item in self.__state.get("projects", [])
+        }
+        for item in items:
+            db_item = db_items.pop(item.uuid, None)
+            if db_item is None:
+                uid = self.batch.create(
+                    model=project.model, obj_in=project.create_schema.parse_obj(item)
+                )
+                self.batch.connect(
+                    model=Provider,
+                    name="projects",
+                    source=self.provider_uid,
+                    target=uid,
+                )
+            else:
+                self.__update(crud=project, obj_in=item, db_item=db_item)
+                uid = db_item["uid"]
+            self.projects[item.uuid] = uid
+        for db_item in db_items.values():
+            self.__delete(model=project.model, uid=db_item["uid"])
+            if db_item["sla"] is not None and db_item["sla"]["projects"] == 1:
+                self.__delete(model=SLA, uid=db_item["sla"]["uid"])
+
+    def __reconcile_regions(self, *, items: List[RegionCreateExtended]) -> None:
+        """Create, update or delete provider regions with their location and
+        services.
+        """
+        db_items = {
+            db_item["name"]: db_item for db_item in self.__state.get("regions", [])
+        }
+        for item in items:
+            db_item = db_items.pop(item.name, None)
+            uid = self.__upsert(
+                crud=region,
+                obj_in=item,
+                db_item=db_item,
+                name="provider",
+                target=self.provider_uid,
+            )
+            db_item = db_item or {"location": None, "services": []}
+            self.__reconcile_location(
+                obj_in=item.location, db_item=db_item["location"], region_uid=uid
+            )
+            self.__reconcile_services(
+                obj_in=item, db_items=db_item["services"], region_uid=uid
+            )
+        for db_item in db_items.values():
+            self.__delete(model=region.model, uid=db_item["uid"])
+            if db_item["location"] is not None:
+                self.__locations[db_item["location"]["site"]]["regions"] -= 1
+            for db_serv in db_item["services"]:
+                crud, quota_crud, _ = next(
+                    filter(
+                        lambda x: x[0].model.__label__ in db_serv["labels"], SERVICES
+                    )
+                )
+                self.__remove_service(crud=crud, quota_crud=quota_crud, db_item=db_serv)
+
+    def __reconcile_location(
+        self, *, obj_in: Optional[BaseModel], db_item: Optional[Dict], region_uid: str
+    ) -> None:
+        """Connect, update or disconnect the region location.
+
+        Locations are shared between regions and identified by their site. Keep
+        track of the number of regions pointing to the stored ones.
+        """
+        if db_item is not None and (obj_in is None or obj_in.site != db_item["site"]):
+            self.batch.disconnect(
+                model=region.model,
+                name="location",
+                source=region_uid,
+                target=db_item["uid"],
+            )
+            self.__locations[db_item["site"]]["regions"] -= 1
+        if obj_in is None:
+            return
+        if db_item is None or obj_in.site != db_item["site"]:
+            site = self.batch.merge(model=location.model, obj_in=obj_in, key="site")
+            self.batch.connect(
+                model=region.model,
+                name="location",
+                source=region_uid,
+                target=site,
+                target_key="site",
+            )
+            if site in self.__locations.keys():
+                self.__locations[site]["regions"] += 1
+        else:
+            self.__update(crud=location, obj_in=obj_in, db_item=db_item)
+
+    def __reconcile_services(
+        self, *, obj_in: RegionCreateExtended, db_items: List[Dict], region_uid: str
+    ) -> None:
+        """Create, update or delete region services and their nested entities.
+
+        Services are matched by type and endpoint. Record the flavors and images
+        each compute service should have.
+        """
+        for crud, quota_crud, attr in SERVICES:
+            db_servs = {
+                db_item["endpoint"]: db_item
+                for db_item in db_items
+                if crud.model.__label__ in db_item["labels"]
+            }
+            for item in getattr(obj_in, attr):
+                db_item = db_servs.pop(item.endpoint, None)
+                uid = self.__upsert(
+                    crud=crud,
+                    obj_in=item,
+                    db_item=db_item,
+                    name="region",
+                    target=region_uid,
+                )
+                db_item = db_item or {"quotas": [], "networks": []}
+                if quota_crud is not None:
+                    self.__reconcile_quotas(
+                        crud=quota_crud,
+                        items=item.quotas,
+                        db_items=db_item["quotas"],
+                        service_uid=uid,
+                    )
+                if crud is compute_service:
+                    for key in self.__resources.keys():
+                        for resource in getattr(item, key):
+                            _, services = self.__resources[key].setdefault(
+                                resource.uuid, (resource, set())
+                            )
+                            services.add(uid)
+                if crud is network_service:
+                    self.__reconcile_networks(
+                        items=item.networks,
+                        db_items=db_item["networks"],
+                        service_uid=uid,
+                    )
+            for db_item in db_servs.values():
+                self.__remove_service(crud=crud, quota_crud=quota_crud, db_item=db_item)
+
+    def __remove_service(
+        self, *, crud: CRUDBase, quota_crud: Optional[CRUDBase], db_item: Dict
+    ) -> None:
+        """Delete a service with its quotas and networks.
+
+        Flavors and images are handled once all services have been reconciled.
+        """
+        self.__delete(model=crud.model, uid=db_item["uid"])
+        for db_quota in db_item["quotas"]:
+            self.__delete(model=quota_crud.model, uid=db_quota["uid"])
+        for db_network in db_item["networks"]:
+            self.__delete(model=network.model, uid=db_network["uid"])
+
+    def __reconcile_quotas(
+        self,
+        *,
+        crud: CRUDBase,
+        items: List[
+            Union[
+                BlockStorageQuotaCreateExtended,
+                ComputeQuotaCreateExtended,
+                NetworkQuotaCreateExtended,
+            ]
+        ],
+        db_items: List[Dict],
+        service_uid: str,
+    ) -> None:
+        """Create, update or delete service quotas.
+
+        A service has at most one total quota and one per user quota for each
+        project. Skip quotas not pointing to one of the received projects.
+        """
+        db_quotas = {
+            (db_item["project"], db_item["per_user"]): db_item for db_item in db_items
+        }
+        for item in items:
+            if item.project not in self.projects.keys():
+                continue
+            db_item = db_quotas.pop((item.project, item.per_user), None)
+            uid = self.__upsert(
+                crud=crud,
+                obj_in=item,
+                db_item=db_item,
+                name="service",
+                target=service_uid,
+            )
+            if db_item is None:
+                self.batch.connect(
+                    model=crud.model,
+                    name="project",
+                    source=uid,
+                    target=self.projects[item.project],
+                )
+        for db_item in db_quotas.values():
+            self.__delete(model=crud.model, uid=db_item["uid"])
+
+    def __reconcile_networks(
+        self,
+        *,
+        items: List[NetworkCreateExtended],
+        db_items: List[Dict],
+        service_uid: str,
+    ) -> None:
+        """Create, update or delete service networks.
+
+        Connect private networks to the received project, replacing the previous
+        one.
+        """
+        db_networks = {db_item["uuid"]: db_item for db_item in db_items}
+        for item in items:
+            db_item = db_networks.pop(item.uuid, None)
+            uid = self.__upsert(
+                crud=network,
+                obj_in=item,
+                db_item=db_item,
+                name="service",
+                target=service_uid,
+            )
+            old_project = None if db_item is None else db_item["project"]
+            new_project = item.project if item.project in self.projects else None
+            if old_project == new_project:
+                continue
+            if old_project in self.projects.keys():
+                self.batch.disconnect(
+                    model=network.model,
+                    name="project",
+                    source=uid,
+                    target=self.projects[old_project],
+                )
+            if new_project is not None:
+                self.batch.connect(
+                    model=network.model,
+                    name="project",
+                    source=uid,
+                    target=self.projects[new_project],
+                )
+        for db_item in db_networks.values():
+            self.__delete(model=network.model, uid=db_item["uid"])
+
+    def __reconcile_resources(self, *, crud: CRUDBase, key: str) -> None:
+        """Create, update or delete the flavors or images of the provider.
+
+        Align the links with the provider compute services and projects. Resources
+        no more used by the provider are deleted, unless services of other providers
+        point to them.
+        """
+        db_items: Dict[str, Dict] = {}
+        for db_region in self.__state.get("regions", []):
+            for db_serv in db_region["services"]:
+                for db_item in db_serv[key]:
+                    db_items.setdefault(db_item["uid"], db_item)
+        db_by_uuid: Dict[str, Dict] = {}
+        for db_item in db_items.values():
+            db_by_uuid.setdefault(db_item["uuid"], db_item)
+
+        for uuid, (item, services) in self.__resources[key].items():
+            db_item = db_by_uuid.pop(uuid, None)
+            if db_item is None:
+                uid = self.batch.create(
+                    model=crud.model, obj_in=crud.create_schema.parse_obj(item)
+                )
+                db_item = {"uid": uid, "services": [], "projects": []}
+            else:
+                self.__update(crud=crud, obj_in=item, db_item=db_item)
+                db_items.pop(db_item["uid"])
+            self.__align_links(
+                crud=crud,
+                name="services",
+                uid=db_item["uid"],
+                old_targets=set(db_item["services"]) & self.__service_uids,
+                new_targets=services,
+            )
+            self.__align_links(
+                crud=crud,
+                name="projects",
+                uid=db_item["uid"],
+                old_targets={
+                    self.projects[i] for i in db_item["projects"] if i in self.projects
+                },
+                new_targets={
+                    self.projects[i] for i in item.projects if i in self.projects
+                },
+            )
+
+        for db_item in db_items.values():
+            services = set(db_item["services"])
+            if services.issubset(self.__service_uids):
+                self.__delete(model=crud.model, uid=db_item["uid"])
+            else:
+                self.__align_links(
+                    crud=crud,
+                    name="services",
+                    uid=db_item["uid"],
+                    old_targets=services & self.__service_uids,
+                    new_targets=set(),
+                )
+
+    def __align_links(
+        self,
+        *,
+        crud: CRUDBase,
+        name: str,
+        uid: str,
+        old_targets: Set[str],
+        new_targets: Set[str],
+    ) -> None:
+        """Connect the node to the new targets and disconnect it from the old ones.
+
+        Skip relationships already removed along with deleted nodes.
+        """
+        for target in new_targets - old_targets:
+            self.batch.connect(model=crud.model, name=name, source=uid, target=target)
+        for target in old_targets - new_targets - self.removed:
+            self.batch.disconnect(
+                model=crud.model, name=name, source=uid, target=target
+            )
+
+
+def same_identity_providers(
+    *, items: List[IdentityProviderCreateExtended], state: Dict[str, Any]
+) -> bool:
+    """Check the stored identity providers match the received ones.
+
+    Stored ones are converted to the received data format. For each user group,
+    consider the SLA pointing to one of the provider projects.
+    """
+    projects = {db_item["uuid"] for db_item in state["projects"]}
+    db_items = []
+    for db_item in state["identity_providers"]:
+        user_groups = []
+        for db_group in db_item["user_groups"]:
+            db_sla = next(
+                filter(
+                    lambda x: projects.intersection(x["projects"]), db_group["slas"]
+                ),
+                None,
+            )
+            if db_sla is not None:
+                db_sla = {
+                    **db_sla,
+                    "project": projects.intersection(db_sla["projects"]).pop(),
+                }
+            user_groups.append({**db_group, "sla": db_sla})
+        try:
+            db_items.append(
+                IdentityProviderCreateExtended.parse_obj(
+                    {**db_item, "user_groups": user_groups}
+                )
+            )
+        except ValidationError:
+            return False
+
+    def normalize(items: List[IdentityProviderCreateExtended]) -> List[Dict]:
+        data = sorted([item.dict() for item in items], key=lambda x: x["endpoint"])
+        for item in data:
+            item["user_groups"].sort(key=lambda x: x["name"])
+        return data
+
+    return normalize(items) == normalize(db_items)
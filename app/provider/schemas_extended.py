@@ -1,7 +1,7 @@
-from typing import Any, List, Optional, Union
+from typing import Any, List, Literal, Optional, Union
 from uuid import UUID
 
-from pydantic import Field, root_validator, validator
+from pydantic import BaseModel, Field, root_validator, validator
 
 from app.auth_method.schemas import AuthMethodCreate, AuthMethodRead
 from app.flavor.schemas import FlavorCreate, FlavorRead, FlavorReadPublic
@@ -559,3 +559,20 @@ class ProviderCreateExtended(ProviderCreate):
                         msg += f"not in this provider: {projects}"
                         assert quota.project in projects, msg
         return values
+
+
+class ProviderPatchOperation(BaseModel):
+    """Model with a JSON Patch (RFC 6902) operation on the document of a provider.
+
+    The document has the structure of ProviderCreateExtended, see
+    `app.provider.document`.
+    """
+
+    op: Literal["add", "remove", "replace", "move", "copy", "test"] = Field(
+        description="Operation"
+    )
+    path: str = Field(description="JSON Pointer to the target location")
+    value: Any = Field(default=None, description="Value to add, replace or test")
+    from_: Optional[str] = Field(
+        default=None, alias="from", description="JSON Pointer to move or copy from"
+    )
@@ -1,8 +1,11 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from datetime import datetime
 from enum import Enum
-from typing import Optional, get_origin
+from typing import Any, Optional, Tuple, get_origin
 
-from pydantic import BaseModel, Field, create_model, root_validator
+from fastapi import HTTPException, status
+from pydantic import BaseModel, Field, create_model, root_validator, validator
 from pydantic.fields import SHAPE_LIST
 
 from app.models import BaseNodeQuery
@@ -20,27 +23,101 @@ class SchemaSize(BaseModel):
     )
 
 
+class StreamFormat(Enum):
+    """Formats of streamed lists."""
+
+    JSON: str = "json"
+    NDJSON: str = "ndjson"
+
+
+class Streaming(BaseModel):
+    """Model to add query attribute related to response streaming."""
+
+    stream: Optional[StreamFormat] = Field(
+        default=None,
+        description="Stream items, while reading them from the database, as a JSON \
+            array (json) or as newline delimited JSON (ndjson).",
+    )
+
+
+def encode_cursor(*, sort: str, value: Any, uid: str) -> str:
+    """Return an opaque token pointing to the position after the given item.
+
+    Args:
+    ----
+        sort (str): Sort rule used to list the items.
+        value (Any): Database value of the sort property of the item.
+        uid (str): Item uid.
+
+    Returns:
+    -------
+        str.
+    """
+    data = json.dumps([sort, value, uid], separators=(",", ":"))
+    return urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Any, str]:
+    """Return sort rule, sort property value and uid stored in a cursor.
+
+    Raises:
+    ------
+        ValueError: the cursor is malformed.
+    """
+    data = json.loads(urlsafe_b64decode(cursor.encode()))
+    if (
+        not isinstance(data, list)
+        or len(data) != 3
+        or not isinstance(data[0], str)
+        or not isinstance(data[2], str)
+    ):
+        raise ValueError("Invalid cursor")
+    return data[0], data[1], data[2]
+
+
 class Pagination(BaseModel):
-    page: int = 0
-    size: Optional[int] = None
+    page: int = Field(default=0, ge=0, description="Page number, starting from 0")
+    size: Optional[int] = Field(default=None, ge=1, description="Items per page")
+    cursor: Optional[str] = Field(
+        default=None,
+        description="Return the items following the one the cursor points to. \
+            Use the value of the `X-Next-Cursor` header of the previous response. \
+            Items are sorted with the rule the cursor was generated with and \
+            `page` is ignored.",
+    )
 
     @root_validator(pre=True)
     def set_page_to_0(cls, values):
-        if values.get("size") is None:
+        if values.get("size") is None or values.get("cursor") is not None:
             values["page"] = 0
         return values
 
+    @validator("cursor")
+    def check_cursor(cls, v):
+        # Validation errors raised by dependencies are not converted into client
+        # errors, so raise an HTTP exception.
+        if v is not None:
+            try:
+                decode_cursor(v)
+            except ValueError as e:
+                msg = f"Invalid cursor '{v}'"
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail=msg
+                ) from e
+        return v
+
 
 class DbQueryCommonParams(BaseModel):
     """Model to add common query attributes."""
 
     skip: int = Field(
         default=0,
+        ge=0,
         description="Number of items to skip from the ones retrieved \
             from the get operations",
     )
     limit: Optional[int] = Field(
-        default=None, description="Maximum number or returned items"
+        default=None, ge=0, description="Maximum number or returned items"
     )
     sort: Optional[str] = Field(default=None, description="Sort rule")
 
@@ -1,10 +1,12 @@
 from typing import List, Optional, Union
 
 from fastapi import APIRouter, Depends, HTTPException, Response, status
-from neomodel import db
 
 from app.auth.dependencies import check_read_access, check_write_access
-from app.query import DbQueryCommonParams, Pagination, SchemaSize
+from app.cache import cached_read
+from app.db import read_transaction, write_transaction
+from app.etag import check_etag, check_item_etag
+from app.query import DbQueryCommonParams, Pagination, SchemaSize, Streaming
 from app.quota.api.dependencies import (
     valid_block_storage_quota_id,
     valid_compute_quota_id,
@@ -40,13 +42,15 @@ from app.quota.schemas_extended import (
     NetworkQuotaReadExtended,
     NetworkQuotaReadExtendedPublic,
 )
+from app.response import schema_response
+from app.stream import stream_response
 
 bs_router = APIRouter(prefix="/block_storage_quotas", tags=["block_storage_quotas"])
 
 
-@db.read_transaction
 @bs_router.get(
     "/",
+    dependencies=[Depends(check_etag)],
     response_model=Union[
         List[BlockStorageQuotaReadExtended],
         List[BlockStorageQuotaRead],
@@ -59,20 +63,44 @@ bs_router = APIRouter(prefix="/block_storage_quotas", tags=["block_storage_quota
         It is possible to filter on quotas attributes and other \
         common query parameters.",
 )
+@cached_read
+@read_transaction
 def get_block_storage_quotas(
+    response: Response,
     auth: bool = Depends(check_read_access),
     comm: DbQueryCommonParams = Depends(),
     page: Pagination = Depends(),
     size: SchemaSize = Depends(),
+    stream: Streaming = Depends(),
     item: BlockStorageQuotaQuery = Depends(),
 ):
+    response.headers["X-Total-Count"] = str(
+        block_storage_quota.count(**item.dict(exclude_none=True))
+    )
+    if stream.stream is not None:
+        items = block_storage_quota.stream_multi(
+            auth=auth,
+            short=size.short,
+            with_conn=size.with_conn,
+            **comm.dict(exclude_none=True),
+            **page.dict(exclude_none=True),
+            **item.dict(exclude_none=True),
+        )
+        return stream_response(items=items, fmt=stream.stream, response=response)
     items = block_storage_quota.get_multi(
-        **comm.dict(exclude_none=True), **item.dict(exclude_none=True)
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
     )
-    items = block_storage_quota.paginate(items=items, page=page.page, size=page.size)
-    return block_storage_quota.choose_out_schema(
+    cursor = block_storage_quota.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
+    )
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    items = block_storage_quota.choose_out_schema(
         items=items, auth=auth, short=size.short, with_conn=size.with_conn
     )
+    return schema_response(content=items, response=response)
 
 
 # @db.write_transaction
@@ -112,9 +140,9 @@ def get_block_storage_quotas(
 #     )
 
 
-@db.read_transaction
 @bs_router.get(
     "/{quota_uid}",
+    dependencies=[Depends(check_item_etag(valid_block_storage_quota_id))],
     response_model=Union[
         BlockStorageQuotaReadExtended,
         BlockStorageQuotaRead,
@@ -127,17 +155,19 @@ def get_block_storage_quotas(
         If no entity matches the given *uid*, the endpoint \
         raises a `not found` error.",
 )
+@read_transaction
 def get_block_storage_quota(
+    response: Response,
     auth: bool = Depends(check_read_access),
     size: SchemaSize = Depends(),
     item: BlockStorageQuota = Depends(valid_block_storage_quota_id),
 ):
-    return block_storage_quota.choose_out_schema(
+    items = block_storage_quota.choose_out_schema(
         items=[item], auth=auth, short=size.short, with_conn=size.with_conn
-    )[0]
+    )
+    return schema_response(content=items[0], response=response)
 
 
-@db.write_transaction
 @bs_router.patch(
     "/{quota_uid}",
     status_code=status.HTTP_200_OK,
@@ -154,6 +184,7 @@ def get_block_storage_quota(
         current ones, the database entity is left unchanged \
         and the endpoint returns the `not modified` message.",
 )
+@write_transaction
 def put_block_storage_quota(
     update_data: BlockStorageQuotaUpdate,
     response: Response,
@@ -165,7 +196,6 @@ def put_block_storage_quota(
     return db_item
 
 
-@db.write_transaction
 @bs_router.delete(
     "/{quota_uid}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -178,6 +208,7 @@ def put_block_storage_quota(
         If the deletion procedure fails, raises a `internal \
         server` error",
 )
+@write_transaction
 def delete_block_storage_quotas(
     item: BlockStorageQuota = Depends(valid_block_storage_quota_id),
 ):
@@ -191,9 +222,9 @@ def delete_block_storage_quotas(
 c_router = APIRouter(prefix="/compute_quotas", tags=["compute_quotas"])
 
 
-@db.read_transaction
 @c_router.get(
     "/",
+    dependencies=[Depends(check_etag)],
     response_model=Union[
         List[ComputeQuotaReadExtended],
         List[ComputeQuotaRead],
@@ -206,20 +237,44 @@ c_router = APIRouter(prefix="/compute_quotas", tags=["compute_quotas"])
         It is possible to filter on quotas attributes and other \
         common query parameters.",
 )
+@cached_read
+@read_transaction
 def get_compute_quotas(
+    response: Response,
     auth: bool = Depends(check_read_access),
     comm: DbQueryCommonParams = Depends(),
     page: Pagination = Depends(),
     size: SchemaSize = Depends(),
+    stream: Streaming = Depends(),
     item: ComputeQuotaQuery = Depends(),
 ):
+    response.headers["X-Total-Count"] = str(
+        compute_quota.count(**item.dict(exclude_none=True))
+    )
+    if stream.stream is not None:
+        items = compute_quota.stream_multi(
+            auth=auth,
+            short=size.short,
+            with_conn=size.with_conn,
+            **comm.dict(exclude_none=True),
+            **page.dict(exclude_none=True),
+            **item.dict(exclude_none=True),
+        )
+        return stream_response(items=items, fmt=stream.stream, response=response)
     items = compute_quota.get_multi(
-        **comm.dict(exclude_none=True), **item.dict(exclude_none=True)
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
     )
-    items = compute_quota.paginate(items=items, page=page.page, size=page.size)
-    return compute_quota.choose_out_schema(
+    cursor = compute_quota.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
+    )
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    items = compute_quota.choose_out_schema(
         items=items, auth=auth, short=size.short, with_conn=size.with_conn
     )
+    return schema_response(content=items, response=response)
 
 
 # @db.write_transaction
@@ -259,9 +314,9 @@ def get_compute_quotas(
 #     )
 
 
-@db.read_transaction
 @c_router.get(
     "/{quota_uid}",
+    dependencies=[Depends(check_item_etag(valid_compute_quota_id))],
     response_model=Union[
         ComputeQuotaReadExtended,
         ComputeQuotaRead,
@@ -274,17 +329,19 @@ def get_compute_quotas(
         If no entity matches the given *uid*, the endpoint \
         raises a `not found` error.",
 )
+@read_transaction
 def get_compute_quota(
+    response: Response,
     auth: bool = Depends(check_read_access),
     size: SchemaSize = Depends(),
     item: ComputeQuota = Depends(valid_compute_quota_id),
 ):
-    return compute_quota.choose_out_schema(
+    items = compute_quota.choose_out_schema(
         items=[item], auth=auth, short=size.short, with_conn=size.with_conn
-    )[0]
+    )
+    return schema_response(content=items[0], response=response)
 
 
-@db.write_transaction
 @c_router.patch(
     "/{quota_uid}",
     status_code=status.HTTP_200_OK,
@@ -301,6 +358,7 @@ def get_compute_quota(
         current ones, the database entity is left unchanged \
         and the endpoint returns the `not modified` message.",
 )
+@write_transaction
 def put_compute_quota(
     update_data: ComputeQuotaUpdate,
     response: Response,
@@ -312,7 +370,6 @@ def put_compute_quota(
     return db_item
 
 
-@db.write_transaction
 @c_router.delete(
     "/{quota_uid}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -325,6 +382,7 @@ def put_compute_quota(
         If the deletion procedure fails, raises a `internal \
         server` error",
 )
+@write_transaction
 def delete_compute_quotas(item: ComputeQuota = Depends(valid_compute_quota_id)):
     if not compute_quota.remove(db_obj=item):
         raise HTTPException(
@@ -336,9 +394,9 @@ def delete_compute_quotas(item: ComputeQuota = Depends(valid_compute_quota_id)):
 n_router = APIRouter(prefix="/network_quotas", tags=["network_quotas"])
 
 
-@db.read_transaction
 @n_router.get(
     "/",
+    dependencies=[Depends(check_etag)],
     response_model=Union[
         List[NetworkQuotaReadExtended],
         List[NetworkQuotaRead],
@@ -351,25 +409,49 @@ n_router = APIRouter(prefix="/network_quotas", tags=["network_quotas"])
         It is possible to filter on quotas attributes and other \
         common query parameters.",
 )
+@cached_read
+@read_transaction
 def get_network_quotas(
+    response: Response,
     auth: bool = Depends(check_read_access),
     comm: DbQueryCommonParams = Depends(),
     page: Pagination = Depends(),
     size: SchemaSize = Depends(),
+    stream: Streaming = Depends(),
     item: NetworkQuotaQuery = Depends(),
 ):
+    response.headers["X-Total-Count"] = str(
+        network_quota.count(**item.dict(exclude_none=True))
+    )
+    if stream.stream is not None:
+        items = network_quota.stream_multi(
+            auth=auth,
+            short=size.short,
+            with_conn=size.with_conn,
+            **comm.dict(exclude_none=True),
+            **page.dict(exclude_none=True),
+            **item.dict(exclude_none=True),
+        )
+        return stream_response(items=items, fmt=stream.stream, response=response)
     items = network_quota.get_multi(
-        **comm.dict(exclude_none=True), **item.dict(exclude_none=True)
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
+    )
+    cursor = network_quota.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
     )
-    items = network_quota.paginate(items=items, page=page.page, size=page.size)
-    return network_quota.choose_out_schema(
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    items = network_quota.choose_out_schema(
         items=items, auth=auth, short=size.short, with_conn=size.with_conn
     )
+    return schema_response(content=items, response=response)
 
 
-@db.read_transaction
 @n_router.get(
     "/{quota_uid}",
+    dependencies=[Depends(check_item_etag(valid_network_quota_id))],
     response_model=Union[
         NetworkQuotaReadExtended,
         NetworkQuotaRead,
@@ -382,17 +464,19 @@ def get_network_quotas(
         If no entity matches the given *uid*, the endpoint \
         raises a `not found` error.",
 )
+@read_transaction
 def get_network_quota(
+    response: Response,
     auth: bool = Depends(check_read_access),
     size: SchemaSize = Depends(),
     item: NetworkQuota = Depends(valid_network_quota_id),
 ):
-    return network_quota.choose_out_schema(
+    items = network_quota.choose_out_schema(
         items=[item], auth=auth, short=size.short, with_conn=size.with_conn
-    )[0]
+    )
+    return schema_response(content=items[0], response=response)
 
 
-@db.write_transaction
 @n_router.patch(
     "/{quota_uid}",
     status_code=status.HTTP_200_OK,
@@ -409,6 +493,7 @@ def get_network_quota(
         current ones, the database entity is left unchanged \
         and the endpoint returns the `not modified` message.",
 )
+@write_transaction
 def put_network_quota(
     update_data: NetworkQuotaUpdate,
     response: Response,
@@ -420,7 +505,6 @@ def put_network_quota(
     return db_item
 
 
-@db.write_transaction
 @n_router.delete(
     "/{quota_uid}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -433,6 +517,7 @@ def put_network_quota(
         If the deletion procedure fails, raises a `internal \
         server` error",
 )
+@write_transaction
 def delete_network_quotas(item: NetworkQuota = Depends(valid_network_quota_id)):
     if not network_quota.remove(db_obj=item):
         raise HTTPException(
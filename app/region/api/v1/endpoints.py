@@ -1,10 +1,12 @@
 from typing import List, Optional, Union
 
 from fastapi import APIRouter, Depends, HTTPException, Response, status
-from neomodel import db
 
 from app.auth.dependencies import check_read_access, check_write_access
-from app.query import DbQueryCommonParams, Pagination, SchemaSize
+from app.cache import cached_read
+from app.db import read_transaction, write_transaction
+from app.etag import check_etag, check_item_etag
+from app.query import DbQueryCommonParams, Pagination, SchemaSize, Streaming
 from app.region.api.dependencies import (
     valid_region_id,
     validate_new_region_values,
@@ -22,13 +24,15 @@ from app.region.schemas_extended import (
     RegionReadExtended,
     RegionReadExtendedPublic,
 )
+from app.response import schema_response
+from app.stream import stream_response
 
 router = APIRouter(prefix="/regions", tags=["regions"])
 
 
-@db.read_transaction
 @router.get(
     "/",
+    dependencies=[Depends(check_etag)],
     response_model=Union[
         List[RegionReadExtended],
         List[RegionRead],
@@ -41,25 +45,49 @@ router = APIRouter(prefix="/regions", tags=["regions"])
         It is possible to filter on regions attributes and other \
         common query parameters.",
 )
+@cached_read
+@read_transaction
 def get_regions(
+    response: Response,
     auth: bool = Depends(check_read_access),
     comm: DbQueryCommonParams = Depends(),
     page: Pagination = Depends(),
     size: SchemaSize = Depends(),
+    stream: Streaming = Depends(),
     item: RegionQuery = Depends(),
 ):
+    response.headers["X-Total-Count"] = str(
+        region.count(**item.dict(exclude_none=True))
+    )
+    if stream.stream is not None:
+        items = region.stream_multi(
+            auth=auth,
+            short=size.short,
+            with_conn=size.with_conn,
+            **comm.dict(exclude_none=True),
+            **page.dict(exclude_none=True),
+            **item.dict(exclude_none=True),
+        )
+        return stream_response(items=items, fmt=stream.stream, response=response)
     items = region.get_multi(
-        **comm.dict(exclude_none=True), **item.dict(exclude_none=True)
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
     )
-    items = region.paginate(items=items, page=page.page, size=page.size)
-    return region.choose_out_schema(
+    cursor = region.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
+    )
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    items = region.choose_out_schema(
         items=items, auth=auth, short=size.short, with_conn=size.with_conn
     )
+    return schema_response(content=items, response=response)
 
 
-@db.read_transaction
 @router.get(
     "/{region_uid}",
+    dependencies=[Depends(check_item_etag(valid_region_id))],
     response_model=Union[
         RegionReadExtended,
         RegionRead,
@@ -72,17 +100,19 @@ def get_regions(
         If no entity matches the given *uid*, the endpoint \
         raises a `not found` error.",
 )
+@read_transaction
 def get_region(
+    response: Response,
     auth: bool = Depends(check_read_access),
     size: SchemaSize = Depends(),
     item: Region = Depends(valid_region_id),
 ):
-    return region.choose_out_schema(
+    items = region.choose_out_schema(
         items=[item], auth=auth, short=size.short, with_conn=size.with_conn
-    )[0]
+    )
+    return schema_response(content=items[0], response=response)
 
 
-@db.write_transaction
 @router.patch(
     "/{region_uid}",
     status_code=status.HTTP_200_OK,
@@ -102,6 +132,7 @@ def get_region(
         no other items, belonging to the same provider with \
         the given *name*.",
 )
+@write_transaction
 def put_region(
     update_data: RegionUpdate,
     response: Response,
@@ -113,7 +144,6 @@ def put_region(
     return db_item
 
 
-@db.write_transaction
 @router.delete(
     "/{region_uid}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -126,6 +156,7 @@ def put_region(
         If the deletion procedure fails, raises a `internal \
         server` error",
 )
+@write_transaction
 def delete_regions(item: Region = Depends(valid_region_id)):
     if not region.remove(db_obj=item):
         raise HTTPException(
@@ -26,7 +26,7 @@ class Region(StructuredNode):
 
     uid = UniqueIdProperty()
     description = StringProperty(default="")
-    name = StringProperty(required=True)
+    name = StringProperty(required=True, index=True)
 
     location = RelationshipTo(
         "..location.models.Location", "LOCATED_AT", cardinality=ZeroOrOne
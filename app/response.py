@@ -0,0 +1,69 @@
+from typing import Any, Dict, List, Optional, Union
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic.json import pydantic_encoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def encode(content: Union[BaseModel, List[BaseModel]]) -> bytes:
+    """Serialize a schema instance, or a list of them, to JSON.
+
+    Use orjson when installed, otherwise fall back on pydantic serialization.
+    """
+    if orjson is not None:
+        if isinstance(content, list):
+            data: Any = [i.dict(by_alias=True) for i in content]
+        else:
+            data = content.dict(by_alias=True)
+        return orjson.dumps(data, default=pydantic_encoder)
+    if isinstance(content, list):
+        return ("[" + ",".join(i.json(by_alias=True) for i in content) + "]").encode()
+    return content.json(by_alias=True).encode()
+
+
+class SchemaResponse(JSONResponse):
+    """JSON response whose content is made of already validated schemas.
+
+    Returning it from an endpoint skips the validation against the route
+    response_model, which is still used to document the endpoint.
+    """
+
+    def render(self, content: Union[BaseModel, List[BaseModel]]) -> bytes:
+        return encode(content)
+
+
+def forwarded_headers(response: Optional[Response]) -> Optional[Dict[str, str]]:
+    """Return the headers set on the endpoint response to copy on the returned one.
+
+    FastAPI does not merge them (e.g. X-Total-Count and ETag) into a response
+    returned by the endpoint.
+    """
+    if response is None:
+        return None
+    return {k: v for k, v in response.headers.items() if k != "content-length"}
+
+
+def schema_response(
+    *,
+    content: Union[BaseModel, List[BaseModel]],
+    response: Optional[Response] = None,
+) -> SchemaResponse:
+    """Return a response serializing the given schemas as they are.
+
+    Args:
+    ----
+        content (BaseModel | List[BaseModel]): Items in their output schema.
+        response (Response | None): Endpoint response holding the headers to
+            forward.
+
+    Returns:
+    -------
+        SchemaResponse.
+    """
+    return SchemaResponse(content=content, headers=forwarded_headers(response))
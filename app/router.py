@@ -16,6 +16,7 @@ from app.quota.api.v1.endpoints import (
 from app.quota.api.v1.endpoints import c_router as compute_quota_router_v1
 from app.quota.api.v1.endpoints import n_router as network_quota_router_v1
 from app.region.api.v1.endpoints import router as region_router_v1
+from app.search.api.v1.endpoints import router as search_router_v1
 from app.service.api.v1.endpoints import (
     bs_router as block_storage_service_router_v1,
 )
@@ -45,3 +46,4 @@ router_v1.include_router(network_service_router_v1)
 router_v1.include_router(sla_router_v1)
 router_v1.include_router(user_group_router_v1)
 router_v1.include_router(region_router_v1)
+router_v1.include_router(search_router_v1)
@@ -0,0 +1,52 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+
+from app.auth.dependencies import check_read_access
+from app.cache import cached_read
+from app.db import read_transaction
+from app.etag import check_etag
+from app.response import schema_response
+from app.search.crud import search
+from app.search.schemas import SearchHit, SearchQuery, SearchType
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get(
+    "/",
+    dependencies=[Depends(check_etag)],
+    response_model=List[SearchHit],
+    summary="Search flavors, images, networks and projects",
+    description="Retrieve the flavors, images, networks and projects \
+        whose names, descriptions, tags and other textual attributes \
+        contain the given words, sorted by relevance. \
+        The last word matches as a prefix, to support type-ahead lookups. \
+        It is possible to restrict the search to some item types. \
+        If the search index has not been created yet, the endpoint \
+        raises a `service unavailable` error.",
+)
+@cached_read
+@read_transaction
+def search_items(
+    response: Response,
+    auth: bool = Depends(check_read_access),
+    item: SearchQuery = Depends(),
+    types: Optional[List[SearchType]] = Query(
+        default=None, description="Types of the items to look for"
+    ),
+):
+    result = search(
+        text=item.q,
+        auth=auth,
+        short=item.short,
+        types=types,
+        skip=item.skip,
+        limit=item.limit,
+    )
+    if result is None:
+        msg = "Search index not available"
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=msg)
+    hits, total = result
+    response.headers["X-Total-Count"] = str(total)
+    return schema_response(content=hits, response=response)
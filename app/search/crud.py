@@ -0,0 +1,138 @@
+import re
+from typing import List, Optional, Tuple
+
+from neo4j.exceptions import ClientError
+from neomodel import db
+
+from app.flavor.crud import flavor
+from app.image.crud import image
+from app.network.crud import network
+from app.project.crud import project
+from app.search.schemas import SearchHit, SearchType
+
+SEARCH_INDEX = "catalog_search"
+# Error code of the queries on a missing full-text index.
+INDEX_NOT_FOUND_CODE = "Neo.ClientError.Procedure.ProcedureCallFailed"
+SEARCH_TARGETS = {
+    SearchType.FLAVOR: flavor,
+    SearchType.IMAGE: image,
+    SearchType.NETWORK: network,
+    SearchType.PROJECT: project,
+}
+SEARCH_PROPERTIES = [
+    "name",
+    "description",
+    "uuid",
+    "tags",
+    "os_type",
+    "os_distro",
+    "os_version",
+    "architecture",
+    "gpu_model",
+    "gpu_vendor",
+]
+
+# Characters with a meaning in the Lucene query syntax.
+LUCENE_SPECIAL_CHARS = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+
+
+def install_search_index() -> None:
+    """Create the full-text index used by the search, if missing.
+
+    The index spans the labels of all the searchable items and is fed by their
+    textual properties. Wait for it to be online.
+    """
+    labels = "|".join(i.model.__label__ for i in SEARCH_TARGETS.values())
+    props = ", ".join(f"n.{p}" for p in SEARCH_PROPERTIES)
+    db.cypher_query(
+        f"CREATE FULLTEXT INDEX {SEARCH_INDEX} IF NOT EXISTS "
+        f"FOR (n:{labels}) ON EACH [{props}]"
+    )
+    db.cypher_query(f"CALL db.awaitIndex('{SEARCH_INDEX}')")
+
+
+def build_lucene_query(text: str) -> str:
+    """Convert the user text into a Lucene query matching all the given words.
+
+    Escape special characters so that user input can't alter the query. Lower all
+    the words: the indexed terms are lowercase and the boolean operators (AND, OR,
+    NOT, TO) are recognized only when uppercase, so user words are always terms.
+    The last word matches as a prefix, to support type-ahead lookups.
+    """
+    words = [LUCENE_SPECIAL_CHARS.sub(r"\\\1", w.lower()) for w in text.split()]
+    if words:
+        words[-1] = f"{words[-1]}*"
+    return " AND ".join(words)
+
+
+def search(
+    *,
+    text: str,
+    auth: bool,
+    short: bool,
+    types: Optional[List[SearchType]] = None,
+    skip: int = 0,
+    limit: int = 20,
+) -> Optional[Tuple[List[SearchHit], int]]:
+    """Look for the items matching the given text, sorted by relevance.
+
+    Args:
+    ----
+        text (str): Words to look for.
+        auth (bool): Authenticated user. Chooses the output schema.
+        short (bool): Use the short output schema.
+        types (list | None): Types of the items to look for. All when None.
+        skip (int): Number of hits to skip.
+        limit (int): Maximum number of returned hits.
+
+    Returns:
+    -------
+        Tuple[List[SearchHit], int] | None. Requested hits and total number of
+        hits. None when the search index does not exist, see
+        `install_search_index`.
+    """
+    query = build_lucene_query(text)
+    if not query:
+        return [], 0
+    targets = {
+        crud.model.__label__: (t, crud)
+        for t, crud in SEARCH_TARGETS.items()
+        if not types or t in types
+    }
+    params = {
+        "index": SEARCH_INDEX,
+        "query": query,
+        "labels": list(targets.keys()),
+        "skip": skip,
+        "limit": limit,
+    }
+    match = """
+        CALL db.index.fulltext.queryNodes($index, $query) YIELD node, score
+        WITH node, score, [l IN labels(node) WHERE l IN $labels][0] AS label
+        WHERE label IS NOT NULL
+    """
+    try:
+        results, _ = db.cypher_query(f"{match} RETURN count(*)", params)
+    except ClientError as e:
+        if e.code == INDEX_NOT_FOUND_CODE and SEARCH_INDEX in (e.message or ""):
+            return None
+        raise
+    total = results[0][0]
+    results, _ = db.cypher_query(
+        f"""{match}
+        RETURN node, label, score
+        ORDER BY score DESC, node.uid
+        SKIP $skip LIMIT $limit
+        """,
+        params,
+    )
+    hits = []
+    for node, label, score in results:
+        item_type, crud = targets[label]
+        item = crud.choose_out_schema(
+            items=[crud.model.inflate(node)], auth=auth, short=short, with_conn=False
+        )[0]
+        # Items are already validated. Validating them against the Union would try
+        # each member in turn.
+        hits.append(SearchHit.construct(type=item_type, score=score, item=item))
+    return hits, total
@@ -0,0 +1,63 @@
+from enum import Enum
+from typing import Union
+
+from pydantic import BaseModel, Field
+
+from app.flavor.schemas import FlavorRead, FlavorReadPublic, FlavorReadShort
+from app.image.schemas import ImageRead, ImageReadPublic, ImageReadShort
+from app.network.schemas import NetworkRead, NetworkReadPublic, NetworkReadShort
+from app.project.schemas import ProjectRead, ProjectReadPublic, ProjectReadShort
+
+
+class SearchType(Enum):
+    """Possible types of the searched items."""
+
+    FLAVOR: str = "flavor"
+    IMAGE: str = "image"
+    NETWORK: str = "network"
+    PROJECT: str = "project"
+
+
+class SearchQuery(BaseModel):
+    """Model with the full-text search query attributes."""
+
+    q: str = Field(
+        min_length=1,
+        description="Words to look for in names, descriptions, tags and other \
+            textual attributes. The last word matches as a prefix.",
+    )
+    skip: int = Field(default=0, ge=0, description="Number of hits to skip")
+    limit: int = Field(
+        default=20, ge=1, le=100, description="Maximum number of returned hits"
+    )
+    short: bool = Field(
+        default=False, description="Show a shortened version of the items."
+    )
+
+
+class SearchHit(BaseModel):
+    """Model with an item matching the search and its relevance.
+
+    Attributes:
+    ----------
+        type (SearchType): Item type.
+        score (float): Relevance of the item, hits are sorted by descending score.
+        item: Item data.
+    """
+
+    type: SearchType = Field(description="Item type")
+    score: float = Field(description="Relevance of the item")
+    item: Union[
+        FlavorRead,
+        FlavorReadShort,
+        FlavorReadPublic,
+        ImageRead,
+        ImageReadShort,
+        ImageReadPublic,
+        NetworkRead,
+        NetworkReadShort,
+        NetworkReadPublic,
+        ProjectRead,
+        ProjectReadShort,
+        ProjectReadPublic,
+    ] = Field(description="Item data")
@@ -1,9 +1,11 @@
 from typing import List, Optional, Union
 
 from fastapi import APIRouter, Depends, HTTPException, Response, status
-from neomodel import db
 
 from app.auth.dependencies import check_read_access, check_write_access
+from app.cache import cached_read
+from app.db import read_transaction, write_transaction
+from app.etag import check_etag, check_item_etag
 
 # from app.identity_provider.crud import identity_provider
 # from app.identity_provider.schemas import (
@@ -15,7 +17,8 @@ from app.auth.dependencies import check_read_access, check_write_access
 #     IdentityProviderReadExtended,
 #     IdentityProviderReadExtendedPublic,
 # )
-from app.query import DbQueryCommonParams, Pagination, SchemaSize
+from app.query import DbQueryCommonParams, Pagination, SchemaSize, Streaming
+from app.response import schema_response
 from app.service.api.dependencies import (
     valid_block_storage_service_id,
     valid_compute_service_id,
@@ -70,13 +73,14 @@ from app.service.schemas_extended import (
     NetworkServiceReadExtended,
     NetworkServiceReadExtendedPublic,
 )
+from app.stream import stream_response
 
 bs_router = APIRouter(prefix="/block_storage_services", tags=["block_storage_services"])
 
 
-@db.read_transaction
 @bs_router.get(
     "/",
+    dependencies=[Depends(check_etag)],
     response_model=Union[
         List[BlockStorageServiceReadExtended],
         List[BlockStorageServiceRead],
@@ -89,25 +93,49 @@ bs_router = APIRouter(prefix="/block_storage_services", tags=["block_storage_ser
         It is possible to filter on services attributes and other \
         common query parameters.",
 )
+@cached_read
+@read_transaction
 def get_block_storage_services(
+    response: Response,
     auth: bool = Depends(check_read_access),
     comm: DbQueryCommonParams = Depends(),
     page: Pagination = Depends(),
     size: SchemaSize = Depends(),
+    stream: Streaming = Depends(),
     item: BlockStorageServiceQuery = Depends(),
 ):
+    response.headers["X-Total-Count"] = str(
+        block_storage_service.count(**item.dict(exclude_none=True))
+    )
+    if stream.stream is not None:
+        items = block_storage_service.stream_multi(
+            auth=auth,
+            short=size.short,
+            with_conn=size.with_conn,
+            **comm.dict(exclude_none=True),
+            **page.dict(exclude_none=True),
+            **item.dict(exclude_none=True),
+        )
+        return stream_response(items=items, fmt=stream.stream, response=response)
     items = block_storage_service.get_multi(
-        **comm.dict(exclude_none=True), **item.dict(exclude_none=True)
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
     )
-    items = block_storage_service.paginate(items=items, page=page.page, size=page.size)
-    return block_storage_service.choose_out_schema(
+    cursor = block_storage_service.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
+    )
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    items = block_storage_service.choose_out_schema(
         items=items, auth=auth, short=size.short, with_conn=size.with_conn
     )
+    return schema_response(content=items, response=response)
 
 
-@db.read_transaction
 @bs_router.get(
     "/{service_uid}",
+    dependencies=[Depends(check_item_etag(valid_block_storage_service_id))],
     response_model=Union[
         BlockStorageServiceReadExtended,
         BlockStorageServiceRead,
@@ -120,17 +148,19 @@ def get_block_storage_services(
         If no entity matches the given *uid*, the endpoint \
         raises a `not found` error.",
 )
+@read_transaction
 def get_block_storage_service(
+    response: Response,
     auth: bool = Depends(check_read_access),
     size: SchemaSize = Depends(),
     item: BlockStorageService = Depends(valid_block_storage_service_id),
 ):
-    return block_storage_service.choose_out_schema(
+    items = block_storage_service.choose_out_schema(
         items=[item], auth=auth, short=size.short, with_conn=size.with_conn
-    )[0]
+    )
+    return schema_response(content=items[0], response=response)
 
 
-@db.write_transaction
 @bs_router.patch(
     "/{service_uid}",
     status_code=status.HTTP_200_OK,
@@ -149,6 +179,7 @@ def get_block_storage_service(
         At first validate new service values checking there are \
         no other items with the given *endpoint*.",
 )
+@write_transaction
 def put_block_storage_service(
     update_data: BlockStorageServiceUpdate,
     response: Response,
@@ -160,7 +191,6 @@ def put_block_storage_service(
     return db_item
 
 
-@db.write_transaction
 @bs_router.delete(
     "/{service_uid}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -174,6 +204,7 @@ def put_block_storage_service(
         If the deletion procedure fails, raises a `internal \
         server` error",
 )
+@write_transaction
 def delete_block_storage_services(
     item: BlockStorageService = Depends(valid_block_storage_service_id),
 ):
@@ -187,9 +218,9 @@ def delete_block_storage_services(
 c_router = APIRouter(prefix="/compute_services", tags=["compute_services"])
 
 
-@db.read_transaction
 @c_router.get(
     "/",
+    dependencies=[Depends(check_etag)],
     response_model=Union[
         List[ComputeServiceReadExtended],
         List[ComputeServiceRead],
@@ -202,25 +233,49 @@ c_router = APIRouter(prefix="/compute_services", tags=["compute_services"])
         It is possible to filter on services attributes and other \
         common query parameters.",
 )
+@cached_read
+@read_transaction
 def get_compute_services(
+    response: Response,
     auth: bool = Depends(check_read_access),
     comm: DbQueryCommonParams = Depends(),
     page: Pagination = Depends(),
     size: SchemaSize = Depends(),
+    stream: Streaming = Depends(),
     item: ComputeServiceQuery = Depends(),
 ):
+    response.headers["X-Total-Count"] = str(
+        compute_service.count(**item.dict(exclude_none=True))
+    )
+    if stream.stream is not None:
+        items = compute_service.stream_multi(
+            auth=auth,
+            short=size.short,
+            with_conn=size.with_conn,
+            **comm.dict(exclude_none=True),
+            **page.dict(exclude_none=True),
+            **item.dict(exclude_none=True),
+        )
+        return stream_response(items=items, fmt=stream.stream, response=response)
     items = compute_service.get_multi(
-        **comm.dict(exclude_none=True), **item.dict(exclude_none=True)
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
     )
-    items = compute_service.paginate(items=items, page=page.page, size=page.size)
-    return compute_service.choose_out_schema(
+    cursor = compute_service.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
+    )
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    items = compute_service.choose_out_schema(
         items=items, auth=auth, short=size.short, with_conn=size.with_conn
     )
+    return schema_response(content=items, response=response)
 
 
-@db.read_transaction
 @c_router.get(
     "/{service_uid}",
+    dependencies=[Depends(check_item_etag(valid_compute_service_id))],
     response_model=Union[
         ComputeServiceReadExtended,
         ComputeServiceRead,
@@ -233,17 +288,19 @@ def get_compute_services(
         If no entity matches the given *uid*, the endpoint \
         raises a `not found` error.",
 )
+@read_transaction
 def get_compute_service(
+    response: Response,
     auth: bool = Depends(check_read_access),
     size: SchemaSize = Depends(),
     item: ComputeService = Depends(valid_compute_service_id),
 ):
-    return compute_service.choose_out_schema(
+    items = compute_service.choose_out_schema(
         items=[item], auth=auth, short=size.short, with_conn=size.with_conn
-    )[0]
+    )
+    return schema_response(content=items[0], response=response)
 
 
-@db.write_transaction
 @c_router.patch(
     "/{service_uid}",
     status_code=status.HTTP_200_OK,
@@ -262,6 +319,7 @@ def get_compute_service(
         At first validate new service values checking there are \
         no other items with the given *endpoint*.",
 )
+@write_transaction
 def put_compute_service(
     update_data: ComputeServiceUpdate,
     response: Response,
@@ -273,7 +331,6 @@ def put_compute_service(
     return db_item
 
 
-@db.write_transaction
 @c_router.delete(
     "/{service_uid}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -287,6 +344,7 @@ def put_compute_service(
         If the deletion procedure fails, raises a `internal \
         server` error",
 )
+@write_transaction
 def delete_compute_services(item: ComputeService = Depends(valid_compute_service_id)):
     if not compute_service.remove(db_obj=item):
         raise HTTPException(
@@ -298,9 +356,9 @@ def delete_compute_services(item: ComputeService = Depends(valid_compute_service
 i_router = APIRouter(prefix="/identity_services", tags=["identity_services"])
 
 
-@db.read_transaction
 @i_router.get(
     "/",
+    dependencies=[Depends(check_etag)],
     response_model=Union[
         List[IdentityServiceReadExtended],
         List[IdentityServiceRead],
@@ -313,25 +371,49 @@ i_router = APIRouter(prefix="/identity_services", tags=["identity_services"])
         It is possible to filter on services attributes and other \
         common query parameters.",
 )
+@cached_read
+@read_transaction
 def get_identity_services(
+    response: Response,
     auth: bool = Depends(check_read_access),
     comm: DbQueryCommonParams = Depends(),
     page: Pagination = Depends(),
     size: SchemaSize = Depends(),
+    stream: Streaming = Depends(),
     item: IdentityServiceQuery = Depends(),
 ):
+    response.headers["X-Total-Count"] = str(
+        identity_service.count(**item.dict(exclude_none=True))
+    )
+    if stream.stream is not None:
+        items = identity_service.stream_multi(
+            auth=auth,
+            short=size.short,
+            with_conn=size.with_conn,
+            **comm.dict(exclude_none=True),
+            **page.dict(exclude_none=True),
+            **item.dict(exclude_none=True),
+        )
+        return stream_response(items=items, fmt=stream.stream, response=response)
     items = identity_service.get_multi(
-        **comm.dict(exclude_none=True), **item.dict(exclude_none=True)
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
     )
-    items = identity_service.paginate(items=items, page=page.page, size=page.size)
-    return identity_service.choose_out_schema(
+    cursor = identity_service.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
+    )
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    items = identity_service.choose_out_schema(
         items=items, auth=auth, short=size.short, with_conn=size.with_conn
     )
+    return schema_response(content=items, response=response)
 
 
-@db.read_transaction
 @i_router.get(
     "/{service_uid}",
+    dependencies=[Depends(check_item_etag(valid_identity_service_id))],
     response_model=Union[
         IdentityServiceReadExtended,
         IdentityServiceRead,
@@ -344,17 +426,19 @@ def get_identity_services(
         If no entity matches the given *uid*, the endpoint \
         raises a `not found` error.",
 )
+@read_transaction
 def get_identity_sservice(
+    response: Response,
     auth: bool = Depends(check_read_access),
     size: SchemaSize = Depends(),
     item: IdentityService = Depends(valid_identity_service_id),
 ):
-    return identity_service.choose_out_schema(
+    items = identity_service.choose_out_schema(
         items=[item], auth=auth, short=size.short, with_conn=size.with_conn
-    )[0]
+    )
+    return schema_response(content=items[0], response=response)
 
 
-@db.write_transaction
 @i_router.patch(
     "/{service_uid}",
     status_code=status.HTTP_200_OK,
@@ -373,6 +457,7 @@ def get_identity_sservice(
         At first validate new service values checking there are \
         no other items with the given *endpoint*.",
 )
+@write_transaction
 def put_identity_sservice(
     update_data: IdentityServiceUpdate,
     response: Response,
@@ -384,7 +469,6 @@ def put_identity_sservice(
     return db_item
 
 
-@db.write_transaction
 @i_router.delete(
     "/{service_uid}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -398,6 +482,7 @@ def put_identity_sservice(
         If the deletion procedure fails, raises a `internal \
         server` error",
 )
+@write_transaction
 def delete_identity_sservices(
     item: IdentityService = Depends(valid_identity_service_id),
 ):
@@ -411,9 +496,9 @@ def delete_identity_sservices(
 n_router = APIRouter(prefix="/network_services", tags=["network_services"])
 
 
-@db.read_transaction
 @n_router.get(
     "/",
+    dependencies=[Depends(check_etag)],
     response_model=Union[
         List[NetworkServiceReadExtended],
         List[NetworkServiceRead],
@@ -426,25 +511,49 @@ n_router = APIRouter(prefix="/network_services", tags=["network_services"])
         It is possible to filter on services attributes and other \
         common query parameters.",
 )
+@cached_read
+@read_transaction
 def get_network_services(
+    response: Response,
     auth: bool = Depends(check_read_access),
     comm: DbQueryCommonParams = Depends(),
     page: Pagination = Depends(),
     size: SchemaSize = Depends(),
+    stream: Streaming = Depends(),
     item: NetworkServiceQuery = Depends(),
 ):
+    response.headers["X-Total-Count"] = str(
+        network_service.count(**item.dict(exclude_none=True))
+    )
+    if stream.stream is not None:
+        items = network_service.stream_multi(
+            auth=auth,
+            short=size.short,
+            with_conn=size.with_conn,
+            **comm.dict(exclude_none=True),
+            **page.dict(exclude_none=True),
+            **item.dict(exclude_none=True),
+        )
+        return stream_response(items=items, fmt=stream.stream, response=response)
     items = network_service.get_multi(
-        **comm.dict(exclude_none=True), **item.dict(exclude_none=True)
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
     )
-    items = network_service.paginate(items=items, page=page.page, size=page.size)
-    return network_service.choose_out_schema(
+    cursor = network_service.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
+    )
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    items = network_service.choose_out_schema(
         items=items, auth=auth, short=size.short, with_conn=size.with_conn
     )
+    return schema_response(content=items, response=response)
 
 
-@db.read_transaction
 @n_router.get(
     "/{service_uid}",
+    dependencies=[Depends(check_item_etag(valid_network_service_id))],
     response_model=Union[
         NetworkServiceReadExtended,
         NetworkServiceRead,
@@ -457,17 +566,19 @@ def get_network_services(
         If no entity matches the given *uid*, the endpoint \
         raises a `not found` error.",
 )
+@read_transaction
 def get_network_service(
+    response: Response,
     auth: bool = Depends(check_read_access),
     size: SchemaSize = Depends(),
     item: NetworkService = Depends(valid_network_service_id),
 ):
-    return network_service.choose_out_schema(
+    items = network_service.choose_out_schema(
         items=[item], auth=auth, short=size.short, with_conn=size.with_conn
-    )[0]
+    )
+    return schema_response(content=items[0], response=response)
 
 
-@db.write_transaction
 @n_router.patch(
     "/{service_uid}",
     status_code=status.HTTP_200_OK,
@@ -486,6 +597,7 @@ def get_network_service(
         At first validate new service values checking there are \
         no other items with the given *endpoint*.",
 )
+@write_transaction
 def put_network_service(
     update_data: NetworkServiceUpdate,
     response: Response,
@@ -497,7 +609,6 @@ def put_network_service(
     return db_item
 
 
-@db.write_transaction
 @n_router.delete(
     "/{service_uid}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -511,6 +622,7 @@ def put_network_service(
         If the deletion procedure fails, raises a `internal \
         server` error",
 )
+@write_transaction
 def delete_network_services(item: NetworkService = Depends(valid_network_service_id)):
     if not network_service.remove(db_obj=item):
         raise HTTPException(
@@ -33,6 +33,11 @@ class Service(StructuredNode):
     name = StringProperty(required=True)
 
     region = RelationshipFrom("..region.models.Region", "SUPPLY", cardinality=One)
+    user_groups = RelationshipFrom(
+        "..user_group.models.UserGroup",
+        "CAN_ACCESS",
+        cardinality=ZeroOrMore,
+    )
 
 
 class BlockStorageService(Service):
@@ -3,13 +3,16 @@ from typing import List, Optional, Union
 # from app.user_group.api.dependencies import valid_user_group_id
 # from app.user_group.models import UserGroup
 from fastapi import APIRouter, Depends, HTTPException, Response, status
-from neomodel import db
 
 from app.auth.dependencies import check_read_access, check_write_access
+from app.cache import cached_read
+from app.db import read_transaction, write_transaction
+from app.etag import check_etag, check_item_etag
 
 # from app.project.api.dependencies import project_has_no_sla
 # from app.project.models import Project
-from app.query import DbQueryCommonParams, Pagination, SchemaSize
+from app.query import DbQueryCommonParams, Pagination, SchemaSize, Streaming
+from app.response import schema_response
 from app.sla.api.dependencies import (  # is_unique_sla,
     valid_sla_id,
     validate_new_sla_values,
@@ -24,13 +27,14 @@ from app.sla.schemas import (
     SLAUpdate,
 )
 from app.sla.schemas_extended import SLAReadExtended, SLAReadExtendedPublic
+from app.stream import stream_response
 
 router = APIRouter(prefix="/slas", tags=["slas"])
 
 
-@db.read_transaction
 @router.get(
     "/",
+    dependencies=[Depends(check_etag)],
     response_model=Union[
         List[SLAReadExtended],
         List[SLARead],
@@ -43,20 +47,42 @@ router = APIRouter(prefix="/slas", tags=["slas"])
         It is possible to filter on SLAs attributes and other \
         common query parameters.",
 )
+@cached_read
+@read_transaction
 def get_slas(
+    response: Response,
     auth: bool = Depends(check_read_access),
     comm: DbQueryCommonParams = Depends(),
     page: Pagination = Depends(),
     size: SchemaSize = Depends(),
+    stream: Streaming = Depends(),
     item: SLAQuery = Depends(),
 ):
+    response.headers["X-Total-Count"] = str(sla.count(**item.dict(exclude_none=True)))
+    if stream.stream is not None:
+        items = sla.stream_multi(
+            auth=auth,
+            short=size.short,
+            with_conn=size.with_conn,
+            **comm.dict(exclude_none=True),
+            **page.dict(exclude_none=True),
+            **item.dict(exclude_none=True),
+        )
+        return stream_response(items=items, fmt=stream.stream, response=response)
     items = sla.get_multi(
-        **comm.dict(exclude_none=True), **item.dict(exclude_none=True)
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
+    )
+    cursor = sla.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
     )
-    items = sla.paginate(items=items, page=page.page, size=page.size)
-    return sla.choose_out_schema(
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    items = sla.choose_out_schema(
         items=items, auth=auth, short=size.short, with_conn=size.with_conn
     )
+    return schema_response(content=items, response=response)
 
 
 # @db.write_transaction
@@ -100,9 +126,9 @@ def get_slas(
 #     return sla.create(obj_in=item, project=project, user_group=user_group, force=True)
 
 
-@db.read_transaction
 @router.get(
     "/{sla_uid}",
+    dependencies=[Depends(check_item_etag(valid_sla_id))],
     response_model=Union[
         SLAReadExtended,
         SLARead,
@@ -115,17 +141,19 @@ def get_slas(
         If no entity matches the given *uid*, the endpoint \
         raises a `not found` error.",
 )
+@read_transaction
 def get_sla(
+    response: Response,
     auth: bool = Depends(check_read_access),
     size: SchemaSize = Depends(),
     item: SLA = Depends(valid_sla_id),
 ):
-    return sla.choose_out_schema(
+    items = sla.choose_out_schema(
         items=[item], auth=auth, short=size.short, with_conn=size.with_conn
-    )[0]
+    )
+    return schema_response(content=items[0], response=response)
 
 
-@db.write_transaction
 @router.patch(
     "/{sla_uid}",
     status_code=status.HTTP_200_OK,
@@ -144,6 +172,7 @@ def get_sla(
         At first validate new SLA values checking there are \
         no other items with the given *endpoint*.",
 )
+@write_transaction
 def put_sla(
     update_data: SLAUpdate,
     response: Response,
@@ -155,7 +184,6 @@ def put_sla(
     return db_item
 
 
-@db.write_transaction
 @router.delete(
     "/{sla_uid}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -168,6 +196,7 @@ def put_sla(
         If the deletion procedure fails, raises a `internal \
         server` error",
 )
+@write_transaction
 def delete_slas(item: SLA = Depends(valid_sla_id)):
     if not sla.remove(db_obj=item):
         raise HTTPException(
@@ -32,7 +32,7 @@ class SLA(StructuredNode):
     description = StringProperty(default="")
     start_date = DateProperty(required=True)
     end_date = DateProperty(required=True)
-    doc_uuid = StringProperty(required=True)
+    doc_uuid = StringProperty(required=True, index=True)
 
     user_group = RelationshipFrom(
         "..user_group.models.UserGroup", "AGREE", cardinality=One
@@ -0,0 +1,50 @@
+from typing import Iterator
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.query import StreamFormat
+from app.response import encode, forwarded_headers
+
+MEDIA_TYPES = {
+    StreamFormat.JSON: "application/json",
+    StreamFormat.NDJSON: "application/x-ndjson",
+}
+
+
+def _json_array(items: Iterator[BaseModel]) -> Iterator[bytes]:
+    """Yield the items serialized as the elements of a JSON array."""
+    yield b"["
+    sep = b""
+    for item in items:
+        yield sep + encode(item)
+        sep = b","
+    yield b"]"
+
+
+def _ndjson(items: Iterator[BaseModel]) -> Iterator[bytes]:
+    """Yield the items serialized as newline delimited JSON."""
+    for item in items:
+        yield encode(item) + b"\n"
+
+
+def stream_response(
+    *, items: Iterator[BaseModel], fmt: StreamFormat, response: Response
+) -> StreamingResponse:
+    """Return a response sending the items while they are serialized.
+
+    Args:
+    ----
+        items (Iterator[BaseModel]): Items to send, already in their output schema.
+        fmt (StreamFormat): Output format.
+        response (Response): Endpoint response holding the headers to forward.
+
+    Returns:
+    -------
+        StreamingResponse.
+    """
+    content = _ndjson(items) if fmt == StreamFormat.NDJSON else _json_array(items)
+    return StreamingResponse(
+        content, media_type=MEDIA_TYPES[fmt], headers=forwarded_headers(response)
+    )
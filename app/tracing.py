@@ -0,0 +1,130 @@
+import json
+import logging
+import os
+import re
+from collections import deque
+from dataclasses import asdict, dataclass
+from random import random
+from threading import Lock
+from typing import Any, Deque, Dict, List, Optional
+from uuid import uuid4
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Maximum length of the statement texts stored in traces and logs.
+MAX_STATEMENT_LENGTH = 2000
+
+WHITESPACES = re.compile(r"\s+")
+
+
+@dataclass
+class QueryTrace:
+    """A Cypher statement run while serving a request.
+
+    Parameter values are not stored, only their types.
+    """
+
+    statement: str
+    params: Dict[str, str]
+    rows: Optional[int]
+    duration: float
+
+
+class TraceStore:
+    """Thread-safe buffer of the most recent request traces.
+
+    Attributes:
+    ----------
+        maxsize (int): Maximum number of traces. Older ones are dropped.
+    """
+
+    def __init__(self, *, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.__traces: Deque[Dict[str, Any]] = deque(maxlen=maxsize)
+        self.__lock = Lock()
+
+    def add(self, trace: Dict[str, Any]) -> None:
+        """Store a trace, dropping the oldest one if full."""
+        with self.__lock:
+            self.__traces.append(trace)
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        """Return the trace with the given id, or None if missing or dropped."""
+        with self.__lock:
+            return next((t for t in self.__traces if t["id"] == trace_id), None)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Return the stored traces, from the most recent one."""
+        with self.__lock:
+            return list(reversed(self.__traces))
+
+
+trace_store = TraceStore(maxsize=get_settings().QUERY_TRACE_SIZE)
+
+
+def new_trace_id() -> Optional[str]:
+    """Return the id of a new trace if the request is sampled, None otherwise.
+
+    Traces are stored by the worker process serving the request: the id starts
+    with its pid, see `trace_worker`.
+    """
+    rate = get_settings().QUERY_TRACE_SAMPLE_RATE
+    if rate > 0 and random() < rate:
+        return f"{os.getpid()}-{uuid4().hex}"
+    return None
+
+
+def trace_worker(trace_id: str) -> Optional[int]:
+    """Return the pid of the worker process storing the given trace, if valid."""
+    pid, _, _ = trace_id.partition("-")
+    return int(pid) if pid.isdigit() else None
+
+
+def params_shape(params: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Return the type of each query parameter, with the length of lists."""
+    shape = {}
+    for k, v in (params or {}).items():
+        shape[k] = type(v).__name__
+        if isinstance(v, (list, tuple, set, dict)):
+            shape[k] += f"[{len(v)}]"
+    return shape
+
+
+def trace_query(
+    queries: Optional[List[QueryTrace]],
+    *,
+    statement: str,
+    params: Optional[Dict[str, Any]],
+    rows: Optional[int],
+    duration: float,
+    path: Optional[str] = None,
+) -> None:
+    """Record a statement in the trace of the request and log it if slow.
+
+    Args:
+    ----
+        queries (list | None): Statements traced so far. None when the request is
+            not traced.
+        statement (str): Cypher statement.
+        params (dict | None): Query parameters.
+        rows (int | None): Number of returned rows. None when the query failed.
+        duration (float): Seconds spent running the statement.
+        path (str | None): Path of the request issuing the statement.
+    """
+    threshold = get_settings().SLOW_QUERY_THRESHOLD
+    slow = threshold > 0 and duration >= threshold
+    if queries is None and not slow:
+        return
+    trace = QueryTrace(
+        statement=WHITESPACES.sub(" ", statement).strip()[:MAX_STATEMENT_LENGTH],
+        params=params_shape(params),
+        rows=rows,
+        duration=duration,
+    )
+    if queries is not None:
+        queries.append(trace)
+    if slow:
+        record = {"event": "slow_query", "path": path, **asdict(trace)}
+        logger.warning(json.dumps(record))
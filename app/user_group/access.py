@@ -0,0 +1,129 @@
+from typing import Any, Collection, Iterable, Optional, Set, Type
+
+from neomodel import StructuredNode, db
+
+ACCESS_RELATIONSHIP = "CAN_ACCESS"
+
+# Paths from the projects a user group has an SLA on to the resources it can use,
+# grouped by the label of the reached resources.
+ACCESS_PATHS = {
+    "Flavor": "(p)-[:CAN_USE_VM_FLAVOR]->(u:Flavor)",
+    "Image": "(p)-[:CAN_USE_VM_IMAGE]->(u:Image)",
+    "Provider": "(p)<-[:BOOK_PROJECT_FOR_SLA]-(u:Provider)",
+    "Service": "(p)-[:USE_SERVICE_WITH]->(:Quota)-[:APPLY_TO]->(u:Service)",
+}
+
+SLA_PROJECT = "(g:UserGroup)-[:AGREE]->(:SLA)-[:REFER_TO]->(:Project)"
+CAN_ACCESS = f"(g:UserGroup)-[:{ACCESS_RELATIONSHIP}]->(n)"
+
+# Paths from the user groups to the nodes whose changes may alter their access
+# relationships, grouped by the label of those nodes.
+GROUP_PATHS = {
+    "UserGroup": ["(g:UserGroup) WHERE g = n"],
+    "SLA": ["(g:UserGroup)-[:AGREE]->(n)"],
+    "Project": ["(g:UserGroup)-[:AGREE]->(:SLA)-[:REFER_TO]->(n)"],
+    "Quota": [f"{SLA_PROJECT}-[:USE_SERVICE_WITH]->(n)"],
+    "Flavor": [f"{SLA_PROJECT}-[:CAN_USE_VM_FLAVOR]->(n)", CAN_ACCESS],
+    "Image": [f"{SLA_PROJECT}-[:CAN_USE_VM_IMAGE]->(n)", CAN_ACCESS],
+    "Provider": [f"{SLA_PROJECT}<-[:BOOK_PROJECT_FOR_SLA]-(n)", CAN_ACCESS],
+    "Service": [
+        f"{SLA_PROJECT}-[:USE_SERVICE_WITH]->(:Quota)-[:APPLY_TO]->(n)",
+        CAN_ACCESS,
+    ],
+}
+
+
+def access_label(model: Type[StructuredNode]) -> Optional[str]:
+    """Return the label of the model whose changes may alter the access index, or
+    None if its changes never do.
+    """
+    return next((i for i in model.inherited_labels() if i in GROUP_PATHS), None)
+
+
+def affected_groups(
+    model: Type[StructuredNode], key: str, values: Iterable[Any]
+) -> Set[str]:
+    """Return the uids of the user groups whose access relationships may depend on
+    the given nodes.
+
+    They are the user groups reaching the nodes through their SLAs, plus, for the
+    resources, the ones already linked to them. Call it before deleting or
+    disconnecting nodes, and after creating or connecting them.
+
+    Args:
+    ----
+        model (type): Class of the nodes.
+        key (str): Property identifying the nodes.
+        values (iterable): Values of that property.
+
+    Returns:
+    -------
+        set. User group uids.
+    """
+    label, values = access_label(model), list(values)
+    if label is None or len(values) == 0:
+        return set()
+    paths = " UNION ".join(
+        f"WITH n MATCH {path} RETURN g" for path in GROUP_PATHS[label]
+    )
+    query = f"""
+        MATCH (n:{label}) WHERE n.{key} IN $values
+        CALL {{ {paths} }}
+        RETURN collect(DISTINCT g.uid)
+    """
+    results, _ = db.cypher_query(query, {"values": values})
+    return set(results[0][0])
+
+
+def _refresh_query(label: str, *, limited: bool) -> str:
+    """Return the query aligning the access relationships towards the given label.
+
+    For each user group, or for the ones in the `groups` parameter when limited,
+    compute the reachable resources through its SLAs and projects. Then delete the
+    relationships towards resources no more reachable and create the missing ones.
+    Unchanged relationships are not written.
+    """
+    where = "WHERE g.uid IN $groups" if limited else ""
+    return f"""
+        MATCH (g:UserGroup) {where}
+        CALL {{
+            WITH g
+            OPTIONAL MATCH
+                (g)-[:AGREE]->(:SLA)-[:REFER_TO]->(p:Project),
+                {ACCESS_PATHS[label]}
+            RETURN collect(DISTINCT u) AS targets
+        }}
+        CALL {{
+            WITH g, targets
+            MATCH (g)-[r:{ACCESS_RELATIONSHIP}]->(u:{label})
+            WHERE NOT u IN targets
+            DELETE r
+        }}
+        CALL {{
+            WITH g, targets
+            UNWIND targets AS u
+            MERGE (g)-[:{ACCESS_RELATIONSHIP}]->(u)
+        }}
+    """
+
+
+def refresh_access(groups: Optional[Collection[str]] = None) -> None:
+    """Bring the user groups access index up to date.
+
+    The index is made of relationships linking each user group to the flavors,
+    images, providers and services it can use, so that these questions are answered
+    with a single hop instead of walking SLAs, projects and quotas.
+
+    Run it in the same transaction of the changes, so readers never see a stale
+    index. Only the relationships whose presence changed are written.
+
+    Args:
+    ----
+        groups (collection | None): uids of the user groups to refresh, see
+            `affected_groups`. None rebuilds the index of all the user groups.
+    """
+    if groups is not None and len(groups) == 0:
+        return
+    params = {"groups": list(groups or [])}
+    for label in ACCESS_PATHS.keys():
+        db.cypher_query(_refresh_query(label, limited=groups is not None), params)
@@ -1,46 +1,56 @@
 from typing import List, Optional, Union
 
 from fastapi import APIRouter, Depends, HTTPException, Response, status
-from neomodel import db
 
 from app.auth.dependencies import check_read_access, check_write_access
+from app.cache import cached_read
+from app.db import read_transaction, write_transaction
+from app.etag import check_etag, check_item_etag
+from app.flavor.crud import flavor
+from app.flavor.schemas import (
+    FlavorQuery,
+    FlavorRead,
+    FlavorReadPublic,
+    FlavorReadShort,
+)
+from app.flavor.schemas_extended import FlavorReadExtended, FlavorReadExtendedPublic
+from app.image.crud import image
+from app.image.schemas import ImageQuery, ImageRead, ImageReadPublic, ImageReadShort
+from app.image.schemas_extended import ImageReadExtended, ImageReadExtendedPublic
+from app.provider.crud import provider
 from app.provider.enum import ProviderType
-from app.provider.schemas import ProviderQuery
-
-# from app.flavor.crud import flavor
-# from app.flavor.schemas import FlavorRead, FlavorReadPublic, FlavorReadShort
-# from app.flavor.schemas_extended import FlavorReadExtended, FlavorReadExtendedPublic
-# from app.identity_provider.schemas_extended import (
-#     ProviderReadExtended,
-#     ProviderReadExtendedPublic,
-# )
-# from app.image.crud import image
-# from app.image.schemas import ImageRead, ImageReadPublic, ImageReadShort
-# from app.image.schemas_extended import ImageReadExtended, ImageReadExtendedPublic
-# from app.provider.crud import provider
-# from app.provider.schemas import ProviderRead, ProviderReadPublic, ProviderReadShort
+from app.provider.schemas import (
+    ProviderQuery,
+    ProviderRead,
+    ProviderReadPublic,
+    ProviderReadShort,
+)
+from app.provider.schemas_extended import (
+    ProviderReadExtended,
+    ProviderReadExtendedPublic,
+)
 from app.query import DbQueryCommonParams, Pagination, SchemaSize
-from app.region.schemas import RegionQuery
-
-# from app.service.schemas import (
-#     BlockStorageServiceRead,
-#     BlockStorageServiceReadPublic,
-#     BlockStorageServiceReadShort,
-#     ComputeServiceRead,
-#     ComputeServiceReadPublic,
-#     ComputeServiceReadShort,
-#     IdentityServiceRead,
-#     IdentityServiceReadPublic,
-#     IdentityServiceReadShort,
-# )
-# from app.service.schemas_extended import (
-#     BlockStorageServiceReadExtended,
-#     BlockStorageServiceReadExtendedPublic,
-#     ComputeServiceReadExtended,
-#     ComputeServiceReadExtendedPublic,
-#     IdentityServiceReadExtended,
-#     IdentityServiceReadExtendedPublic,
-# )
+from app.response import schema_response
+from app.service.crud import block_storage_service, compute_service, network_service
+from app.service.schemas import (
+    BlockStorageServiceRead,
+    BlockStorageServiceReadPublic,
+    BlockStorageServiceReadShort,
+    ComputeServiceRead,
+    ComputeServiceReadPublic,
+    ComputeServiceReadShort,
+    NetworkServiceRead,
+    NetworkServiceReadPublic,
+    NetworkServiceReadShort,
+)
+from app.service.schemas_extended import (
+    BlockStorageServiceReadExtended,
+    BlockStorageServiceReadExtendedPublic,
+    ComputeServiceReadExtended,
+    ComputeServiceReadExtendedPublic,
+    NetworkServiceReadExtended,
+    NetworkServiceReadExtendedPublic,
+)
 from app.user_group.api.dependencies import (
     valid_user_group_id,
     validate_new_user_group_values,
@@ -62,9 +72,9 @@ from app.user_group.schemas_extended import (
 router = APIRouter(prefix="/user_groups", tags=["user_groups"])
 
 
-@db.read_transaction
 @router.get(
     "/",
+    dependencies=[Depends(check_etag)],
     response_model=Union[
         List[UserGroupReadExtended],
         List[UserGroupRead],
@@ -75,9 +85,16 @@ router = APIRouter(prefix="/user_groups", tags=["user_groups"])
     summary="Read all user groups",
     description="Retrieve all user groups stored in the database. \
         It is possible to filter on user groups attributes and other \
-        common query parameters.",
+        common query parameters. It is also possible to filter on the \
+        endpoint of the identity provider and on the name and type of the \
+        providers and on the name of the regions where the user groups \
+        have projects. Provider and region filters must be satisfied by \
+        the same project.",
 )
+@cached_read
+@read_transaction
 def get_user_groups(
+    response: Response,
     auth: bool = Depends(check_read_access),
     comm: DbQueryCommonParams = Depends(),
     page: Pagination = Depends(),
@@ -88,81 +105,38 @@ def get_user_groups(
     provider_type: Optional[ProviderType] = None,
     region_name: Optional[str] = None,
 ):
+    related = {
+        "identity_provider__endpoint": idp_endpoint,
+        "slas__projects__provider__name": provider_name,
+        "slas__projects__provider__type": provider_type.value
+        if provider_type
+        else None,
+        "slas__projects__quotas__service__region__name": region_name,
+    }
+    related = {k: v for k, v in related.items() if v is not None}
     items = user_group.get_multi(
-        **comm.dict(exclude_none=True), **item.dict(exclude_none=True)
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
+        **related,
     )
-    if idp_endpoint:
-        items = filter(
-            lambda x: x.identity_provider.single().endpoint == idp_endpoint, items
-        )
-
-    if provider_type:
-        provider_type = provider_type.value
-    provider_query = ProviderQuery(name=provider_name, type=provider_type)
-    items = filter_on_provider_attr(items=items, provider_query=provider_query)
-
-    region_query = RegionQuery(name=region_name)
-    items = filter_on_region_attr(items=items, region_query=region_query)
-
-    items = user_group.paginate(items=items, page=page.page, size=page.size)
-    return user_group.choose_out_schema(
+    cursor = user_group.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
+    )
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    response.headers["X-Total-Count"] = str(
+        user_group.count(**item.dict(exclude_none=True), **related)
+    )
+    items = user_group.choose_out_schema(
         items=items, auth=auth, short=size.short, with_conn=size.with_conn
     )
+    return schema_response(content=items, response=response)
 
 
-def filter_on_provider_attr(
-    items: List[UserGroup], provider_query: ProviderQuery
-) -> List[UserGroup]:
-    """
-    Filter projects based on provider access.
-    """
-    attrs = provider_query.dict(exclude_none=True)
-    if not attrs:
-        return items
-
-    for item in items:
-        for sla in item.slas:
-            for project in sla.projects:
-                if not project.provider.get_or_none(**attrs):
-                    sla.projects = sla.projects.exclude(uid=project.uid)
-            if len(sla.projects) == 0:
-                item.slas = item.slas.exclude(uid=sla.uid)
-        if len(item.slas) == 0:
-            items.remove(item)
-
-    return items
-
-
-def filter_on_region_attr(
-    items: List[UserGroup], region_query: RegionQuery
-) -> List[UserGroup]:
-    """
-    Filter projects based on region access.
-    """
-    attrs = region_query.dict(exclude_none=True)
-    if not attrs:
-        return items
-
-    for item in items:
-        for sla in item.slas:
-            for project in sla.projects:
-                for quota in project.quotas:
-                    service = quota.service.single()
-                    if not service.region.get_or_none(**attrs):
-                        project.quotas = project.quotas.exclude(uid=quota.uid)
-                if len(project.quotas) == 0:
-                    sla.projects = sla.projects.exclude(uid=project.uid)
-            if len(sla.projects) == 0:
-                item.slas = item.slas.exclude(uid=sla.uid)
-        if len(item.slas) == 0:
-            items.remove(item)
-
-    return items
-
-
-@db.read_transaction
 @router.get(
     "/{user_group_uid}",
+    dependencies=[Depends(check_item_etag(valid_user_group_id))],
     response_model=Union[
         UserGroupReadExtended,
         UserGroupRead,
@@ -175,17 +149,19 @@ def filter_on_region_attr(
         If no entity matches the given *uid*, the endpoint \
         raises a `not found` error.",
 )
+@read_transaction
 def get_user_group(
+    response: Response,
     auth: bool = Depends(check_read_access),
     size: SchemaSize = Depends(),
     item: UserGroup = Depends(valid_user_group_id),
 ):
-    return user_group.choose_out_schema(
+    items = user_group.choose_out_schema(
         items=[item], auth=auth, short=size.short, with_conn=size.with_conn
-    )[0]
+    )
+    return schema_response(content=items[0], response=response)
 
 
-@db.write_transaction
 @router.patch(
     "/{user_group_uid}",
     status_code=status.HTTP_200_OK,
@@ -205,6 +181,7 @@ def get_user_group(
         no other items, belonging to same identity provider, \
         with the given *name*.",
 )
+@write_transaction
 def put_user_group(
     update_data: UserGroupUpdate,
     response: Response,
@@ -216,7 +193,6 @@ def put_user_group(
     return db_item
 
 
-@db.write_transaction
 @router.delete(
     "/{user_group_uid}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -228,6 +204,7 @@ def put_user_group(
         raises a `not found` error. \
         On cascade, delete related SLAs.",
 )
+@write_transaction
 def delete_user_group(item: UserGroup = Depends(valid_user_group_id)):
     if not user_group.remove(db_obj=item):
         raise HTTPException(
@@ -236,131 +213,210 @@ def delete_user_group(item: UserGroup = Depends(valid_user_group_id)):
         )
 
 
-# @db.read_transaction
-# @router.get(
-#     "/{user_group_uid}/flavors",
-#     response_model=Union[
-#         List[FlavorReadExtended],
-#         List[FlavorRead],
-#         List[FlavorReadShort],
-#         List[FlavorReadExtendedPublic],
-#         List[FlavorReadPublic],
-#     ],
-#     summary="Read user group accessible flavors",
-#     description="Retrieve all the flavors the user group \
-#         has access to thanks to its SLA. \
-#         If no entity matches the given *uid*, the endpoint \
-#         raises a `not found` error.",
-# )
-# def get_user_group_flavors(
-#     auth: bool = Depends(check_read_access),
-#     size: SchemaSize = Depends(),
-#     item: UserGroup = Depends(valid_user_group_id),
-# ):
-#     return flavor.choose_out_schema(
-#         items=item.flavors(), auth=auth, short=size.short, with_conn=size.with_conn
-#     )
+@router.get(
+    "/{user_group_uid}/flavors",
+    dependencies=[Depends(check_item_etag(valid_user_group_id))],
+    response_model=Union[
+        List[FlavorReadExtended],
+        List[FlavorRead],
+        List[FlavorReadShort],
+        List[FlavorReadExtendedPublic],
+        List[FlavorReadPublic],
+    ],
+    summary="Read user group accessible flavors",
+    description="Retrieve all the flavors the user group \
+        has access to thanks to its SLA. \
+        It is possible to filter on flavors attributes and other \
+        common query parameters. \
+        If no entity matches the given *uid*, the endpoint \
+        raises a `not found` error.",
+)
+@cached_read
+@read_transaction
+def get_user_group_flavors(
+    response: Response,
+    auth: bool = Depends(check_read_access),
+    comm: DbQueryCommonParams = Depends(),
+    page: Pagination = Depends(),
+    size: SchemaSize = Depends(),
+    item: FlavorQuery = Depends(),
+    db_user_group: UserGroup = Depends(valid_user_group_id),
+):
+    items = flavor.get_multi(
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
+        user_groups__uid=db_user_group.uid,
+    )
+    cursor = flavor.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
+    )
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    response.headers["X-Total-Count"] = str(
+        flavor.count(**item.dict(exclude_none=True), user_groups__uid=db_user_group.uid)
+    )
+    items = flavor.choose_out_schema(
+        items=items, auth=auth, short=size.short, with_conn=size.with_conn
+    )
+    return schema_response(content=items, response=response)
 
 
-# @db.read_transaction
-# @router.get(
-#     "/{user_group_uid}/images",
-#     response_model=Union[
-#         List[ImageReadExtended],
-#         List[ImageRead],
-#         List[ImageReadShort],
-#         List[ImageReadExtendedPublic],
-#         List[ImageReadPublic],
-#     ],
-#     summary="Read user group accessible images",
-#     description="Retrieve all the images the user group \
-#         has access to thanks to its SLA. \
-#         If no entity matches the given *uid*, the endpoint \
-#         raises a `not found` error.",
-# )
-# def get_user_group_images(
-#     auth: bool = Depends(check_read_access),
-#     size: SchemaSize = Depends(),
-#     item: UserGroup = Depends(valid_user_group_id),
-# ):
-#     return image.choose_out_schema(
-#         items=item.images(), auth=auth, short=size.short, with_conn=size.with_conn
-#     )
+@router.get(
+    "/{user_group_uid}/images",
+    dependencies=[Depends(check_item_etag(valid_user_group_id))],
+    response_model=Union[
+        List[ImageReadExtended],
+        List[ImageRead],
+        List[ImageReadShort],
+        List[ImageReadExtendedPublic],
+        List[ImageReadPublic],
+    ],
+    summary="Read user group accessible images",
+    description="Retrieve all the images the user group \
+        has access to thanks to its SLA. \
+        It is possible to filter on images attributes and other \
+        common query parameters. \
+        If no entity matches the given *uid*, the endpoint \
+        raises a `not found` error.",
+)
+@cached_read
+@read_transaction
+def get_user_group_images(
+    response: Response,
+    auth: bool = Depends(check_read_access),
+    comm: DbQueryCommonParams = Depends(),
+    page: Pagination = Depends(),
+    size: SchemaSize = Depends(),
+    item: ImageQuery = Depends(),
+    db_user_group: UserGroup = Depends(valid_user_group_id),
+):
+    items = image.get_multi(
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
+        user_groups__uid=db_user_group.uid,
+    )
+    cursor = image.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
+    )
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    response.headers["X-Total-Count"] = str(
+        image.count(**item.dict(exclude_none=True), user_groups__uid=db_user_group.uid)
+    )
+    items = image.choose_out_schema(
+        items=items, auth=auth, short=size.short, with_conn=size.with_conn
+    )
+    return schema_response(content=items, response=response)
 
 
-# @db.read_transaction
-# @router.get(
-#     "/{user_group_uid}/providers",
-#     response_model=Union[
-#         List[ProviderReadExtended],
-#         List[ProviderRead],
-#         List[ProviderReadShort],
-#         List[ProviderReadExtendedPublic],
-#         List[ProviderReadPublic],
-#     ],
-#     summary="Read user group accessible providers",
-#     description="Retrieve all the providers the user group \
-#         has access to thanks to its SLA. \
-#         If no entity matches the given *uid*, the endpoint \
-#         raises a `not found` error.",
-# )
-# def get_user_group_providers(
-#     auth: bool = Depends(check_read_access),
-#     size: SchemaSize = Depends(),
-#     item: UserGroup = Depends(valid_user_group_id),
-# ):
-#     return provider.choose_out_schema(
-#         items=item.providers(), auth=auth, short=size.short, with_conn=size.with_conn
-#     )
+@router.get(
+    "/{user_group_uid}/providers",
+    dependencies=[Depends(check_item_etag(valid_user_group_id))],
+    response_model=Union[
+        List[ProviderReadExtended],
+        List[ProviderRead],
+        List[ProviderReadShort],
+        List[ProviderReadExtendedPublic],
+        List[ProviderReadPublic],
+    ],
+    summary="Read user group accessible providers",
+    description="Retrieve all the providers the user group \
+        has access to thanks to its SLA. \
+        It is possible to filter on providers attributes and other \
+        common query parameters. \
+        If no entity matches the given *uid*, the endpoint \
+        raises a `not found` error.",
+)
+@cached_read
+@read_transaction
+def get_user_group_providers(
+    response: Response,
+    auth: bool = Depends(check_read_access),
+    comm: DbQueryCommonParams = Depends(),
+    page: Pagination = Depends(),
+    size: SchemaSize = Depends(),
+    item: ProviderQuery = Depends(),
+    db_user_group: UserGroup = Depends(valid_user_group_id),
+):
+    items = provider.get_multi(
+        **comm.dict(exclude_none=True),
+        **page.dict(exclude_none=True),
+        **item.dict(exclude_none=True),
+        user_groups__uid=db_user_group.uid,
+    )
+    cursor = provider.next_cursor(
+        items=items, **comm.dict(exclude_none=True), **page.dict(exclude_none=True)
+    )
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    response.headers["X-Total-Count"] = str(
+        provider.count(
+            **item.dict(exclude_none=True), user_groups__uid=db_user_group.uid
+        )
+    )
+    items = provider.choose_out_schema(
+        items=items, auth=auth, short=size.short, with_conn=size.with_conn
+    )
+    return schema_response(content=items, response=response)
 
 
-# @db.read_transaction
-# @router.get(
-#    "/{user_group_uid}/services",
-#    response_model=Union[
-#        List[
-#            Union[
-#                BlockStorageServiceReadExtended,
-#                IdentityServiceReadExtended,
-#                ComputeServiceReadExtended,
-#            ]
-#        ],
-#        List[Union[BlockStorageServiceRead, IdentityServiceRead, ComputeServiceRead]],
-#        List[
-#            Union[
-#                BlockStorageServiceReadShort,
-#                IdentityServiceReadShort,
-#                ComputeServiceReadShort,
-#            ]
-#        ],
-#        List[
-#            Union[
-#                BlockStorageServiceReadExtendedPublic,
-#                IdentityServiceReadExtendedPublic,
-#                ComputeServiceReadExtendedPublic,
-#            ]
-#        ],
-#        List[
-#            Union[
-#                BlockStorageServiceReadPublic,
-#                IdentityServiceReadPublic,
-#                ComputeServiceReadPublic,
-#            ]
-#        ],
-#    ],
-#    summary="Read user group accessible services",
-#    description="Retrieve all the services the user group \
-#        has access to thanks to its SLA. \
-#        If no entity matches the given *uid*, the endpoint \
-#        raises a `not found` error.",
-# )
-# def get_user_group_services(
-#    auth: bool = Depends(check_read_access),
-#    size: SchemaSize = Depends(),
-#    item: UserGroup = Depends(valid_user_group_id),
-#    srv: ServiceQuery = Depends(),
-# ):
-#    items = item.services(**srv.dict(exclude_none=True))
-#    return service.choose_out_schema(
-#        items=items, auth=auth, short=size.short, with_conn=size.with_conn
-#    )
+@router.get(
+    "/{user_group_uid}/services",
+    dependencies=[Depends(check_item_etag(valid_user_group_id))],
+    response_model=Union[
+        List[
+            Union[
+                BlockStorageServiceReadExtended,
+                ComputeServiceReadExtended,
+                NetworkServiceReadExtended,
+            ]
+        ],
+        List[Union[BlockStorageServiceRead, ComputeServiceRead, NetworkServiceRead]],
+        List[
+            Union[
+                BlockStorageServiceReadShort,
+                ComputeServiceReadShort,
+                NetworkServiceReadShort,
+            ]
+        ],
+        List[
+            Union[
+                BlockStorageServiceReadExtendedPublic,
+                ComputeServiceReadExtendedPublic,
+                NetworkServiceReadExtendedPublic,
+            ]
+        ],
+        List[
+            Union[
+                BlockStorageServiceReadPublic,
+                ComputeServiceReadPublic,
+                NetworkServiceReadPublic,
+            ]
+        ],
+    ],
+    summary="Read user group accessible services",
+    description="Retrieve all the services the user group \
+        has access to thanks to the quotas of its SLA projects. \
+        If no entity matches the given *uid*, the endpoint \
+        raises a `not found` error.",
+)
+@cached_read
+@read_transaction
+def get_user_group_services(
+    response: Response,
+    auth: bool = Depends(check_read_access),
+    size: SchemaSize = Depends(),
+    db_user_group: UserGroup = Depends(valid_user_group_id),
+):
+    items = []
+    for crud in [block_storage_service, compute_service, network_service]:
+        items += crud.choose_out_schema(
+            items=crud.get_multi(user_groups__uid=db_user_group.uid),
+            auth=auth,
+            short=size.short,
+            with_conn=size.with_conn,
+        )
+    response.headers["X-Total-Count"] = str(len(items))
+    return schema_response(content=items, response=response)
@@ -23,6 +23,8 @@ class UserGroup(StructuredNode):
     A User Group can be involved into multiple SLAs.
     A UserGroup has access, through its SLAs and Projects to a set of
     images, flavors, networks and quotas.
+    Reachable flavors, images, providers and services are also directly linked to
+    the user group (access index), see `app.user_group.access`.
 
     Attributes:
     ----------
@@ -33,7 +35,7 @@ class UserGroup(StructuredNode):
 
     uid = UniqueIdProperty()
     description = StringProperty(default="")
-    name = StringProperty(required=True)
+    name = StringProperty(required=True, index=True)
 
     slas = RelationshipTo("..sla.models.SLA", "AGREE", cardinality=ZeroOrMore)
     identity_provider = RelationshipTo(
@@ -45,14 +47,14 @@ class UserGroup(StructuredNode):
     query_prefix = """
         MATCH (g:UserGroup)
         WHERE (elementId(g)=$self)
-        MATCH (g)-[:AGREE]-(s)-[:REFER_TO]->(p)
+        MATCH (g)-[:CAN_ACCESS]->(u)
         """
 
     def flavors(self) -> List[Flavor]:
         results, columns = self.cypher(
             f"""
                 {self.query_prefix}
-                MATCH (p)-[:CAN_USE_VM_FLAVOR]->(u)
+                WHERE u:Flavor
                 RETURN u
             """
         )
@@ -62,7 +64,7 @@ class UserGroup(StructuredNode):
         results, columns = self.cypher(
             f"""
                 {self.query_prefix}
-                MATCH (p)-[:CAN_USE_VM_IMAGE]->(u)
+                WHERE u:Image
                 RETURN u
             """
         )
@@ -72,36 +74,18 @@ class UserGroup(StructuredNode):
         results, columns = self.cypher(
             f"""
                 {self.query_prefix}
-                MATCH (p)<-[:BOOK_PROJECT_FOR_SLA]-(u)
+                WHERE u:Provider
                 RETURN u
             """
         )
         return [Provider.inflate(row[0]) for row in results]
 
-    def services(self, **kwargs) -> List[Service]:
-        if not kwargs:
-            filters = ""
-        else:
-            filters = []
-            for k in kwargs.keys():
-                if k.startswith("service_"):
-                    start_idx = len("service_")
-                    attr = k[start_idx:]
-                    filters.append(f"u.{attr} = ${k}")
-                elif k.startswith("quota_"):
-                    start_idx = len("quota_")
-                    attr = k[start_idx:]
-                    filters.append(f"q.{attr} = ${k}")
-            filters = ", ".join(filters)
-            filters = "WHERE " + filters
-
+    def services(self) -> List[Service]:
         results, columns = self.cypher(
             f"""
                 {self.query_prefix}
-                MATCH (p)-[:USE_SERVICE_WITH]->(q)-[:APPLY_TO]->(u)
-                {filters}
+                WHERE u:Service
                 RETURN u
-            """,
-            kwargs,
+            """
         )
         return [Service.inflate(row[0]) for row in results]
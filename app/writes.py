@@ -0,0 +1,158 @@
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Dict, Iterable, Optional, Set, Tuple, Type
+
+from neomodel import StructuredNode
+from neomodel.relationship_manager import RelationshipManager
+
+from app.user_group.access import affected_groups
+
+
+@dataclass
+class WriteLog:
+    """Nodes written by a write transaction.
+
+    Attributes:
+    ----------
+        nodes (dict): Values of the identifying property of the nodes created,
+            updated, deleted or (dis)connected, grouped by class and property.
+        groups (set): uids of the user groups reaching the deleted or disconnected
+            nodes before the change.
+    """
+
+    nodes: Dict[Tuple[Type[StructuredNode], str], Set[Any]] = field(
+        default_factory=dict
+    )
+    groups: Set[str] = field(default_factory=set)
+
+    @property
+    def written(self) -> bool:
+        """Return True if the transaction wrote something."""
+        return any(len(values) > 0 for values in self.nodes.values())
+
+    def affected_groups(self) -> Set[str]:
+        """Return the uids of the user groups whose access relationships may have
+        changed.
+
+        Run it at the end of the transaction, so that the user groups reaching the
+        created and connected nodes are found.
+        """
+        groups = set(self.groups)
+        for (model, key), values in self.nodes.items():
+            groups |= affected_groups(model, key, values)
+        return groups
+
+
+# Log of the write transaction running in the current thread, if any.
+write_log: ContextVar[Optional[WriteLog]] = ContextVar("write_log", default=None)
+
+
+def record_write(model: Type[StructuredNode], key: str, values: Iterable[Any]) -> None:
+    """Add the given nodes to the log of the current write transaction, if any.
+
+    Args:
+    ----
+        model (type): Class of the written nodes.
+        key (str): Property identifying the nodes.
+        values (iterable): Values of that property.
+    """
+    log = write_log.get()
+    if log is not None:
+        log.nodes.setdefault((model, key), set()).update(values)
+
+
+def record_removal(
+    model: Type[StructuredNode], key: str, values: Iterable[Any]
+) -> None:
+    """Add the given nodes to the log of the current write transaction, if any,
+    before deleting or disconnecting them.
+
+    The user groups reaching them are looked up now, since they may no more reach
+    them once the change is done.
+    """
+    log = write_log.get()
+    if log is not None:
+        values = list(values)
+        log.groups |= affected_groups(model, key, values)
+        record_write(model, key, values)
+
+
+_save = StructuredNode.save
+_create = StructuredNode.create
+_delete = StructuredNode.delete
+_connect = RelationshipManager.connect
+_disconnect = RelationshipManager.disconnect
+_disconnect_all = RelationshipManager.disconnect_all
+_reconnect = RelationshipManager.reconnect
+
+
+@wraps(_save)
+def _logged_save(self: StructuredNode) -> StructuredNode:
+    result = _save(self)
+    record_write(type(self), "uid", [self.uid])
+    return result
+
+
+@wraps(_create.__func__)
+def _logged_create(cls: Type[StructuredNode], *props: Any, **kwargs: Any) -> Any:
+    nodes = _create.__func__(cls, *props, **kwargs)
+    record_write(cls, "uid", [node.uid for node in nodes])
+    return nodes
+
+
+@wraps(_delete)
+def _logged_delete(self: StructuredNode) -> bool:
+    record_removal(type(self), "uid", [self.uid])
+    return _delete(self)
+
+
+@wraps(_connect)
+def _logged_connect(
+    self: RelationshipManager, node: StructuredNode, properties: Any = None
+) -> Any:
+    result = _connect(self, node, properties)
+    record_write(type(self.source), "uid", [self.source.uid])
+    record_write(type(node), "uid", [node.uid])
+    return result
+
+
+@wraps(_disconnect)
+def _logged_disconnect(self: RelationshipManager, node: StructuredNode) -> None:
+    record_removal(type(self.source), "uid", [self.source.uid])
+    record_removal(type(node), "uid", [node.uid])
+    return _disconnect(self, node)
+
+
+@wraps(_disconnect_all)
+def _logged_disconnect_all(self: RelationshipManager) -> None:
+    record_removal(type(self.source), "uid", [self.source.uid])
+    return _disconnect_all(self)
+
+
+@wraps(_reconnect)
+def _logged_reconnect(
+    self: RelationshipManager, old_node: StructuredNode, new_node: StructuredNode
+) -> None:
+    record_removal(type(self.source), "uid", [self.source.uid])
+    record_removal(type(old_node), "uid", [old_node.uid])
+    result = _reconnect(self, old_node, new_node)
+    record_write(type(new_node), "uid", [new_node.uid])
+    return result
+
+
+def track_writes() -> None:
+    """Log the nodes written through neomodel in the current write transaction.
+
+    Nodes and relationships created, updated or deleted by neomodel are recorded,
+    including the relationships `reconnect` moves with its own Cypher statement.
+    `replace` goes through `disconnect_all` and `connect`. The BatchWriter records
+    the nodes it writes with Cypher statements.
+    """
+    StructuredNode.save = _logged_save
+    StructuredNode.create = classmethod(_logged_create)
+    StructuredNode.delete = _logged_delete
+    RelationshipManager.connect = _logged_connect
+    RelationshipManager.disconnect = _logged_disconnect
+    RelationshipManager.disconnect_all = _logged_disconnect_all
+    RelationshipManager.reconnect = _logged_reconnect
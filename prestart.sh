@@ -0,0 +1,5 @@
+#! /usr/bin/env bash
+
+# Create the indexes and build the user groups access index once, before gunicorn
+# starts the workers.
+python -m app.prestart
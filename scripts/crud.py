@@ -1,41 +1,109 @@
+import gzip
+import json
 import os
-from typing import Any, Dict, List, Optional
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 from fastapi import status
 from fastapi.encoders import jsonable_encoder
 from logger import logger
 from pydantic import AnyHttpUrl
+from requests.adapters import HTTPAdapter
 
 from app.provider.schemas_extended import ProviderCreateExtended, ProviderReadExtended
 
-TIMEOUT = 5  # s
+# Connect and read timeouts. Reading a provider with all its entities can take
+# longer than establishing the connection.
+TIMEOUT = (5, 60)  # s
+
+# Request bodies larger than this are gzip compressed.
+MIN_COMPRESS_SIZE = 1024  # bytes
 
 
 class CRUD:
+    """Client of the providers endpoints.
+
+    Requests go through a session keeping alive the connections to the CMDB, so
+    that successive calls do not pay the TCP and TLS handshakes again. The session
+    is shared by the threads pushing providers concurrently.
+
+    Attributes:
+    ----------
+        pool_size (int): Maximum number of connections kept open. It should match
+            the number of threads using the client.
+    """
+
     def __init__(
         self,
         *,
         url: AnyHttpUrl,
         read_headers: Dict[str, str],
         write_headers: Dict[str, str],
+        pool_size: int = 10,
     ) -> None:
         self.type = "Provider"
         self.read_headers = read_headers
         self.write_headers = write_headers
         self.list_url = url
         self.item_url = os.path.join(url, "{uid}")
+        self.document_url = os.path.join(url, "{uid}", "document")
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self) -> None:
+        """Close the open connections."""
+        self.session.close()
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Dict[str, str],
+        json_data: Any = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """Send a request through the session and log its duration.
+
+        JSON bodies are gzip compressed when large enough.
+        """
+        if json_data is not None:
+            data = json.dumps(json_data, separators=(",", ":")).encode()
+            if len(data) >= MIN_COMPRESS_SIZE:
+                data = gzip.compress(data)
+                headers = {**headers, "content-encoding": "gzip"}
+            kwargs["data"] = data
+        start = perf_counter()
+        try:
+            resp = self.session.request(
+                method, url, headers=headers, timeout=TIMEOUT, **kwargs
+            )
+        except requests.RequestException as e:
+            elapsed = perf_counter() - start
+            logger.error(f"{method} {url} failed after {elapsed:.3f}s: {e!r}")
+            raise
+        elapsed = perf_counter() - start
+        sent = len(kwargs.get("data") or b"")
+        logger.debug(
+            f"{method} {url} -> {resp.status_code} in {elapsed:.3f}s "
+            f"(sent {sent} bytes, received {len(resp.content)} bytes)"
+        )
+        return resp
 
     def read(self, *, with_conn: bool = False) -> List[ProviderReadExtended]:
         """Retrieve all instances of this type."""
         logger.info(f"Looking for all {self.type}s")
         logger.debug(f"Url={self.list_url}")
 
-        resp = requests.get(
-            url=self.list_url,
+        resp = self._request(
+            "GET",
+            self.list_url,
             params={"with_conn": with_conn},
             headers=self.read_headers,
-            timeout=TIMEOUT,
         )
         if resp.status_code == status.HTTP_200_OK:
             logger.debug(f"{resp.json()}")
@@ -57,12 +125,12 @@ class CRUD:
         logger.debug(f"Url={self.list_url}")
         logger.debug(f"New Data={data}")
 
-        resp = requests.post(
-            url=self.list_url,
-            json=jsonable_encoder(data),
+        resp = self._request(
+            "POST",
+            self.list_url,
+            json_data=jsonable_encoder(data),
             headers=self.write_headers,
             params=params,
-            timeout=TIMEOUT,
         )
         if resp.status_code == status.HTTP_201_CREATED:
             logger.info("Created")
@@ -79,10 +147,8 @@ class CRUD:
         logger.info(f"Removing {self.type}={item.name}.")
         logger.debug(f"Url={self.item_url.format(uid=item.uid)}")
 
-        resp = requests.delete(
-            url=self.item_url.format(uid=item.uid),
-            headers=self.write_headers,
-            timeout=TIMEOUT,
+        resp = self._request(
+            "DELETE", self.item_url.format(uid=item.uid), headers=self.write_headers
         )
         if resp.status_code == status.HTTP_204_NO_CONTENT:
             logger.info("Removed")
@@ -101,11 +167,11 @@ class CRUD:
         logger.debug(f"Url={self.item_url.format(uid=old_data.uid)}")
         logger.debug(f"New Data={new_data}")
 
-        resp = requests.put(
-            url=self.item_url.format(uid=old_data.uid),
-            json=jsonable_encoder(new_data),
+        resp = self._request(
+            "PUT",
+            self.item_url.format(uid=old_data.uid),
+            json_data=jsonable_encoder(new_data),
             headers=self.write_headers,
-            timeout=TIMEOUT,
         )
         if resp.status_code == status.HTTP_200_OK:
             logger.info(f"{self.type}={new_data.name} successfully updated")
@@ -122,3 +188,56 @@ class CRUD:
         logger.error(f"Status code: {resp.status_code}")
         logger.error(f"Message: {resp.text}")
         raise Exception(f"Failed to update {self.type}={new_data.name}")
+
+    def read_document(self, *, item: ProviderReadExtended) -> Tuple[Dict, str]:
+        """Retrieve the document of an existing instance and its entity tag."""
+        logger.info(f"Looking for {self.type}={item.name} document")
+        logger.debug(f"Url={self.document_url.format(uid=item.uid)}")
+
+        resp = self._request(
+            "GET", self.document_url.format(uid=item.uid), headers=self.write_headers
+        )
+        if resp.status_code == status.HTTP_200_OK:
+            logger.debug(f"{resp.json()}")
+            return resp.json(), resp.headers["etag"]
+
+        logger.error(f"Failed to read {self.type}={item.name} document")
+        logger.error(f"Status code: {resp.status_code}")
+        logger.error(f"Message: {resp.text}")
+        raise Exception(f"Failed to read {self.type}={item.name} document")
+
+    def patch(
+        self, *, item: ProviderReadExtended, operations: List[Dict], etag: str
+    ) -> Optional[ProviderReadExtended]:
+        """Apply JSON Patch operations to the document of an existing instance.
+
+        Return None when the document changed since it was read: the patch has not
+        been applied.
+        """
+        logger.info(f"Patching {self.type}={item.name}: {len(operations)} operations")
+        logger.debug(f"Url={self.document_url.format(uid=item.uid)}")
+        logger.debug(f"Operations={operations}")
+
+        resp = self._request(
+            "PATCH",
+            self.document_url.format(uid=item.uid),
+            json_data=operations,
+            headers={**self.write_headers, "if-match": etag},
+        )
+        if resp.status_code == status.HTTP_200_OK:
+            logger.info(f"{self.type}={item.name} successfully patched")
+            logger.debug(f"{resp.json()}")
+            return ProviderReadExtended(**resp.json())
+
+        if resp.status_code == status.HTTP_304_NOT_MODIFIED:
+            logger.info(f"{self.type}={item.name} not modified")
+            return item
+
+        if resp.status_code == status.HTTP_412_PRECONDITION_FAILED:
+            logger.warning(f"{self.type}={item.name} changed since it was read")
+            return None
+
+        logger.error(f"Failed to patch {self.type}={item.name}")
+        logger.error(f"Status code: {resp.status_code}")
+        logger.error(f"Message: {resp.text}")
+        raise Exception(f"Failed to patch {self.type}={item.name}")
@@ -4,32 +4,57 @@ from pathlib import Path
 external_path = Path.cwd().parent
 sys.path.insert(1, str(external_path))
 
+import asyncio
 import logging
 import os
-from concurrent.futures import ThreadPoolExecutor
-from threading import Lock
+from datetime import timedelta
 from typing import List
 
 from logger import logger
-from models.provider import Openstack, TrustedIDP
-from providers.opnstk import get_provider
+from models.provider import SiteConfig
+from providers.opnstk import get_provider, is_transient
+from scheduler import Scheduler
+from snapshots import SnapshotStore
 from utils import load_cmdb_config, load_config, update_database
 
 from app.provider.schemas_extended import ProviderCreateExtended
 
-MAX_WORKERS = 7
-data_lock = Lock()
+# Maximum number of API calls running at the same time, all providers included,
+# and maximum number of calls per second towards each service endpoint.
+MAX_CONCURRENCY = 32
+RATE_LIMIT = 10
 
+# Maximum number of providers pushed to the CMDB at the same time.
+MAX_PUSHES = 8
 
-def add_os_provider_to_list(
-    os_conf: Openstack,
-    trusted_idps: List[TrustedIDP],
-    providers: List[ProviderCreateExtended],
-):
-    """Add Openstack providers to the provider lists."""
-    provider = get_provider(os_conf=os_conf, trusted_idps=trusted_idps)
-    with data_lock:
-        providers.append(provider)
+# File storing the resources retrieved by the last run, used to retrieve only the
+# changed ones, and time after which all the resources are retrieved again.
+SNAPSHOTS_FILE = ".cmdb-snapshots.json.gz"
+FULL_SYNC_INTERVAL = timedelta(days=7)
+
+
+async def get_providers(
+    configs: List[SiteConfig], snapshots: SnapshotStore
+) -> List[ProviderCreateExtended]:
+    """Retrieve the Openstack providers of all the configurations concurrently."""
+    scheduler = Scheduler(
+        max_concurrency=MAX_CONCURRENCY, rate=RATE_LIMIT, is_transient=is_transient
+    )
+    try:
+        return await asyncio.gather(
+            *(
+                get_provider(
+                    os_conf=os_conf,
+                    trusted_idps=config.trusted_idps,
+                    scheduler=scheduler,
+                    snapshots=snapshots,
+                )
+                for config in configs
+                for os_conf in config.openstack
+            )
+        )
+    finally:
+        scheduler.shutdown()
 
 
 if __name__ == "__main__":
@@ -39,26 +64,24 @@ if __name__ == "__main__":
     # Load CMDB configuration
     cmdb_urls = load_cmdb_config(base_path=base_path)
 
-    providers = []
-    thread_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS)
-
     # Read all yaml files containing providers configurations.
-    # Multithreading read.
+    # Retrieve the providers concurrently.
     yaml_files = list(
         filter(lambda x: x.endswith(".config.yaml"), os.listdir(base_path))
     )
-    for file in yaml_files:
-        config = load_config(fname=file)
-        for os_conf in config.openstack:
-            thread_pool.submit(
-                add_os_provider_to_list,
-                os_conf=os_conf,
-                trusted_idps=config.trusted_idps,
-                providers=providers,
-            )
-    thread_pool.shutdown(wait=True)
+    configs = [load_config(fname=file) for file in yaml_files]
+    snapshots = SnapshotStore(
+        path=os.path.join(base_path, SNAPSHOTS_FILE),
+        full_sync_interval=FULL_SYNC_INTERVAL,
+    )
+    snapshots.load()
+    providers = asyncio.run(get_providers(configs, snapshots))
+    snapshots.save()
 
     # Update the CMDB
     update_database(
-        cmdb_urls=cmdb_urls, token=config.trusted_idps[0].token, items=providers
+        cmdb_urls=cmdb_urls,
+        token=configs[-1].trusted_idps[0].token,
+        items=providers,
+        max_workers=MAX_PUSHES,
     )
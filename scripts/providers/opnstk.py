@@ -1,9 +1,11 @@
+import asyncio
 import copy
 import os
-from concurrent.futures import ThreadPoolExecutor
-from threading import Lock
-from typing import List, Optional
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
 
+from keystoneauth1.exceptions import RetriableConnectionFailure
 from logger import logger
 from models.provider import (
     AuthMethod,
@@ -14,6 +16,9 @@ from models.provider import (
 )
 from openstack import connect
 from openstack.connection import Connection
+from openstack.exceptions import HttpException
+from scheduler import Scheduler
+from snapshots import Snapshot, SnapshotStore
 
 from app.provider.enum import ProviderStatus
 from app.provider.schemas_extended import (
@@ -42,8 +47,19 @@ from app.service.enum import (
 
 TIMEOUT = 2  # s
 
-projects_lock = Lock()
-region_lock = Lock()
+# Images updated shortly before the last sync are retrieved again, to make up for
+# clock differences.
+SYNC_MARGIN = timedelta(minutes=5)
+
+# Status codes of the API calls failing for transient errors.
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def is_transient(exc: Exception) -> bool:
+    """Return True if the error may not happen again retrying the call."""
+    if isinstance(exc, RetriableConnectionFailure):
+        return True
+    return isinstance(exc, HttpException) and exc.status_code in RETRY_STATUS_CODES
 
 
 def get_block_storage_quotas(conn: Connection) -> BlockStorageQuotaCreateExtended:
@@ -71,15 +87,26 @@ def get_network_quotas(conn: Connection) -> NetworkQuotaCreateExtended:
     return NetworkQuotaCreateExtended(**data, project=conn.current_project_id)
 
 
-def get_flavors(conn: Connection) -> List[FlavorCreateExtended]:
+def get_flavor_projects(conn: Connection, flavor: Any) -> List[str]:
+    """Return the projects allowed to use a private flavor."""
+    if flavor.is_public:
+        return []
+    return [i.get("tenant_id") for i in conn.compute.get_flavor_access(flavor)]
+
+
+async def get_flavors(
+    conn: Connection, *, scheduler: Scheduler, endpoint: str
+) -> List[FlavorCreateExtended]:
     logger.info("Retrieve current project accessible flavors")
     flavors = []
-    for flavor in conn.compute.flavors(is_disabled=False):
+    received = await scheduler.run(
+        endpoint, lambda: list(conn.compute.flavors(is_disabled=False))
+    )
+    access = await asyncio.gather(
+        *(scheduler.run(endpoint, get_flavor_projects, conn, i) for i in received)
+    )
+    for flavor, projects in zip(received, access):
         logger.debug(f"Flavor received data={flavor!r}")
-        projects = []
-        if not flavor.is_public:
-            for i in conn.compute.get_flavor_access(flavor):
-                projects.append(i.get("tenant_id"))
         data = flavor.to_dict()
         data["uuid"] = data.pop("id")
         if data.get("description") is None:
@@ -98,35 +125,86 @@ def get_flavors(conn: Connection) -> List[FlavorCreateExtended]:
     return flavors
 
 
-def get_images(
-    conn: Connection, tags: Optional[List[str]] = None
+def get_image_projects(conn: Connection, image: Any) -> List[str]:
+    """Return the projects allowed to use a private or shared image."""
+    if image.visibility not in ["private", "shared"]:
+        return []
+    projects = [image.owner_id]
+    if image.visibility == "shared":
+        for member in conn.image.members(image):
+            if member.status == "accepted":
+                projects.append(member.id)
+    return projects
+
+
+async def get_images(
+    conn: Connection,
+    *,
+    scheduler: Scheduler,
+    endpoint: str,
+    tags: Optional[List[str]] = None,
+    snapshot: Optional[Snapshot] = None,
 ) -> List[ImageCreateExtended]:
+    """Retrieve the active images having all the given tags.
+
+    With a snapshot, retrieve only the images updated since its last sync, whatever
+    their status and tags, and merge them into the snapshot ones. Updated images no
+    more active or missing a tag are removed. Deleted images are not reported by the
+    API: they are removed by the next full sync.
+
+    Adding or removing a member does not change the `updated_at` of an image, so
+    the shared images are retrieved on every run, with their members. Shared images
+    of other projects no more listed are removed: the current project is no more
+    one of their members.
+    """
     if tags is None:
         tags = []
-    logger.info("Retrieve current project accessible images")
-    images = []
-    for image in conn.image.images(
-        status="active", tag=None if len(tags) == 0 else tags
-    ):
+    active = {"status": "active", "tag": None if len(tags) == 0 else tags}
+    if snapshot is None:
+        logger.info("Retrieve current project accessible images")
+        query = active
+    else:
+        since = snapshot.synced_at.astimezone(timezone.utc) - SYNC_MARGIN
+        logger.info(f"Retrieve current project images updated since {since}")
+        query = {"updated_at": f"gte:{since:%Y-%m-%dT%H:%M:%SZ}"}
+    received = await scheduler.run(endpoint, lambda: list(conn.image.images(**query)))
+    images = {} if snapshot is None else dict(snapshot.images)
+    if snapshot is not None:
+        logger.info("Retrieve current project accessible shared images")
+        shared = await scheduler.run(
+            endpoint,
+            lambda: list(conn.image.images(visibility="shared", **active)),
+        )
+        listed = {i.id for i in received} | {i.id for i in shared}
+        for uuid, image in snapshot.images.items():
+            if (
+                uuid not in listed
+                and not image.is_public
+                and image.projects[:1] != [conn.current_project_id]
+            ):
+                images.pop(uuid)
+        updated = {i.id for i in received}
+        received += [i for i in shared if i.id not in updated]
+    changed = []
+    for image in received:
+        if image.status == "active" and set(tags).issubset(image.tags or []):
+            changed.append(image)
+        else:
+            images.pop(image.id, None)
+    members = await asyncio.gather(
+        *(scheduler.run(endpoint, get_image_projects, conn, i) for i in changed)
+    )
+    for image, projects in zip(changed, members):
         logger.debug(f"Image received data={image!r}")
-        is_public = True
-        projects = []
-        if image.visibility in ["private", "shared"]:
-            projects = [image.owner_id]
-            is_public = False
-        if image.visibility == "shared":
-            members = list(conn.image.members(image))
-            for member in members:
-                if member.status == "accepted":
-                    projects.append(member.id)
+        is_public = image.visibility not in ["private", "shared"]
         data = image.to_dict()
         data["uuid"] = data.pop("id")
         if data.get("description") is None:
             data["description"] = ""
         data["is_public"] = is_public
         logger.debug(f"Image manipulated data={data}")
-        images.append(ImageCreateExtended(**data, projects=projects))
-    return images
+        images[data["uuid"]] = ImageCreateExtended(**data, projects=projects)
+    return list(images.values())
 
 
 def get_networks(
@@ -203,13 +281,51 @@ def get_correct_idp_and_user_group_for_project(
     raise
 
 
-def get_per_project_details(
+@dataclass
+class ProjectDetails:
+    """Services and project data retrieved for a project in a region."""
+
+    compute_service: ComputeServiceCreateExtended
+    block_storage_service: BlockStorageServiceCreateExtended
+    network_service: NetworkServiceCreateExtended
+    identity_service: IdentityServiceCreate
+    project: ProjectCreate
+
+
+def connect_and_resolve_endpoints(**kwargs: Any) -> Tuple[Connection, Dict[str, str]]:
+    """Connect to openstack and return the connection with its service endpoints.
+
+    Resolving the endpoints authenticates and creates the service proxies, before
+    the concurrent API calls share them.
+    """
+    conn = connect(**kwargs)
+    endpoints = {
+        "compute": conn.compute.get_endpoint(),
+        "block_storage": conn.block_storage.get_endpoint(),
+        "network": conn.network.get_endpoint(),
+        "image": conn.image.get_endpoint(),
+    }
+    return conn, endpoints
+
+
+async def get_per_project_details(
     os_conf: Openstack,
     project_conf: Project,
     region: RegionCreateExtended,
     trusted_idps: List[TrustedIDP],
-    projects: List[ProjectCreate],
-) -> None:
+    scheduler: Scheduler,
+    snapshots: SnapshotStore,
+) -> Optional[ProjectDetails]:
+    """Retrieve the resources available to a project in a region.
+
+    Independent API calls, and the ones retrieving the details of each flavor and
+    image, run concurrently through the scheduler. Calls are rate limited by
+    service endpoint.
+
+    Images are retrieved incrementally from the project snapshot, unless it is
+    missing or a full sync is due. The snapshot is updated once all the calls
+    succeeded.
+    """
     default_private_net = project_conf.default_private_net
     default_public_net = project_conf.default_public_net
     proxy = project_conf.private_net_proxy
@@ -228,6 +344,8 @@ def get_per_project_details(
         proxy = region_props.private_net_proxy
         per_user_limits = region_props.per_user_limits
 
+    # Tasks run in a single thread and there is no await before the trusted IDPs
+    # are updated, so no lock is needed.
     trusted_idp = get_correct_idp_and_user_group_for_project(
         os_conf_auth_methods=os_conf.identity_providers,
         trusted_idps=trusted_idps,
@@ -235,14 +353,19 @@ def get_per_project_details(
     )
     if trusted_idp is None:
         logger.error(f"Skipping project {project_conf.id}.")
-        return
+        return None
 
     logger.info(
         f"Connecting through IDP {trusted_idp.endpoint} to openstack "
         f"'{os_conf.name}' and region '{region.name}'. "
         f"Accessing with project ID: {project_conf.id}"
     )
-    conn = connect(
+    key = SnapshotStore.key(os_conf.name, region.name, project_conf.id)
+    snapshot = snapshots.get(key)
+    started_at = datetime.now(timezone.utc)
+    conn, endpoints = await scheduler.run(
+        os_conf.auth_url,
+        connect_and_resolve_endpoints,
         auth_url=os_conf.auth_url,
         auth_type="v3oidcaccesstoken",
         identity_provider=trusted_idp.relationship.idp_name,
@@ -254,15 +377,58 @@ def get_per_project_details(
     )
     logger.info("Connected.")
 
+    (
+        flavors,
+        images,
+        networks,
+        compute_quota,
+        block_storage_quota,
+        network_quota,
+        project,
+    ) = await asyncio.gather(
+        get_flavors(conn, scheduler=scheduler, endpoint=endpoints["compute"]),
+        get_images(
+            conn,
+            scheduler=scheduler,
+            endpoint=endpoints["image"],
+            tags=os_conf.image_tags,
+            snapshot=snapshot,
+        ),
+        scheduler.run(
+            endpoints["network"],
+            get_networks,
+            conn,
+            default_private_net=default_private_net,
+            default_public_net=default_public_net,
+            proxy=proxy,
+            tags=os_conf.network_tags,
+        ),
+        scheduler.run(endpoints["compute"], get_compute_quotas, conn),
+        scheduler.run(endpoints["block_storage"], get_block_storage_quotas, conn),
+        scheduler.run(endpoints["network"], get_network_quotas, conn),
+        scheduler.run(os_conf.auth_url, get_project, conn),
+    )
+    conn.close()
+    logger.info("Connection closed")
+
+    # Store copies: the returned images are changed while building the provider.
+    snapshots.set(
+        key,
+        Snapshot(
+            synced_at=started_at,
+            full_sync_at=started_at if snapshot is None else snapshot.full_sync_at,
+            images={i.uuid: i.copy(deep=True) for i in images},
+        ),
+    )
+
     # Create region's compute service.
-    # Retrieve flavors, images and current project corresponding quotas.
-    # Add them to the compute service.
+    # Add flavors, images and current project corresponding quotas.
     compute_service = ComputeServiceCreateExtended(
-        endpoint=conn.compute.get_endpoint(), name=ComputeServiceName.OPENSTACK_NOVA
+        endpoint=endpoints["compute"], name=ComputeServiceName.OPENSTACK_NOVA
     )
-    compute_service.flavors = get_flavors(conn)
-    compute_service.images = get_images(conn, tags=os_conf.image_tags)
-    compute_service.quotas = [get_compute_quotas(conn)]
+    compute_service.flavors = flavors
+    compute_service.images = images
+    compute_service.quotas = [compute_quota]
     if per_user_limits is not None and per_user_limits.compute is not None:
         compute_service.quotas.append(
             ComputeQuotaCreateExtended(
@@ -271,32 +437,14 @@ def get_per_project_details(
             )
         )
 
-    with region_lock:
-        for i, region_service in enumerate(region.compute_services):
-            if region_service.endpoint == compute_service.endpoint:
-                uuids = [j.uuid for j in region_service.flavors]
-                region.compute_services[i].flavors += list(
-                    filter(lambda x: x.uuid not in uuids, compute_service.flavors)
-                )
-                uuids = [j.uuid for j in region_service.images]
-                region.compute_services[i].images += list(
-                    filter(lambda x: x.uuid not in uuids, compute_service.images)
-                )
-                region.compute_services[i].quotas += compute_service.quotas
-                break
-        else:
-            region.compute_services.append(compute_service)
-
-    # Retrieve project's block storage service.
+    # Create project's block storage service.
     # Remove last part which corresponds to the project ID.
-    # Retrieve current project corresponding quotas.
-    # Add them to the block storage service.
-    endpoint = conn.block_storage.get_endpoint()
-    endpoint = os.path.dirname(endpoint)
+    # Add current project corresponding quotas.
+    endpoint = os.path.dirname(endpoints["block_storage"])
     block_storage_service = BlockStorageServiceCreateExtended(
         endpoint=endpoint, name=BlockStorageServiceName.OPENSTACK_CINDER
     )
-    block_storage_service.quotas = [get_block_storage_quotas(conn)]
+    block_storage_service.quotas = [block_storage_quota]
     if per_user_limits is not None and per_user_limits.block_storage is not None:
         block_storage_service.quotas.append(
             BlockStorageQuotaCreateExtended(
@@ -305,27 +453,13 @@ def get_per_project_details(
             )
         )
 
-    with region_lock:
-        for i, region_service in enumerate(region.block_storage_services):
-            if region_service.endpoint == block_storage_service.endpoint:
-                region.block_storage_services[i].quotas += block_storage_service.quotas
-                break
-        else:
-            region.block_storage_services.append(block_storage_service)
-
-    # Retrieve region's network service.
+    # Create region's network service.
     network_service = NetworkServiceCreateExtended(
-        endpoint=conn.network.get_endpoint(),
+        endpoint=endpoints["network"],
         name=NetworkServiceName.OPENSTACK_NEUTRON,
     )
-    network_service.networks = get_networks(
-        conn,
-        default_private_net=default_private_net,
-        default_public_net=default_public_net,
-        proxy=proxy,
-        tags=os_conf.network_tags,
-    )
-    network_service.quotas = [get_network_quotas(conn)]
+    network_service.networks = networks
+    network_service.quotas = [network_quota]
     if per_user_limits is not None and per_user_limits.network is not None:
         network_service.quotas.append(
             NetworkQuotaCreateExtended(
@@ -334,44 +468,88 @@ def get_per_project_details(
             )
         )
 
-    with region_lock:
-        for i, region_service in enumerate(region.network_services):
-            if region_service.endpoint == network_service.endpoint:
-                uuids = [j.uuid for j in region_service.networks]
-                region.network_services[i].networks += list(
-                    filter(lambda x: x.uuid not in uuids, network_service.networks)
-                )
-                break
-        else:
-            region.network_services.append(network_service)
-
-    # Retrieve provider's identity service.
+    # Create provider's identity service.
     identity_service = IdentityServiceCreate(
         endpoint=os_conf.auth_url,
         name=IdentityServiceName.OPENSTACK_KEYSTONE,
     )
-    with region_lock:
-        for region_service in region.identity_services:
-            if region_service.endpoint == identity_service.endpoint:
-                break
-        else:
-            region.identity_services.append(identity_service)
 
-    # Create project entity
-    project = get_project(conn)
-    with projects_lock:
-        if project.uuid not in [i.uuid for i in projects]:
-            projects.append(project)
+    return ProjectDetails(
+        compute_service=compute_service,
+        block_storage_service=block_storage_service,
+        network_service=network_service,
+        identity_service=identity_service,
+        project=project,
+    )
 
-    conn.close()
-    logger.info("Connection closed")
 
+def add_project_details(
+    region: RegionCreateExtended,
+    projects: List[ProjectCreate],
+    details: ProjectDetails,
+) -> None:
+    """Merge the services of a project into the region ones and add the project.
+
+    Called once all the projects have been retrieved, so nothing runs concurrently.
+    """
+    compute_service = details.compute_service
+    for i, region_service in enumerate(region.compute_services):
+        if region_service.endpoint == compute_service.endpoint:
+            uuids = [j.uuid for j in region_service.flavors]
+            region.compute_services[i].flavors += list(
+                filter(lambda x: x.uuid not in uuids, compute_service.flavors)
+            )
+            uuids = [j.uuid for j in region_service.images]
+            region.compute_services[i].images += list(
+                filter(lambda x: x.uuid not in uuids, compute_service.images)
+            )
+            region.compute_services[i].quotas += compute_service.quotas
+            break
+    else:
+        region.compute_services.append(compute_service)
+
+    block_storage_service = details.block_storage_service
+    for i, region_service in enumerate(region.block_storage_services):
+        if region_service.endpoint == block_storage_service.endpoint:
+            region.block_storage_services[i].quotas += block_storage_service.quotas
+            break
+    else:
+        region.block_storage_services.append(block_storage_service)
+
+    network_service = details.network_service
+    for i, region_service in enumerate(region.network_services):
+        if region_service.endpoint == network_service.endpoint:
+            uuids = [j.uuid for j in region_service.networks]
+            region.network_services[i].networks += list(
+                filter(lambda x: x.uuid not in uuids, network_service.networks)
+            )
+            break
+    else:
+        region.network_services.append(network_service)
+
+    identity_service = details.identity_service
+    for region_service in region.identity_services:
+        if region_service.endpoint == identity_service.endpoint:
+            break
+    else:
+        region.identity_services.append(identity_service)
+
+    if details.project.uuid not in [i.uuid for i in projects]:
+        projects.append(details.project)
 
-def get_provider(
-    *, os_conf: Openstack, trusted_idps: List[TrustedIDP]
+
+async def get_provider(
+    *,
+    os_conf: Openstack,
+    trusted_idps: List[TrustedIDP],
+    scheduler: Scheduler,
+    snapshots: SnapshotStore,
 ) -> ProviderCreateExtended:
     """Generate an Openstack virtual provider, reading information from a real openstack
     instance.
+
+    All regions and projects are retrieved concurrently, then merged in the order
+    of the configuration.
     """
     if os_conf.status != ProviderStatus.ACTIVE:
         logger.info(f"Provider={os_conf.name} not active: {os_conf.status}")
@@ -384,23 +562,32 @@ def get_provider(
         )
 
     trust_idps = copy.deepcopy(trusted_idps)
-    regions: List[RegionCreateExtended] = []
+    regions = [RegionCreateExtended(**i.dict()) for i in os_conf.regions]
     projects: List[ProjectCreate] = []
 
-    for region_conf in os_conf.regions:
-        region = RegionCreateExtended(**region_conf.dict())
-        thread_pool = ThreadPoolExecutor(max_workers=len(os_conf.projects))
+    tasks = [
+        get_per_project_details(
+            os_conf=os_conf,
+            project_conf=project_conf,
+            region=region,
+            trusted_idps=trust_idps,
+            scheduler=scheduler,
+            snapshots=snapshots,
+        )
+        for region in regions
+        for project_conf in os_conf.projects
+    ]
+    results = iter(await asyncio.gather(*tasks, return_exceptions=True))
+    for region in regions:
         for project_conf in os_conf.projects:
-            thread_pool.submit(
-                get_per_project_details,
-                os_conf=os_conf,
-                project_conf=project_conf,
-                region=region,
-                trusted_idps=trust_idps,
-                projects=projects,
-            )
-        thread_pool.shutdown(wait=True)
-        regions.append(region)
+            details = next(results)
+            if isinstance(details, Exception):
+                logger.error(
+                    f"Failed to retrieve project {project_conf.id} details in region "
+                    f"{region.name}: {details!r}"
+                )
+            elif details is not None:
+                add_project_details(region, projects, details)
 
     # Filter on IDPs and user groups with SLAs
     # belonging to at least one project
@@ -0,0 +1,102 @@
+import asyncio
+import random
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, TypeVar
+
+from logger import logger
+
+# Retries of the calls failing for transient errors, with exponential backoff.
+MAX_RETRIES = 3
+BACKOFF = 0.5  # s
+
+T = TypeVar("T")
+
+
+class RateLimiter:
+    """Space the start of the calls towards an endpoint.
+
+    Not thread-safe: it is meant to be used by the tasks of a single event loop.
+
+    Attributes:
+    ----------
+        interval (float): Minimum seconds between two calls.
+    """
+
+    def __init__(self, *, rate: float) -> None:
+        self.interval = 1 / rate
+        self.__next = 0.0
+
+    async def wait(self) -> None:
+        """Wait for the turn of the caller."""
+        now = asyncio.get_running_loop().time()
+        start = max(now, self.__next)
+        self.__next = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class Scheduler:
+    """Run blocking calls from asyncio tasks with bounded concurrency.
+
+    Calls run in a thread pool whose size is the global concurrency limit, so the
+    number of threads does not grow with the number of providers and projects.
+    Calls towards the same endpoint are rate limited and the ones failing for
+    transient errors are retried with exponential backoff and jitter.
+
+    Attributes:
+    ----------
+        max_concurrency (int): Maximum number of calls running at the same time.
+        rate (float): Maximum number of calls per second towards each endpoint.
+        is_transient (callable): Tell if a failed call should be retried.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int,
+        rate: float,
+        is_transient: Callable[[Exception], bool],
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.is_transient = is_transient
+        self.__executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self.__semaphore = asyncio.Semaphore(max_concurrency)
+        self.__limiters: Dict[str, RateLimiter] = {}
+
+    async def run(
+        self, endpoint: str, func: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> T:
+        """Run the function in a worker thread and return its result.
+
+        Args:
+        ----
+            endpoint (str): Endpoint reached by the call. Used for rate limiting.
+            func (callable): Blocking function.
+            *args: Positional arguments of the function.
+            **kwargs: Keyword arguments of the function.
+
+        Returns:
+        -------
+            The function result.
+        """
+        limiter = self.__limiters.setdefault(endpoint, RateLimiter(rate=self.rate))
+        loop = asyncio.get_running_loop()
+        for attempt in range(MAX_RETRIES + 1):
+            await limiter.wait()
+            try:
+                async with self.__semaphore:
+                    return await loop.run_in_executor(
+                        self.__executor, partial(func, *args, **kwargs)
+                    )
+            except Exception as e:
+                if attempt == MAX_RETRIES or not self.is_transient(e):
+                    raise
+                delay = BACKOFF * 2**attempt * random.uniform(0.5, 1.5)
+                logger.warning(f"{endpoint}: {e!r}. Retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def shutdown(self) -> None:
+        """Release the worker threads."""
+        self.__executor.shutdown(wait=True)
@@ -0,0 +1,88 @@
+import gzip
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from logger import logger
+from pydantic import BaseModel, Field
+
+from app.provider.schemas_extended import ImageCreateExtended
+
+
+class Snapshot(BaseModel):
+    """Resources retrieved for a project in a region at the last successful run.
+
+    Only images are stored: they are the only resources whose list can be filtered
+    by update time (Glance `updated_at`). Flavors and networks are always fully
+    retrieved.
+    """
+
+    synced_at: datetime = Field(description="Start time of the last sync")
+    full_sync_at: datetime = Field(description="Start time of the last full sync")
+    images: Dict[str, ImageCreateExtended] = Field(
+        default_factory=dict, description="Images by UUID"
+    )
+
+
+class SnapshotStore:
+    """Snapshots of the harvested projects, stored in a gzipped JSON file.
+
+    Snapshots are keyed by provider, region and project.
+
+    Attributes:
+    ----------
+        path (str): File path.
+        full_sync_interval (timedelta): Time after which a project is fully
+            retrieved again, to detect deleted resources.
+    """
+
+    def __init__(self, *, path: str, full_sync_interval: timedelta) -> None:
+        self.path = path
+        self.full_sync_interval = full_sync_interval
+        self.__snapshots: Dict[str, Snapshot] = {}
+
+    @staticmethod
+    def key(provider: str, region: str, project: str) -> str:
+        return f"{provider}/{region}/{project}"
+
+    def load(self) -> None:
+        """Read the snapshots from file, if it exists."""
+        if not os.path.exists(self.path):
+            logger.info(f"No snapshots at {self.path}. Running a full sync")
+            return
+        with gzip.open(self.path, "rt") as f:
+            data: Dict[str, Any] = json.load(f)
+        self.__snapshots = {k: Snapshot(**v) for k, v in data.items()}
+        logger.info(f"Loaded {len(self.__snapshots)} snapshots from {self.path}")
+
+    def save(self) -> None:
+        """Write the snapshots to file.
+
+        Write a temporary file and replace the previous one, so that an interrupted
+        run does not corrupt it.
+        """
+        data = {k: json.loads(v.json()) for k, v in self.__snapshots.items()}
+        tmp = f"{self.path}.tmp"
+        with gzip.open(tmp, "wt") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        logger.info(f"Saved {len(self.__snapshots)} snapshots to {self.path}")
+
+    def get(self, key: str) -> Optional[Snapshot]:
+        """Return the snapshot to update incrementally.
+
+        Return None when missing or when a full sync is due.
+        """
+        snapshot = self.__snapshots.get(key)
+        if snapshot is None:
+            return None
+        if (
+            datetime.now(timezone.utc) - snapshot.full_sync_at
+            >= self.full_sync_interval
+        ):
+            return None
+        return snapshot
+
+    def set(self, key: str, snapshot: Snapshot) -> None:
+        self.__snapshots[key] = snapshot
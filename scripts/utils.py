@@ -1,13 +1,20 @@
 import os
-from typing import Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
 
+import jsonpatch
 import yaml
 from crud import CRUD
 from logger import logger
 from models.cmdb import CMDB, URLs
 from models.provider import SiteConfig
 
-from app.provider.schemas_extended import ProviderCreateExtended
+from app.provider.document import canonical_document
+from app.provider.schemas_extended import ProviderCreateExtended, ProviderReadExtended
+
+# Times a provider document is read and patched again when it changes in between.
+MAX_PATCH_ATTEMPTS = 3
 
 
 def load_cmdb_config(*, base_path: str = ".") -> SiteConfig:
@@ -49,24 +56,93 @@ def get_read_write_headers(*, token: str) -> Tuple[Dict[str, str], Dict[str, str
     return (read_header, write_header)
 
 
+def push_changes(
+    *, crud: CRUD, item: ProviderCreateExtended, db_item: ProviderReadExtended
+) -> None:
+    """Send to the CMDB only the differences between the stored provider and the
+    harvested one.
+
+    When the stored provider changes between the read and the patch, read it again
+    and rebuild the patch, at most MAX_PATCH_ATTEMPTS times.
+    """
+    for _ in range(MAX_PATCH_ATTEMPTS):
+        doc, etag = crud.read_document(item=db_item)
+        operations = jsonpatch.make_patch(doc, canonical_document(item)).patch
+        if len(operations) == 0:
+            logger.info(f"{crud.type}={item.name} not modified")
+            return
+        if crud.patch(item=db_item, operations=operations, etag=etag) is not None:
+            return
+    raise Exception(
+        f"{crud.type}={item.name} kept changing: "
+        f"patch not applied after {MAX_PATCH_ATTEMPTS} attempts"
+    )
+
+
+def push_provider(
+    *,
+    crud: CRUD,
+    item: Optional[ProviderCreateExtended],
+    db_item: Optional[ProviderReadExtended],
+) -> None:
+    """Create, update or remove a provider and log the time it took."""
+    name = item.name if item is not None else db_item.name
+    start = perf_counter()
+    if db_item is None:
+        crud.create(data=item)
+    elif item is None:
+        crud.remove(item=db_item)
+    else:
+        push_changes(crud=crud, item=item, db_item=db_item)
+    logger.info(f"{crud.type}={name} pushed in {perf_counter() - start:.3f}s")
+
+
 def update_database(
-    *, cmdb_urls: URLs, items: List[ProviderCreateExtended], token: str
+    *,
+    cmdb_urls: URLs,
+    items: List[ProviderCreateExtended],
+    token: str,
+    max_workers: int = 8,
 ) -> None:
     """Use the read and write headers to create, update or remove providers from the
     CMDB.
+
+    Existing providers are updated sending the JSON Patch between their stored
+    document and the harvested one. Providers are pushed concurrently, by at most
+    `max_workers` threads sharing the same connection pool. A failing provider does
+    not stop the others: failures are reported at the end.
     """
     read_header, write_header = get_read_write_headers(token=token)
     crud = CRUD(
-        url=cmdb_urls.providers, read_headers=read_header, write_headers=write_header
+        url=cmdb_urls.providers,
+        read_headers=read_header,
+        write_headers=write_header,
+        pool_size=max_workers,
     )
+    start = perf_counter()
+    try:
+        logger.info("Retrieving data from CMDB")
+        db_items = {db_item.name: db_item for db_item in crud.read()}
+        pairs = [(item, db_items.pop(item.name, None)) for item in items]
+        pairs += [(None, db_item) for db_item in db_items.values()]
 
-    logger.info("Retrieving data from CMDB")
-    db_items = {db_item.name: db_item for db_item in crud.read(with_conn=True)}
-    for item in items:
-        db_item = db_items.pop(item.name, None)
-        if db_item is None:
-            crud.create(data=item)
-        else:
-            crud.update(new_data=item, old_data=db_item)
-    for db_item in db_items.values():
-        crud.remove(item=db_item)
+        failed = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(push_provider, crud=crud, item=item, db_item=db_item): (
+                    item or db_item
+                ).name
+                for item, db_item in pairs
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Failed to push {crud.type}={futures[future]}: {e}")
+                    failed.append(futures[future])
+    finally:
+        crud.close()
+
+    logger.info(f"Pushed {len(pairs)} {crud.type}s in {perf_counter() - start:.3f}s")
+    if len(failed) > 0:
+        raise Exception(f"Failed to push {crud.type}s: {', '.join(sorted(failed))}")
@@ -5,6 +5,7 @@ from fastapi import status
 from fastapi.testclient import TestClient
 
 from app.config import get_settings
+from app.flavor.crud import flavor
 from app.flavor.models import Flavor
 from app.flavor.schemas import FlavorBase, FlavorRead, FlavorReadShort
 from app.flavor.schemas_extended import FlavorReadExtended
@@ -67,6 +68,30 @@ def test_read_flavors_with_target_params(
         )
 
 
+def test_read_flavors_with_string_operators(
+    db_public_flavor: Flavor, api_client_read_only: TestClient
+) -> None:
+    """Execute GET operations to read all flavors whose name contains, starts or
+    ends with a given string.
+    """
+    settings = get_settings()
+    name = db_public_flavor.name
+
+    for params, expected in [
+        ({"name__contains": name[1:-1]}, 1),
+        ({"name__startswith": name[:3]}, 1),
+        ({"name__endswith": name[-3:]}, 1),
+        ({"name__contains": name[1:-1].upper()}, 0),
+        ({"name__icontains": name[1:-1].upper()}, 1),
+        ({"name__contains": ".*"}, 0),
+    ]:
+        response = api_client_read_only.get(
+            f"{settings.API_V1_STR}/flavors/", params=params
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()) == expected
+
+
 def test_read_flavors_with_limit(
     db_public_flavor: Flavor,
     db_private_flavor: Flavor,
@@ -192,6 +217,7 @@ def test_read_flavors_with_pagination(
     assert response.status_code == status.HTTP_200_OK
     content = response.json()
     assert len(content) == 1
+    assert response.headers["X-Total-Count"] == "2"
     if content[0]["uid"] == db_public_flavor.uid:
         next_page_uid = db_private_flavor.uid
     else:
@@ -222,6 +248,123 @@ def test_read_flavors_with_pagination(
     assert len(content) == 0
 
 
+def test_read_flavors_with_cursor(
+    db_public_flavor: Flavor,
+    db_private_flavor: Flavor,
+    api_client_read_only: TestClient,
+) -> None:
+    """Execute GET operations to read all flavors.
+
+    Follow the cursors returned by each page.
+    """
+    settings = get_settings()
+    sorted_items = sorted([db_public_flavor, db_private_flavor], key=lambda x: x.name)
+
+    response = api_client_read_only.get(
+        f"{settings.API_V1_STR}/flavors/", params={"size": 1, "sort": "name"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    content = response.json()
+    assert len(content) == 1
+    assert content[0]["uid"] == sorted_items[0].uid
+    cursor = response.headers["X-Next-Cursor"]
+
+    # The cursor keeps the sort rule and ignores page
+    response = api_client_read_only.get(
+        f"{settings.API_V1_STR}/flavors/",
+        params={"size": 1, "page": 5, "cursor": cursor},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    content = response.json()
+    assert len(content) == 1
+    assert content[0]["uid"] == sorted_items[1].uid
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = api_client_read_only.get(
+        f"{settings.API_V1_STR}/flavors/", params={"size": 1, "cursor": cursor}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 0
+    assert "X-Next-Cursor" not in response.headers
+
+    # Without size there are no more items to read
+    response = api_client_read_only.get(f"{settings.API_V1_STR}/flavors/")
+    assert response.status_code == status.HTTP_200_OK
+    assert "X-Next-Cursor" not in response.headers
+
+    response = api_client_read_only.get(
+        f"{settings.API_V1_STR}/flavors/", params={"cursor": "invalid"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_read_flavors_from_cache(
+    db_public_flavor: Flavor,
+    db_private_flavor: Flavor,
+    api_client_read_write: TestClient,
+) -> None:
+    """Execute GET operations to read all flavors.
+
+    Repeated reads are served from the cache, which is invalidated by write
+    operations.
+    """
+    settings = get_settings()
+
+    response = api_client_read_write.get(f"{settings.API_V1_STR}/flavors/")
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 2
+
+    # Changes made without using the API are not seen
+    flavor.remove(db_obj=db_private_flavor)
+    response = api_client_read_write.get(f"{settings.API_V1_STR}/flavors/")
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 2
+    assert response.headers["X-Total-Count"] == "2"
+
+    response = api_client_read_write.delete(
+        f"{settings.API_V1_STR}/flavors/{db_public_flavor.uid}"
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = api_client_read_write.get(f"{settings.API_V1_STR}/flavors/")
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 0
+
+
+def test_read_flavors_streamed(
+    db_public_flavor: Flavor,
+    db_private_flavor: Flavor,
+    api_client_read_only: TestClient,
+) -> None:
+    """Execute GET operations to read all flavors.
+
+    Stream returned list as JSON array and as newline delimited JSON.
+    """
+    settings = get_settings()
+
+    response = api_client_read_only.get(f"{settings.API_V1_STR}/flavors/")
+    assert response.status_code == status.HTTP_200_OK
+    expected = response.json()
+
+    response = api_client_read_only.get(
+        f"{settings.API_V1_STR}/flavors/", params={"stream": "json"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["X-Total-Count"] == "2"
+    assert response.json() == expected
+
+    response = api_client_read_only.get(
+        f"{settings.API_V1_STR}/flavors/", params={"stream": "ndjson", "size": 1}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["X-Total-Count"] == "2"
+    content = [json.loads(line) for line in response.text.splitlines()]
+    assert content == expected[:1]
+    assert response.headers["X-Total-Count"] == "0"
+
+
 def test_read_flavors_with_conn(
     db_public_flavor: Flavor,
     db_private_flavor: Flavor,
@@ -345,6 +488,75 @@ def test_read_flavor_short(
     )
 
 
+def test_read_flavor_if_none_match(
+    db_public_flavor: Flavor, api_client_read_write: TestClient
+) -> None:
+    """Execute conditional GET operations to read a specific flavor.
+
+    The flavor is returned only if the catalog changed since the previous read.
+    """
+    settings = get_settings()
+
+    response = api_client_read_write.get(
+        f"{settings.API_V1_STR}/flavors/{db_public_flavor.uid}"
+    )
+    assert response.status_code == status.HTTP_200_OK
+    etag = response.headers["ETag"]
+
+    response = api_client_read_write.get(
+        f"{settings.API_V1_STR}/flavors/{db_public_flavor.uid}",
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+    assert not response.content
+
+    data = create_random_flavor_patch()
+    data.is_public = db_public_flavor.is_public
+    response = api_client_read_write.patch(
+        f"{settings.API_V1_STR}/flavors/{db_public_flavor.uid}",
+        json=json.loads(data.json()),
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = api_client_read_write.get(
+        f"{settings.API_V1_STR}/flavors/{db_public_flavor.uid}",
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+    assert response.json()["name"] == data.name
+
+
+def test_read_flavor_if_none_match_after_no_edit(
+    db_public_flavor: Flavor, api_client_read_write: TestClient
+) -> None:
+    """Execute conditional GET operations to read a specific flavor.
+
+    A PATCH operation changing nothing does not change the catalog version.
+    """
+    settings = get_settings()
+
+    response = api_client_read_write.get(
+        f"{settings.API_V1_STR}/flavors/{db_public_flavor.uid}"
+    )
+    assert response.status_code == status.HTTP_200_OK
+    etag = response.headers["ETag"]
+
+    data = create_random_flavor_patch(default=True)
+    response = api_client_read_write.patch(
+        f"{settings.API_V1_STR}/flavors/{db_public_flavor.uid}",
+        json=json.loads(data.json(exclude_unset=True)),
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    response = api_client_read_write.get(
+        f"{settings.API_V1_STR}/flavors/{db_public_flavor.uid}",
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
 def test_read_not_existing_flavor(api_client_read_only: TestClient) -> None:
     """Execute GET operations to try to read a not existing flavor."""
     settings = get_settings()
@@ -357,6 +569,23 @@ def test_read_not_existing_flavor(api_client_read_only: TestClient) -> None:
     assert content["detail"] == f"Flavor '{item_uuid}' not found"
 
 
+def test_read_not_existing_flavor_if_none_match(
+    api_client_read_only: TestClient,
+) -> None:
+    """Execute conditional GET operations to try to read a not existing flavor.
+
+    Missing items are not reported as not modified.
+    """
+    settings = get_settings()
+    item_uuid = uuid4()
+    response = api_client_read_only.get(
+        f"{settings.API_V1_STR}/flavors/{item_uuid}", headers={"If-None-Match": "*"}
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    content = response.json()
+    assert content["detail"] == f"Flavor '{item_uuid}' not found"
+
+
 def test_patch_public_flavor(
     db_public_flavor: Flavor, api_client_read_write: TestClient
 ) -> None:
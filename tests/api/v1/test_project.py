@@ -5,6 +5,7 @@ from fastapi import status
 from fastapi.testclient import TestClient
 
 from app.config import get_settings
+from app.flavor.models import Flavor
 from app.project.models import Project
 from app.project.schemas import ProjectBase, ProjectRead, ProjectReadShort
 from app.project.schemas_extended import ProjectReadExtended
@@ -61,6 +62,37 @@ def test_read_projects_with_target_params(
         )
 
 
+def test_read_projects_with_region_name(
+    db_project_with_single_block_storage_quota: Project,
+    api_client_read_only: TestClient,
+) -> None:
+    """Execute GET operations to read all projects with quotas on a specific region.
+
+    Projects are filtered before pagination, so the total count matches.
+    """
+    settings = get_settings()
+
+    db_project = db_project_with_single_block_storage_quota
+    db_region = db_project.quotas.single().service.single().region.single()
+    response = api_client_read_only.get(
+        f"{settings.API_V1_STR}/projects/",
+        params={"region_name": db_region.name, "size": 1},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    content = response.json()
+    assert len(content) == 1
+    assert response.headers["X-Total-Count"] == "1"
+    validate_read_project_attrs(obj_out=ProjectRead(**content[0]), db_item=db_project)
+
+    response = api_client_read_only.get(
+        f"{settings.API_V1_STR}/projects/",
+        params={"region_name": f"{db_region.name}-not-existing"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 0
+    assert response.headers["X-Total-Count"] == "0"
+
+
 def test_read_projects_with_limit(
     db_project: Project, db_project2: Project, api_client_read_only: TestClient
 ) -> None:
@@ -305,6 +337,61 @@ def test_read_project_short(
     )
 
 
+def test_read_project_catalog(
+    db_private_flavor: Flavor, api_client_read_only: TestClient
+) -> None:
+    """Execute GET operations to read the resources a project can use.
+
+    Private flavors are listed with the regions of the services supplying them.
+    """
+    settings = get_settings()
+
+    db_project = db_private_flavor.projects.single()
+    db_region = db_private_flavor.services.single().region.single()
+    response = api_client_read_only.get(
+        f"{settings.API_V1_STR}/projects/{db_project.uid}/catalog"
+    )
+    assert response.status_code == status.HTTP_200_OK
+    content = response.json()
+    assert response.headers["X-Total-Count"] == str(len(content))
+    items = [i for i in content if i["item"]["uid"] == db_private_flavor.uid]
+    assert len(items) == 1
+    assert items[0]["type"] == "flavor"
+    assert items[0]["regions"] == [db_region.name]
+
+    response = api_client_read_only.get(
+        f"{settings.API_V1_STR}/projects/{db_project.uid}/catalog",
+        params={"types": ["image", "network"], "by_region": True},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert all(i["type"] != "flavor" for i in response.json())
+
+
+def test_read_project_catalog_by_region(
+    db_private_flavor: Flavor, api_client_read_only: TestClient
+) -> None:
+    """Execute GET operations to read the resources a project can use, split by
+    region.
+
+    A private flavor supplied by a service is returned once, with its region, and
+    the total number of items matches the returned ones.
+    """
+    settings = get_settings()
+
+    db_project = db_private_flavor.projects.single()
+    db_region = db_private_flavor.services.single().region.single()
+    response = api_client_read_only.get(
+        f"{settings.API_V1_STR}/projects/{db_project.uid}/catalog",
+        params={"types": ["flavor"], "by_region": True},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    content = response.json()
+    assert response.headers["X-Total-Count"] == str(len(content))
+    items = [i for i in content if i["item"]["uid"] == db_private_flavor.uid]
+    assert len(items) == 1
+    assert items[0]["regions"] == [db_region.name]
+
+
 def test_read_not_existing_project(api_client_read_only: TestClient) -> None:
     """Execute GET operations to try to read a not existing project."""
     settings = get_settings()
@@ -8,6 +8,9 @@ from app.config import get_settings
 from app.provider.models import Provider
 from app.provider.schemas import ProviderBase, ProviderRead, ProviderReadShort
 from app.provider.schemas_extended import ProviderReadExtended
+from app.region.models import Region
+from app.service.models import ComputeService
+from tests.utils.compute_service import create_random_compute_service
 from tests.utils.provider import (
     create_random_provider_patch,
     validate_read_extended_provider_attrs,
@@ -231,6 +234,23 @@ def test_read_providers_with_pagination(
     assert len(content) == 0
 
 
+def test_read_providers_with_invalid_pagination(
+    api_client_read_only: TestClient,
+) -> None:
+    """Execute GET operations with negative or null pagination parameters."""
+    settings = get_settings()
+    for params in (
+        {"skip": -1},
+        {"limit": -1},
+        {"size": 0},
+        {"size": 1, "page": -1},
+    ):
+        response = api_client_read_only.get(
+            f"{settings.API_V1_STR}/providers/", params=params
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
 def test_read_providers_with_conn(
     db_provider_with_single_project: Provider,
     db_provider_with_multiple_projects: Provider,
@@ -431,6 +451,132 @@ def test_patch_provider_with_duplicated_name(
     )
 
 
+def test_read_provider_document(
+    db_provider_with_single_project: Provider, api_client_read_write: TestClient
+) -> None:
+    """Execute GET operations to read the document of a provider."""
+    settings = get_settings()
+    response = api_client_read_write.get(
+        f"{settings.API_V1_STR}/providers/{db_provider_with_single_project.uid}/document"
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"]
+    content = response.json()
+    assert content["name"] == db_provider_with_single_project.name
+    assert len(content["projects"]) == len(db_provider_with_single_project.projects)
+
+
+def test_patch_provider_document(
+    db_provider_with_single_project: Provider, api_client_read_write: TestClient
+) -> None:
+    """Execute PATCH operations to update a provider through its document."""
+    settings = get_settings()
+    url = f"{settings.API_V1_STR}/providers/{db_provider_with_single_project.uid}"
+    etag = api_client_read_write.get(f"{url}/document").headers["etag"]
+    data = create_random_provider_patch()
+
+    response = api_client_read_write.patch(
+        f"{url}/document",
+        json=[{"op": "replace", "path": "/description", "value": data.description}],
+        headers={"if-match": etag},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    content = response.json()
+    assert content["description"] == data.description
+
+    response = api_client_read_write.patch(
+        f"{url}/document",
+        json=[{"op": "replace", "path": "/description", "value": ""}],
+        headers={"if-match": etag},
+    )
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+
+def test_patch_provider_document_no_edit(
+    db_provider_with_single_project: Provider, api_client_read_write: TestClient
+) -> None:
+    """Execute PATCH operations to update a provider through its document.
+
+    Nothing changes.
+    """
+    settings = get_settings()
+    url = f"{settings.API_V1_STR}/providers/{db_provider_with_single_project.uid}"
+    etag = api_client_read_write.get(f"{url}/document").headers["etag"]
+    response = api_client_read_write.patch(
+        f"{url}/document", json=[], headers={"if-match": etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+def test_patch_provider_document_without_if_match(
+    db_provider_with_single_project: Provider, api_client_read_write: TestClient
+) -> None:
+    """Execute PATCH operations to try to update a provider through its document
+    without the If-Match header.
+    """
+    settings = get_settings()
+    response = api_client_read_write.patch(
+        f"{settings.API_V1_STR}/providers/{db_provider_with_single_project.uid}"
+        "/document",
+        json=[],
+    )
+    assert response.status_code == status.HTTP_428_PRECONDITION_REQUIRED
+    content = response.json()
+    assert content["detail"] == "Missing 'If-Match' header"
+
+
+def test_patch_provider_document_invalid_path(
+    db_provider_with_single_project: Provider, api_client_read_write: TestClient
+) -> None:
+    """Execute PATCH operations to try to remove a missing field of a provider
+    document.
+    """
+    settings = get_settings()
+    url = f"{settings.API_V1_STR}/providers/{db_provider_with_single_project.uid}"
+    etag = api_client_read_write.get(f"{url}/document").headers["etag"]
+    response = api_client_read_write.patch(
+        f"{url}/document",
+        json=[{"op": "remove", "path": "/not-a-field"}],
+        headers={"if-match": etag},
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_patch_provider_document_with_existing_service(
+    db_region: Region,
+    db_compute_serv2: ComputeService,
+    api_client_read_write: TestClient,
+) -> None:
+    """Execute PATCH operations to try to add to a provider document a service
+    already owned by another provider.
+    """
+    settings = get_settings()
+    db_provider = db_region.provider.single()
+    url = f"{settings.API_V1_STR}/providers/{db_provider.uid}"
+    response = api_client_read_write.get(f"{url}/document")
+    etag = response.headers["etag"]
+    regions = [i["name"] for i in response.json()["regions"]]
+    service = create_random_compute_service()
+    service.endpoint = db_compute_serv2.endpoint
+
+    response = api_client_read_write.patch(
+        f"{url}/document",
+        json=[
+            {
+                "op": "add",
+                "path": f"/regions/{regions.index(db_region.name)}/compute_services/-",
+                "value": json.loads(service.json()),
+            }
+        ],
+        headers={"if-match": etag},
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    content = response.json()
+    msg = f"Compute Service with endpoint '{db_compute_serv2.endpoint}' "
+    msg += "already registered"
+    assert content["detail"] == msg
+
+
 # TODO Add tests raising 422
 
 
@@ -0,0 +1,90 @@
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.flavor.models import Flavor
+from app.flavor.schemas import FlavorRead
+
+
+def test_search_flavor(
+    db_public_flavor: Flavor,
+    db_private_flavor: Flavor,
+    api_client_read_only: TestClient,
+) -> None:
+    """Execute GET operations to look for a flavor by its name.
+
+    The last word matches as a prefix.
+    """
+    settings = get_settings()
+
+    for q in [db_public_flavor.name, db_public_flavor.name[:-3].upper()]:
+        response = api_client_read_only.get(
+            f"{settings.API_V1_STR}/search/", params={"q": q}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        content = response.json()
+        assert len(content) == 1
+        assert response.headers["X-Total-Count"] == "1"
+        assert content[0]["type"] == "flavor"
+        assert content[0]["score"] > 0
+        item = FlavorRead(**content[0]["item"])
+        assert item.uid == db_public_flavor.uid
+
+
+def test_search_with_types(
+    db_public_flavor: Flavor, api_client_read_only: TestClient
+) -> None:
+    """Execute GET operations to look for items of specific types."""
+    settings = get_settings()
+
+    response = api_client_read_only.get(
+        f"{settings.API_V1_STR}/search/",
+        params={"q": db_public_flavor.name, "types": ["image", "network"]},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 0
+    assert response.headers["X-Total-Count"] == "0"
+
+    response = api_client_read_only.get(
+        f"{settings.API_V1_STR}/search/",
+        params={"q": db_public_flavor.name, "types": ["flavor"]},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 1
+
+
+def test_search_with_special_chars(
+    db_public_flavor: Flavor, api_client_read_only: TestClient
+) -> None:
+    """Execute GET operations with words containing Lucene operators."""
+    settings = get_settings()
+
+    response = api_client_read_only.get(
+        f"{settings.API_V1_STR}/search/", params={"q": 'a:b (c "d'}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 0
+
+
+def test_search_with_boolean_operators(
+    db_public_flavor: Flavor, api_client_read_only: TestClient
+) -> None:
+    """Execute GET operations with words matching the Lucene boolean operators.
+
+    They are looked for as plain words.
+    """
+    settings = get_settings()
+
+    for q in ["NOT", "foo AND", "OR bar", "a TO b", "&& ||"]:
+        response = api_client_read_only.get(
+            f"{settings.API_V1_STR}/search/", params={"q": q}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()) == 0
+
+    response = api_client_read_only.get(
+        f"{settings.API_V1_STR}/search/",
+        params={"q": f"NOT {db_public_flavor.name}"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 0
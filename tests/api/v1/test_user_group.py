@@ -5,6 +5,8 @@ from fastapi import status
 from fastapi.testclient import TestClient
 
 from app.config import get_settings
+from app.flavor.models import Flavor
+from app.user_group.access import refresh_access
 from app.user_group.models import UserGroup
 from app.user_group.schemas import (
     UserGroupBase,
@@ -402,6 +404,68 @@ def test_read_user_group_short(
     )
 
 
+def test_read_user_group_accessible_resources(
+    db_user_group_with_multiple_slas: UserGroup,
+    db_private_flavor_multiple_projects: Flavor,
+    api_client_read_only: TestClient,
+) -> None:
+    """Execute GET operations to read the flavors and providers a user group can
+    use.
+
+    They are served by the access index, which fixtures do not update.
+    """
+    settings = get_settings()
+    refresh_access()
+
+    db_user_group = db_user_group_with_multiple_slas
+    db_projects = [p for s in db_user_group.slas for p in s.projects]
+    for resource, expected in [
+        ("flavors", {f.uid for p in db_projects for f in p.private_flavors}),
+        ("providers", {p.provider.single().uid for p in db_projects}),
+    ]:
+        response = api_client_read_only.get(
+            f"{settings.API_V1_STR}/user_groups/{db_user_group.uid}/{resource}"
+        )
+        assert response.status_code == status.HTTP_200_OK
+        content = response.json()
+        assert len(expected) > 0
+        assert {i["uid"] for i in content} == expected
+        assert response.headers["X-Total-Count"] == str(len(expected))
+
+    response = api_client_read_only.get(
+        f"{settings.API_V1_STR}/user_groups/{uuid4()}/flavors"
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_access_index_after_sla_deletion(
+    db_user_group_with_multiple_slas: UserGroup,
+    api_client_read_write: TestClient,
+) -> None:
+    """Execute DELETE operations on an SLA and check the providers its user group
+    can use.
+
+    The write transaction refreshes the access index of the user groups which
+    reached the deleted SLA.
+    """
+    settings = get_settings()
+    refresh_access()
+
+    db_user_group = db_user_group_with_multiple_slas
+    db_slas = db_user_group.slas.all()
+    response = api_client_read_write.delete(
+        f"{settings.API_V1_STR}/slas/{db_slas[0].uid}"
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    expected = {p.provider.single().uid for p in db_slas[1].projects}
+    response = api_client_read_write.get(
+        f"{settings.API_V1_STR}/user_groups/{db_user_group.uid}/providers"
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert {i["uid"] for i in response.json()} == expected
+
+
 def test_read_not_existing_user_group(api_client_read_only: TestClient) -> None:
     """Execute GET operations to try to read a not existing user_group."""
     settings = get_settings()
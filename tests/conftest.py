@@ -7,6 +7,7 @@ from cryptography.hazmat.primitives.asymmetric import rsa
 from fastapi.testclient import TestClient
 from neomodel import clear_neo4j_database, db
 
+from app.cache import read_cache
 from app.main import app
 
 
@@ -25,6 +26,7 @@ pytest.register_assert_rewrite("tests.utils")
 @pytest.fixture
 def setup_and_teardown_db() -> Generator:
     clear_neo4j_database(db)
+    read_cache.invalidate()
     yield
     clear_neo4j_database(db)
 
@@ -138,6 +138,41 @@ def test_get_items_with_skip(
     assert len(stored_items) == 1
 
 
+def test_get_items_with_pagination(
+    db_public_flavor: Flavor, db_private_flavor: Flavor
+) -> None:
+    """Test the 'page' and 'size' attributes in GET operations.
+
+    Pagination applies on the window defined by 'skip' and 'limit'.
+    """
+    sorted_items = flavor.get_multi(sort="uid")
+
+    stored_items = flavor.get_multi(sort="uid", size=1)
+    assert len(stored_items) == 1
+    assert stored_items[0].uid == sorted_items[0].uid
+
+    stored_items = flavor.get_multi(sort="uid", page=1, size=1)
+    assert len(stored_items) == 1
+    assert stored_items[0].uid == sorted_items[1].uid
+
+    stored_items = flavor.get_multi(page=2, size=1)
+    assert len(stored_items) == 0
+
+    stored_items = flavor.get_multi(sort="uid", skip=1, page=0, size=2)
+    assert len(stored_items) == 1
+    assert stored_items[0].uid == sorted_items[1].uid
+
+    stored_items = flavor.get_multi(limit=1, page=1, size=1)
+    assert len(stored_items) == 0
+
+
+def test_count_items(db_public_flavor: Flavor, db_private_flavor: Flavor) -> None:
+    """Count all Flavors and the ones matching a given filter."""
+    assert flavor.count() == 2
+    assert flavor.count(uid=db_public_flavor.uid) == 1
+    assert flavor.count(uid=uuid4().hex) == 0
+
+
 def test_patch_item(db_private_flavor: Flavor) -> None:
     """Update the attributes of an existing Flavor, without updating its
     relationships.
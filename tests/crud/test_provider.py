@@ -1,8 +1,11 @@
 from typing import Generator
 from uuid import uuid4
 
+from app.flavor.models import Flavor
 from app.identity_provider.crud import identity_provider
+from app.image.models import Image
 from app.project.crud import project
+from app.projection import read_with_connections
 from app.provider.crud import provider
 from app.provider.models import Provider
 from app.region.crud import region
@@ -11,6 +14,8 @@ from tests.utils.provider import (
     create_random_provider_patch,
     validate_create_provider_attrs,
 )
+from tests.utils.region import create_random_region
+from tests.utils.utils import sort_by_uid
 
 
 def test_create_item(setup_and_teardown_db: Generator) -> None:
@@ -70,6 +75,35 @@ def test_create_item_with_everything(setup_and_teardown_db: Generator) -> None:
     validate_create_provider_attrs(obj_in=item_in, db_item=item)
 
 
+def test_create_item_with_regions_sharing_items(
+    setup_and_teardown_db: Generator,
+) -> None:
+    """Create a Provider with two regions sharing location, flavors and images.
+
+    Flavors and images with the same UUID and locations with the same site are
+    created once.
+    """
+    item_in = create_random_provider(with_projects=True)
+    projects = [i.uuid for i in item_in.projects]
+    region_in = create_random_region(
+        with_location=True, with_compute_services=True, projects=projects
+    )
+    region_in2 = create_random_region(with_compute_services=True, projects=projects)
+    region_in2.location = region_in.location
+    region_in2.compute_services[0].flavors = region_in.compute_services[0].flavors
+    region_in2.compute_services[0].images = region_in.compute_services[0].images
+    item_in.regions = [region_in, region_in2]
+    item = provider.create(obj_in=item_in)
+    validate_create_provider_attrs(obj_in=item_in, db_item=item)
+
+    db_regions = item.regions.all()
+    assert db_regions[0].location.single() == db_regions[1].location.single()
+    assert len(Flavor.nodes) == len(region_in.compute_services[0].flavors)
+    assert all(len(i.services) == 2 for i in Flavor.nodes.all())
+    assert len(Image.nodes) == len(region_in.compute_services[0].images)
+    assert all(len(i.services) == 2 for i in Image.nodes.all())
+
+
 def test_get_item(db_provider: Provider) -> None:
     """Retrieve a Provider from its UID."""
     item = provider.get(uid=db_provider.uid)
@@ -129,6 +163,25 @@ def test_get_items_with_skip(db_provider: Provider, db_provider2: Provider) -> N
     assert len(stored_items) == 1
 
 
+def test_read_items_with_connections(setup_and_teardown_db: Generator) -> None:
+    """Read a Provider and all its related items with a single query.
+
+    The result matches the one built reading the relationships in ORM mode.
+    """
+    item_in = create_random_provider(
+        with_identity_providers=True, with_projects=True, with_regions=True
+    )
+    item = provider.create(obj_in=item_in)
+    for schema in [
+        provider.read_extended_schema,
+        provider.read_extended_public_schema,
+    ]:
+        items = read_with_connections(schema=schema, model=Provider, items=[item])
+        assert len(items) == 1
+        assert isinstance(items[0], schema)
+        assert sort_by_uid(items[0].dict()) == sort_by_uid(schema.from_orm(item).dict())
+
+
 def test_patch_item(db_provider: Provider) -> None:
     """Update the attributes of an existing Provider, without updating its
     relationships.
@@ -371,6 +424,48 @@ def test_force_update_without_changing_regions(
     assert item.regions.single() == db_region
 
 
+def test_force_update_with_same_data(setup_and_teardown_db: Generator) -> None:
+    """Update an existing Provider with the data used to create it.
+
+    Nothing changes, so the update returns None.
+    """
+    item_in = create_random_provider(
+        with_identity_providers=True, with_projects=True, with_regions=True
+    )
+    db_item = provider.create(obj_in=item_in)
+    assert not provider.update(db_obj=db_item, obj_in=item_in, force=True)
+
+
+def test_force_update_removing_region_with_shared_items(
+    setup_and_teardown_db: Generator,
+) -> None:
+    """Update a Provider with two regions sharing location, flavors and images.
+
+    Removing one region, shared flavors, images and location are kept.
+    """
+    item_in = create_random_provider(with_projects=True)
+    projects = [i.uuid for i in item_in.projects]
+    region_in = create_random_region(
+        with_location=True, with_compute_services=True, projects=projects
+    )
+    region_in2 = create_random_region(with_compute_services=True, projects=projects)
+    region_in2.location = region_in.location
+    region_in2.compute_services[0].flavors = region_in.compute_services[0].flavors
+    region_in2.compute_services[0].images = region_in.compute_services[0].images
+    item_in.regions = [region_in, region_in2]
+    db_item = provider.create(obj_in=item_in)
+
+    item_in.regions = [region_in2]
+    item = provider.update(db_obj=db_item, obj_in=item_in, force=True)
+    validate_create_provider_attrs(obj_in=item_in, db_item=item)
+    assert len(item.regions) == 1
+    assert item.regions.single().location.single() is not None
+    assert len(Flavor.nodes) == len(region_in.compute_services[0].flavors)
+    assert all(len(i.services) == 1 for i in Flavor.nodes.all())
+    assert len(Image.nodes) == len(region_in.compute_services[0].images)
+    assert all(len(i.services) == 1 for i in Image.nodes.all())
+
+
 def test_delete_item(db_provider: Provider) -> None:
     """Delete an existing Provider."""
     assert provider.remove(db_obj=db_provider)
@@ -2,10 +2,12 @@ from typing import Generator
 from uuid import uuid4
 
 from app.project.crud import project
+from app.project.models import Project
 from app.sla.crud import sla
 from app.sla.models import SLA
 from app.user_group.crud import user_group
 from app.user_group.models import UserGroup
+from app.writes import WriteLog, write_log
 from scripts.models.provider import Provider
 from tests.utils.sla import (
     create_random_sla,
@@ -161,6 +163,29 @@ def test_replace_project_with_another_same_provider(db_sla2: SLA) -> None:
     validate_create_sla_attrs(obj_in=item_in, db_item=item)
 
 
+def test_replace_project_is_logged(db_sla2: SLA) -> None:
+    """Replace the project of an existing SLA and check the change is recorded in
+    the log of the write transaction.
+    """
+    db_project = db_sla2.projects.single()
+    db_provider = db_project.provider.single()
+    for db_project2 in db_provider.projects:
+        if db_project2.uid != db_project.uid:
+            break
+
+    item_in = create_random_sla(project=db_project2.uuid)
+    log = WriteLog()
+    token = write_log.set(log)
+    try:
+        sla.update(
+            db_obj=db_sla2, obj_in=item_in, projects=db_provider.projects, force=True
+        )
+    finally:
+        write_log.reset(token)
+    assert log.written
+    assert {db_project.uid, db_project2.uid} <= log.nodes[(Project, "uid")]
+
+
 def test_add_new_project_diff_provider_to_existing_sla(
     db_sla: SLA, db_provider_with_multiple_projects: Provider
 ) -> None:
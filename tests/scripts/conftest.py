@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# Scripts import their sibling modules as top level ones.
+scripts_path = Path(__file__).parents[2] / "scripts"
+sys.path.insert(1, str(scripts_path))
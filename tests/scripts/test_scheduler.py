@@ -0,0 +1,79 @@
+import asyncio
+from typing import Generator, List
+from unittest import mock
+
+import pytest
+from scheduler import BACKOFF, MAX_RETRIES, RateLimiter, Scheduler
+
+
+class TransientError(Exception):
+    pass
+
+
+def run(func: mock.Mock) -> str:
+    """Run the function through a scheduler retrying the transient errors."""
+
+    async def main() -> str:
+        scheduler = Scheduler(
+            max_concurrency=2,
+            rate=1000,
+            is_transient=lambda e: isinstance(e, TransientError),
+        )
+        try:
+            return await scheduler.run("endpoint", func)
+        finally:
+            scheduler.shutdown()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def sleep() -> Generator:
+    """Skip the backoff delays, without jitter, and the rate limiter waits."""
+    with mock.patch("scheduler.asyncio.sleep", mock.AsyncMock()) as sleep:
+        with mock.patch("scheduler.random.uniform", return_value=1):
+            with mock.patch.object(RateLimiter, "wait", mock.AsyncMock()):
+                yield sleep
+
+
+def test_retry_transient_errors(sleep: mock.AsyncMock) -> None:
+    """Retry the transient errors with exponential backoff."""
+    func = mock.Mock(side_effect=[TransientError(), TransientError(), "done"])
+    assert run(func) == "done"
+    assert func.call_count == 3
+    assert [i.args[0] for i in sleep.await_args_list] == [BACKOFF, BACKOFF * 2]
+
+
+def test_retry_transient_errors_up_to_max_retries(sleep: mock.AsyncMock) -> None:
+    """Raise the transient error once the retries are over."""
+    func = mock.Mock(side_effect=TransientError())
+    with pytest.raises(TransientError):
+        run(func)
+    assert func.call_count == MAX_RETRIES + 1
+    assert sleep.await_count == MAX_RETRIES
+
+
+def test_raise_other_errors(sleep: mock.AsyncMock) -> None:
+    """Raise immediately the errors which are not transient."""
+    func = mock.Mock(side_effect=ValueError())
+    with pytest.raises(ValueError):
+        run(func)
+    func.assert_called_once()
+    sleep.assert_not_awaited()
+
+
+def test_rate_limiter() -> None:
+    """Space the start of consecutive calls by the limiter interval."""
+
+    async def main() -> List[float]:
+        limiter = RateLimiter(rate=20)
+        loop = asyncio.get_running_loop()
+        starts = []
+        for _ in range(3):
+            await limiter.wait()
+            starts.append(loop.time())
+        return starts
+
+    starts = asyncio.run(main())
+    intervals = [b - a for a, b in zip(starts, starts[1:])]
+    assert all(i >= 0.05 - 1e-3 for i in intervals)
@@ -0,0 +1,76 @@
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+from snapshots import Snapshot, SnapshotStore
+
+from app.provider.schemas_extended import ImageCreateExtended
+
+KEY = SnapshotStore.key("provider", "region", "project")
+
+
+def get_store(path: Path) -> SnapshotStore:
+    return SnapshotStore(path=str(path), full_sync_interval=timedelta(days=1))
+
+
+def get_snapshot(full_sync_at: datetime) -> Snapshot:
+    image = ImageCreateExtended(
+        uuid=uuid4().hex, name="image", is_public=False, projects=[uuid4().hex]
+    )
+    return Snapshot(
+        synced_at=datetime.now(timezone.utc),
+        full_sync_at=full_sync_at,
+        images={image.uuid: image},
+    )
+
+
+def test_save_and_load(tmp_path: Path) -> None:
+    """Read back the saved snapshots, leaving no temporary file."""
+    path = tmp_path / "snapshots.json.gz"
+    snapshot = get_snapshot(datetime.now(timezone.utc))
+    store = get_store(path)
+    store.set(KEY, snapshot)
+    store.save()
+    assert os.listdir(tmp_path) == [path.name]
+
+    store = get_store(path)
+    store.load()
+    assert store.get(KEY) == snapshot
+
+
+def test_load_missing_file(tmp_path: Path) -> None:
+    """Start without snapshots when the file does not exist."""
+    store = get_store(tmp_path / "snapshots.json.gz")
+    store.load()
+    assert store.get(KEY) is None
+
+
+def test_get_when_full_sync_is_due(tmp_path: Path) -> None:
+    """Return no snapshot once the full sync interval has passed."""
+    store = get_store(tmp_path / "snapshots.json.gz")
+    now = datetime.now(timezone.utc)
+    store.set(KEY, get_snapshot(now - timedelta(hours=23)))
+    assert store.get(KEY) is not None
+    store.set(KEY, get_snapshot(now - timedelta(days=1)))
+    assert store.get(KEY) is None
+
+
+def test_interrupted_save(tmp_path: Path) -> None:
+    """Keep the previous file when the save does not complete."""
+    path = tmp_path / "snapshots.json.gz"
+    snapshot = get_snapshot(datetime.now(timezone.utc))
+    store = get_store(path)
+    store.set(KEY, snapshot)
+    store.save()
+
+    store.set(KEY, get_snapshot(datetime.now(timezone.utc)))
+    with mock.patch("snapshots.os.replace", side_effect=OSError):
+        with pytest.raises(OSError):
+            store.save()
+
+    store = get_store(path)
+    store.load()
+    assert store.get(KEY) == snapshot
@@ -0,0 +1,92 @@
+import gzip
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from starlette.types import Receive, Scope, Send
+
+from app.compression import GZipRequestMiddleware
+
+
+async def echo(scope: Scope, receive: Receive, send: Send) -> None:
+    """Return the received body and the headers describing it."""
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    headers = dict(scope["headers"])
+    response = JSONResponse(
+        {
+            "body": body.decode(),
+            "content_length": headers.get(b"content-length", b"").decode(),
+            "content_encoding": headers.get(b"content-encoding", b"").decode(),
+        }
+    )
+    await response(scope, receive, send)
+
+
+def get_client(max_size: int = 1024) -> TestClient:
+    return TestClient(GZipRequestMiddleware(echo, max_size=max_size))
+
+
+def test_gzip_body() -> None:
+    """Decompress a gzip body and fix the headers describing it."""
+    data = b'{"name": "provider"}'
+    response = get_client().post(
+        "/", content=gzip.compress(data), headers={"content-encoding": "gzip"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    content = response.json()
+    assert content["body"] == data.decode()
+    assert content["content_length"] == str(len(data))
+    assert content["content_encoding"] == ""
+
+
+def test_plain_body() -> None:
+    """Pass through the bodies without the gzip encoding."""
+    data = b'{"name": "provider"}'
+    response = get_client().post("/", content=data)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["body"] == data.decode()
+
+
+def test_invalid_gzip_body() -> None:
+    """Reject a body which is not gzip compressed."""
+    response = get_client().post(
+        "/", content=b"not gzip data", headers={"content-encoding": "gzip"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Invalid gzip request body"
+
+
+def test_truncated_gzip_body() -> None:
+    """Reject a gzip body cut before its end."""
+    data = gzip.compress(b'{"name": "provider"}' * 10)
+    response = get_client().post(
+        "/", content=data[: len(data) // 2], headers={"content-encoding": "gzip"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Truncated gzip request body"
+
+
+def test_gzip_body_with_trailing_data() -> None:
+    """Reject a gzip body followed by other data."""
+    data = gzip.compress(b'{"name": "provider"}') + b"trailing"
+    response = get_client().post(
+        "/", content=data, headers={"content-encoding": "gzip"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Unexpected data after the gzip request body"
+
+
+def test_oversized_gzip_body() -> None:
+    """Reject a gzip body growing over the maximum size once decompressed."""
+    response = get_client(max_size=1024).post(
+        "/", content=gzip.compress(b"0" * 2048), headers={"content-encoding": "gzip"}
+    )
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    assert response.json()["detail"] == (
+        "Decompressed request body larger than 1024 bytes"
+    )
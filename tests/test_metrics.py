@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+from typing import Optional
+from uuid import uuid4
+
+from fastapi import status
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+from starlette.types import Receive, Scope, Send
+
+from app.metrics import (
+    REQUEST_DURATION,
+    RESPONSE_SIZE,
+    UNMATCHED,
+    Histogram,
+    MetricsMiddleware,
+)
+
+
+def test_histogram_render() -> None:
+    """Render the buckets as cumulative counts, followed by the sum and the count."""
+    histogram = Histogram("test_seconds", "Test histogram.", ("route",), (0.1, 1))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+    assert histogram.render({"worker": "1"}) == [
+        "# HELP test_seconds Test histogram.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{worker="1",route="/a",le="0.1"} 1',
+        'test_seconds_bucket{worker="1",route="/a",le="1"} 2',
+        'test_seconds_bucket{worker="1",route="/a",le="+Inf"} 3',
+        'test_seconds_sum{worker="1",route="/a"} 5.55',
+        'test_seconds_count{worker="1",route="/a"} 3',
+    ]
+
+
+def test_histogram_render_escape_labels() -> None:
+    """Escape backslashes, double quotes and new lines in the label values."""
+    histogram = Histogram("test_seconds", "Test histogram.", ("route",), (1,))
+    histogram.observe(0.5, 'a\\b"c\nd')
+    lines = histogram.render()
+    assert 'test_seconds_count{route="a\\\\b\\"c\\nd"} 1' in lines
+
+
+def test_histogram_render_without_labels() -> None:
+    """Render the sum and the count without braces when there are no labels."""
+    histogram = Histogram("test_total", "Test histogram.", (), (1,))
+    histogram.observe(2)
+    lines = histogram.render()
+    assert "test_total_sum 2.0" in lines
+    assert "test_total_count 1" in lines
+
+
+def get_sample(histogram: Histogram, suffix: str, *labels: str) -> str:
+    """Return the value of the sample with the given suffix and label values."""
+    for line in histogram.render():
+        name, _, value = line.rpartition(" ")
+        if name.startswith(f"{histogram.name}_{suffix}{{") and all(
+            f'="{i}"' in name for i in labels
+        ):
+            return value
+    raise AssertionError(f"No {suffix} sample with labels {labels}")
+
+
+def get_client(route: Optional[str], body: bytes, status_code: int) -> TestClient:
+    """Return a client of an app answering with the given body and status, after
+    setting the given route template, if any, as a router would.
+    """
+
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        if route is not None:
+            scope["route"] = SimpleNamespace(path=route)
+        response = PlainTextResponse(body, status_code=status_code)
+        await response(scope, receive, send)
+
+    return TestClient(MetricsMiddleware(app))
+
+
+def test_middleware_observes_route() -> None:
+    """Observe duration and size of the requests by route template and status."""
+    route = f"/items/{uuid4().hex}/{{item_uid}}"
+    client = get_client(route, b"x" * 10, status.HTTP_201_CREATED)
+    response = client.get("/items/1")
+    assert response.status_code == status.HTTP_201_CREATED
+
+    assert get_sample(REQUEST_DURATION, "count", "GET", route, "201") == "1"
+    assert get_sample(RESPONSE_SIZE, "count", "GET", route) == "1"
+    assert get_sample(RESPONSE_SIZE, "sum", "GET", route) == "10.0"
+
+
+def test_middleware_observes_unmatched_route() -> None:
+    """Group the requests not matching any route under the same label."""
+    client = get_client(None, b"", status.HTTP_404_NOT_FOUND)
+    before = 0
+    try:
+        before = int(get_sample(REQUEST_DURATION, "count", "DELETE", UNMATCHED, "404"))
+    except AssertionError:
+        pass
+    response = client.delete(f"/{uuid4().hex}")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    count = get_sample(REQUEST_DURATION, "count", "DELETE", UNMATCHED, "404")
+    assert int(count) == before + 1
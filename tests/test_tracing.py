@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+from unittest import mock
+
+import pytest
+
+from app.config import get_settings
+from app.tracing import (
+    MAX_STATEMENT_LENGTH,
+    QueryTrace,
+    TraceStore,
+    new_trace_id,
+    params_shape,
+    trace_query,
+    trace_worker,
+)
+
+
+def test_trace_store() -> None:
+    """Keep the most recent traces, listing them from the most recent one."""
+    store = TraceStore(maxsize=2)
+    for i in range(3):
+        store.add({"id": str(i)})
+    assert store.list() == [{"id": "2"}, {"id": "1"}]
+    assert store.get("2") == {"id": "2"}
+    assert store.get("0") is None
+
+
+def test_new_trace_id() -> None:
+    """Sample the requests with the configured rate.
+
+    Trace ids start with the pid of the worker storing them.
+    """
+    settings = get_settings()
+    with mock.patch.object(settings, "QUERY_TRACE_SAMPLE_RATE", 0):
+        assert new_trace_id() is None
+    with mock.patch.object(settings, "QUERY_TRACE_SAMPLE_RATE", 1):
+        trace_id = new_trace_id()
+    assert trace_id is not None
+    assert trace_worker(trace_id) == os.getpid()
+    assert trace_worker("not-a-trace") is None
+
+
+def test_params_shape() -> None:
+    """Return the types of the parameters, with the length of collections."""
+    params = {"uid": "abc", "skip": 0, "uids": ["a", "b"], "props": {"a": 1}}
+    assert params_shape(params) == {
+        "uid": "str",
+        "skip": "int",
+        "uids": "list[2]",
+        "props": "dict[1]",
+    }
+    assert params_shape(None) == {}
+
+
+def test_trace_query() -> None:
+    """Append the statement to the queries of a traced request.
+
+    Whitespaces are collapsed, long statements truncated and parameter values
+    dropped.
+    """
+    queries = []
+    with mock.patch.object(get_settings(), "SLOW_QUERY_THRESHOLD", 0):
+        trace_query(
+            queries,
+            statement="MATCH (n)\n    RETURN n",
+            params={"uid": "secret"},
+            rows=1,
+            duration=0.1,
+        )
+        trace_query(queries, statement="x" * 3000, params=None, rows=None, duration=0.1)
+    assert queries[0] == QueryTrace(
+        statement="MATCH (n) RETURN n", params={"uid": "str"}, rows=1, duration=0.1
+    )
+    assert len(queries[1].statement) == MAX_STATEMENT_LENGTH
+    assert queries[1].rows is None
+
+
+@pytest.mark.parametrize("queries", [None, []])
+def test_trace_slow_query(queries, caplog: pytest.LogCaptureFixture) -> None:
+    """Log the slow statements, whether the request is traced or not."""
+    with mock.patch.object(get_settings(), "SLOW_QUERY_THRESHOLD", 1):
+        with caplog.at_level(logging.WARNING, logger="app.tracing"):
+            trace_query(
+                queries,
+                statement="MATCH (n) RETURN n",
+                params={},
+                rows=3,
+                duration=0.5,
+                path="/fast",
+            )
+            trace_query(
+                queries,
+                statement="MATCH (n) RETURN n",
+                params={},
+                rows=3,
+                duration=2,
+                path="/slow",
+            )
+    assert len(caplog.records) == 1
+    record = json.loads(caplog.records[0].getMessage())
+    assert record["event"] == "slow_query"
+    assert record["path"] == "/slow"
+    assert record["rows"] == 3
+    if queries is not None:
+        assert len(queries) == 2
@@ -2,6 +2,7 @@ import string
 import time
 from datetime import date, datetime, timezone
 from random import choices, getrandbits, randint, randrange
+from typing import Any
 
 from pydantic import AnyHttpUrl
 
@@ -54,3 +55,15 @@ def random_positive_float() -> float:
 
 def random_non_negative_float() -> float:
     return float(random_non_negative_int())
+
+
+def sort_by_uid(data: Any) -> Any:
+    """Recursively sort lists of items by uid to compare unordered results."""
+    if isinstance(data, dict):
+        return {k: sort_by_uid(v) for k, v in data.items()}
+    if isinstance(data, list):
+        items = [sort_by_uid(i) for i in data]
+        return sorted(
+            items, key=lambda x: x.get("uid", "") if isinstance(x, dict) else x
+        )
+    return data